@@ -0,0 +1,268 @@
+"""
+播放延迟基准测试（无界面，使用 PlayerCore 的 headless 模式）
+- 用 mpv 的 lavfi 测试源在临时目录生成多种容器/编码的测试视频
+- 统计加载到首帧、跳过片头开销、绝对/相对跳转、播完切换下一集的 p50/p99
+- 结果写入 JSON 报告，可与之前的报告对比
+运行方法:
+  python bench_playback.py                          # 默认每项 10 次
+  python bench_playback.py --runs 30 --output bench_report.json
+  python bench_playback.py --compare old_report.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+
+import mpv
+
+from player_core import PlayerCore
+from version import __version__
+
+
+# 测试视频：(名称, 容器, 视频编码, 音频编码)，编码器不可用时自动跳过
+MEDIA_SPECS = [
+    ("mp4-h264", "mp4", "libx264", "aac"),
+    ("mkv-hevc", "matroska", "libx265", "aac"),
+    ("webm-vp9", "webm", "libvpx-vp9", "libopus"),
+    ("avi-mpeg4", "avi", "mpeg4", "libmp3lame"),
+]
+MEDIA_EXT = {"mp4": ".mp4", "matroska": ".mkv", "webm": ".webm", "avi": ".avi"}
+
+MEDIA_DURATION = 30  # 测试视频时长（秒）
+EVENT_TIMEOUT = 10.0  # 等待单个事件的超时（秒）
+SKIP_INTRO = 5  # 测试跳过片头时使用的秒数
+REGRESSION_THRESHOLD = 0.10  # 对比报告时超过 10% 视为变慢
+
+
+def generate_media(out_dir: str) -> list:
+    """用 lavfi 测试源编码生成测试视频
+    返回: [(名称, 路径), ...]
+    """
+    source = (
+        f"av://lavfi:testsrc2=size=1280x720:rate=24:duration={MEDIA_DURATION}[out0];"
+        f"sine=frequency=440:duration={MEDIA_DURATION}[out1]"
+    )
+    media = []
+    for name, fmt, vcodec, acodec in MEDIA_SPECS:
+        path = os.path.join(out_dir, name + MEDIA_EXT[fmt])
+        print(f"🎞  生成 {name} ...", end=" ", flush=True)
+        try:
+            encoder = mpv.MPV(o=path, of=fmt, ovc=vcodec, oac=acodec)
+            encoder.play(source)
+            encoder.wait_for_playback()
+            encoder.terminate()
+        except Exception as e:
+            print(f"跳过（{e}）")
+            continue
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            print(f"{os.path.getsize(path) / 1024:.0f} KB")
+            media.append((name, path))
+        else:
+            print("跳过（编码器不可用）")
+    return media
+
+
+class EventProbe:
+    """等待 mpv 事件的辅助类"""
+
+    def __init__(self, core: PlayerCore):
+        self.core = core
+        self.restart = threading.Event()
+        self.loaded = threading.Event()
+        self.eof = threading.Event()
+
+        @core.player.event_callback('playback-restart')
+        def _on_restart(_event):
+            self.restart.set()
+
+        @core.player.event_callback('file-loaded')
+        def _on_loaded(_event):
+            self.loaded.set()
+
+        @core.player.property_observer('eof-reached')
+        def _on_eof(_name, value):
+            if value:
+                self.eof.set()
+
+    def reset(self):
+        self.restart.clear()
+        self.loaded.clear()
+        self.eof.clear()
+
+    @staticmethod
+    def wait(event: threading.Event):
+        if not event.wait(EVENT_TIMEOUT):
+            raise TimeoutError("等待 mpv 事件超时")
+
+
+def _ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_load(core: PlayerCore, probe: EventProbe, path: str, skip_intro: int = 0) -> float:
+    """加载到首帧的耗时（毫秒）"""
+    core.skip_intro = skip_intro
+    probe.reset()
+    start = time.perf_counter()
+    core.load(path)
+    # 片头跳转在 file-loaded 回调中发起（早于首次 playback-restart），
+    # 因此第一次 playback-restart 就是跳转后的首帧
+    probe.wait(probe.loaded)
+    probe.wait(probe.restart)
+    elapsed = _ms(start)
+    core.skip_intro = 0
+    return elapsed
+
+
+def bench_seek(core: PlayerCore, probe: EventProbe, relative: bool) -> float:
+    """一次跳转到画面恢复的耗时（毫秒）"""
+    probe.reset()
+    start = time.perf_counter()
+    if relative:
+        if core.position > MEDIA_DURATION / 2:
+            core.seek_backward()
+        else:
+            core.seek_forward()
+    else:
+        core.seek_to(random.uniform(1, MEDIA_DURATION - 2))
+    probe.wait(probe.restart)
+    return _ms(start)
+
+
+def bench_eof_transition(core: PlayerCore, probe: EventProbe, path: str, next_path: str) -> float:
+    """播放到结尾后切换到下一集首帧的耗时（毫秒）"""
+    bench_load(core, probe, path)
+    probe.reset()
+    core.seek_to(MEDIA_DURATION - 0.5)
+    core.play()
+    probe.wait(probe.eof)
+    probe.reset()
+    start = time.perf_counter()
+    core.load(next_path)
+    probe.wait(probe.restart)
+    return _ms(start)
+
+
+def summarize(samples: list) -> dict:
+    """计算 p50/p99/均值（毫秒）"""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+    return {
+        "n": len(ordered),
+        "p50": pct(0.5),
+        "p99": pct(0.99),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def run_benchmarks(media: list, runs: int) -> dict:
+    """对每个测试视频运行全部测试"""
+    core = PlayerCore(headless=True)
+    core.seek_step = 5
+    probe = EventProbe(core)
+    results = {}
+    try:
+        for i, (name, path) in enumerate(media):
+            next_path = media[(i + 1) % len(media)][1]
+            print(f"\n⏱  {name}")
+            metrics = {"load": [], "load_skip_intro": [], "seek_absolute": [],
+                       "seek_relative": [], "eof_transition": []}
+            for _ in range(runs):
+                metrics["load"].append(bench_load(core, probe, path))
+                metrics["load_skip_intro"].append(bench_load(core, probe, path, SKIP_INTRO))
+                core.play()
+                metrics["seek_absolute"].append(bench_seek(core, probe, relative=False))
+                metrics["seek_relative"].append(bench_seek(core, probe, relative=True))
+                metrics["eof_transition"].append(bench_eof_transition(core, probe, path, next_path))
+            results[name] = {key: summarize(values) for key, values in metrics.items()}
+            results[name]["intro_skip_overhead_p50"] = round(
+                results[name]["load_skip_intro"]["p50"] - results[name]["load"]["p50"], 2
+            )
+            for key, s in results[name].items():
+                if isinstance(s, dict):
+                    print(f"   {key:18s} p50 {s['p50']:8.1f}ms   p99 {s['p99']:8.1f}ms")
+    finally:
+        core.terminate()
+    return results
+
+
+def compare(report: dict, baseline_path: str):
+    """与之前的报告对比并打印差异"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 与 {baseline_path}（{baseline.get('created', '?')}）对比")
+    regressions = 0
+    for name, metrics in report["results"].items():
+        old_metrics = baseline.get("results", {}).get(name)
+        if not old_metrics:
+            continue
+        for key, s in metrics.items():
+            old = old_metrics.get(key)
+            if not isinstance(s, dict) or not isinstance(old, dict) or not old.get("p50"):
+                continue
+            delta = (s["p50"] - old["p50"]) / old["p50"]
+            flag = ""
+            if delta > REGRESSION_THRESHOLD:
+                flag = "  ⚠️ 变慢"
+                regressions += 1
+            print(f"   {name:10s} {key:18s} p50 {old['p50']:8.1f} → {s['p50']:8.1f}ms ({delta:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播放延迟基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="每项测试的重复次数")
+    parser.add_argument("--output", default="bench_report.json", help="JSON 报告输出路径")
+    parser.add_argument("--compare", help="与之前的 JSON 报告对比")
+    parser.add_argument("--keep-media", action="store_true", help="保留生成的测试视频")
+    args = parser.parse_args()
+
+    media_dir = tempfile.mkdtemp(prefix="player_bench_")
+    try:
+        media = generate_media(media_dir)
+        if not media:
+            print("❌ 无法生成任何测试视频，请检查 libmpv 是否包含编码器")
+            sys.exit(1)
+
+        results = run_benchmarks(media, args.runs)
+        probe_player = mpv.MPV(vo="null", ao="null")
+        mpv_version = probe_player.mpv_version
+        probe_player.terminate()
+
+        report = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "app_version": __version__,
+            "mpv_version": mpv_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "media": [name for name, _ in media],
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ 报告已写入 {args.output}")
+
+        if args.compare and compare(report, args.compare):
+            sys.exit(2)
+    finally:
+        if args.keep_media:
+            print(f"📁 测试视频保留在 {media_dir}")
+        else:
+            shutil.rmtree(media_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
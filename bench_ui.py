@@ -0,0 +1,245 @@
+"""
+界面性能基准测试（Qt offscreen 平台 + 模拟 mpv，无需 libmpv 和显示器）
+- 对 10 ~ 20000 个文件的文件夹测量打开文件夹、刷新播放列表、切换文件、
+  打开播放列表、搜索过滤、构建菜单、更新进度的耗时
+- 通过主线程心跳统计超过阈值的卡顿次数
+运行方法:
+  python bench_ui.py
+  python bench_ui.py --sizes 10 1000 20000 --stall-ms 50 --output bench_ui_report.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+# 必须在导入 PyQt6 / player_core 之前设置
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_settings_dir = tempfile.mkdtemp(prefix="player_bench_settings_")
+os.environ["PLAYER_SETTINGS_DIR"] = _settings_dir
+
+import fake_mpv
+fake_mpv.install(load_delay=0.02, seek_delay=0.005)
+
+from PyQt6.QtCore import QTimer, QEventLoop
+from PyQt6.QtWidgets import QApplication
+
+from version import __version__
+
+
+DEFAULT_SIZES = [10, 100, 1000, 5000, 20000]
+HEARTBEAT_MS = 5  # 心跳间隔
+SETTLE_MS = 50  # 操作完成后继续观察卡顿的时间
+OP_TIMEOUT_S = 60  # 单个操作的超时
+
+
+class StallMonitor:
+    """主线程心跳：相邻两次心跳间隔超过阈值即计为一次卡顿"""
+
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self.stalls: list = []
+        self._last = 0.0
+        self._timer = QTimer()
+        self._timer.setInterval(HEARTBEAT_MS)
+        self._timer.timeout.connect(self._beat)
+
+    def start(self):
+        self.stalls = []
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        self._beat()
+        self._timer.stop()
+
+    def _beat(self):
+        now = time.perf_counter()
+        gap = (now - self._last) * 1000
+        if gap > self.threshold_ms:
+            self.stalls.append(round(gap, 1))
+        self._last = now
+
+
+def run_op(monitor: StallMonitor, func, done=lambda: True) -> dict:
+    """在事件循环中执行操作，直到 done() 为真
+    返回: {"sync_ms": 同步阻塞耗时, "total_ms": 完成总耗时, "stalls": 卡顿次数, "max_stall_ms": 最长卡顿}
+    """
+    loop = QEventLoop()
+    result = {}
+    start = [0.0]
+    deadline = time.perf_counter() + OP_TIMEOUT_S
+
+    def poll():
+        if done() or time.perf_counter() > deadline:
+            result["total_ms"] = round((time.perf_counter() - start[0]) * 1000, 2)
+            QTimer.singleShot(SETTLE_MS, loop.quit)
+        else:
+            QTimer.singleShot(1, poll)
+
+    def invoke():
+        start[0] = time.perf_counter()
+        func()
+        result["sync_ms"] = round((time.perf_counter() - start[0]) * 1000, 2)
+        poll()
+
+    monitor.start()
+    QTimer.singleShot(0, invoke)
+    loop.exec()
+    monitor.stop()
+    result["stalls"] = len(monitor.stalls)
+    result["max_stall_ms"] = max(monitor.stalls, default=0)
+    return result
+
+
+def close_popup_soon():
+    """菜单 exec() 会进入嵌套事件循环，稍后自动关闭弹出的菜单"""
+    def close():
+        popup = QApplication.activePopupWidget()
+        if popup:
+            popup.close()
+        else:
+            QTimer.singleShot(1, close)
+    QTimer.singleShot(0, close)
+
+
+def make_folder(root: str, count: int) -> str:
+    """创建包含 count 个空视频文件的文件夹"""
+    folder = os.path.join(root, f"folder_{count}")
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        open(os.path.join(folder, f"Show - {i + 1:05d} [1080p].mp4"), "w").close()
+    return folder
+
+
+def bench_folder(window, monitor: StallMonitor, folder: str) -> dict:
+    """对一个文件夹运行全部界面操作"""
+    results = {}
+    loaded = {"flag": False}
+
+    def on_loaded():
+        loaded["flag"] = True
+
+    window.fileLoadedSignal.connect(on_loaded)
+    try:
+        results["load_folder"] = run_op(
+            monitor, lambda: window._load_folder(folder),
+            done=lambda: loaded["flag"] and not window._scan_pending,
+        )
+        count = len(window._folder_files)
+
+        results["refresh_list"] = run_op(
+            monitor, lambda: window.playlist_widget._refresh_list(window._current_index)
+        )
+
+        loaded["flag"] = False
+
+        def load_middle():
+            window._current_index = count // 2
+            window._load_file(window._folder_files[window._current_index])
+
+        results["load_file"] = run_op(monitor, load_middle, done=lambda: loaded["flag"])
+
+        def toggle_playlist():
+            window._show_playlist()
+            window._show_playlist()
+
+        results["open_playlist"] = run_op(monitor, toggle_playlist)
+
+        def type_filter():
+            # 逐字输入，每次按键都会重新过滤
+            edit = window.playlist_widget.search_edit
+            for text in ("s", "sh", "sho", "show", "show 3", "show 34", "show 347"):
+                edit.setText(text)
+            edit.clear()
+
+        r = run_op(monitor, type_filter)
+        r["per_key_ms"] = round(r["sync_ms"] / 8, 3)
+        results["playlist_filter_x8"] = r
+
+        def speed_menu():
+            close_popup_soon()
+            window._show_speed_menu()
+
+        def audio_menu():
+            close_popup_soon()
+            window._show_audio_menu()
+
+        def subtitle_menu():
+            close_popup_soon()
+            window._show_subtitle_menu()
+
+        results["speed_menu"] = run_op(monitor, speed_menu)
+        results["audio_menu"] = run_op(monitor, audio_menu)
+        results["subtitle_menu"] = run_op(monitor, subtitle_menu)
+
+        def progress_updates():
+            for _ in range(100):
+                window._update_progress()
+
+        r = run_op(monitor, progress_updates)
+        r["per_call_ms"] = round(r["sync_ms"] / 100, 3)
+        results["update_progress_x100"] = r
+        results["files"] = count
+    finally:
+        window.fileLoadedSignal.disconnect(on_loaded)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="界面性能基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="文件夹中的文件数量")
+    parser.add_argument("--stall-ms", type=float, default=50, help="卡顿阈值（毫秒）")
+    parser.add_argument("--output", default="bench_ui_report.json", help="JSON 报告输出路径")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    from main_window import MainWindow
+    window = MainWindow()
+    window.show()
+
+    # 等待延迟初始化的播放器
+    wait = QEventLoop()
+    QTimer.singleShot(300, wait.quit)
+    wait.exec()
+    if not window.player:
+        print("❌ 播放器初始化失败")
+        sys.exit(1)
+
+    monitor = StallMonitor(args.stall_ms)
+    media_root = tempfile.mkdtemp(prefix="player_bench_ui_")
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "app_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stall_threshold_ms": args.stall_ms,
+        "results": {},
+    }
+    try:
+        for size in args.sizes:
+            folder = make_folder(media_root, size)
+            print(f"\n⏱  {size} 个文件")
+            results = bench_folder(window, monitor, folder)
+            report["results"][str(size)] = results
+            for name, r in results.items():
+                if isinstance(r, dict):
+                    print(f"   {name:22s} 同步 {r['sync_ms']:9.1f}ms   完成 {r['total_ms']:9.1f}ms   "
+                          f"卡顿 {r['stalls']:3d} 次（最长 {r['max_stall_ms']}ms）")
+            window._go_home()
+    finally:
+        window.close()
+        app.processEvents()  # 处理关闭窗口后的待处理事件，再删除临时目录
+        shutil.rmtree(media_root, ignore_errors=True)
+        shutil.rmtree(_settings_dir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ 报告已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+设置默认播放器的提示对话框（深色风格）
+从 main.py 拆分出来：main.py 会被后台分析的解码进程重新导入，不应在模块级加载 QtWidgets
+"""
+import sys
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout,
+    QLabel, QPushButton, QCheckBox
+)
+from PyQt6.QtCore import Qt
+
+
+class DefaultPlayerDialog(QDialog):
+    """自定义深色风格的默认播放器对话框"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("设置默认播放器")
+        self.setFixedSize(400, 200)
+        self.result_accepted = False
+        
+        # 设置窗口图标（与主窗口相同）
+        if parent is not None:
+            self.setWindowIcon(parent.windowIcon())
+        
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #1a1a1a;
+                color: #fff;
+                font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
+            }
+            QLabel {
+                color: #e0e0e0;
+                background: transparent;
+            }
+            QLabel#title {
+                font-size: 15px;
+                font-weight: bold;
+                color: #fff;
+            }
+            QLabel#subtitle {
+                font-size: 13px;
+                color: #888;
+            }
+            QCheckBox {
+                color: #888;
+                font-size: 12px;
+                spacing: 6px;
+            }
+            QCheckBox::indicator {
+                width: 16px;
+                height: 16px;
+                border: 1px solid #555;
+                border-radius: 3px;
+                background: #2a2a2a;
+            }
+            QCheckBox::indicator:checked {
+                background: #00a1d6;
+                border-color: #00a1d6;
+            }
+            QPushButton {
+                border: none;
+                border-radius: 4px;
+                padding: 10px 24px;
+                font-size: 13px;
+                font-weight: bold;
+            }
+            QPushButton#primary {
+                background: #00a1d6;
+                color: #fff;
+            }
+            QPushButton#primary:hover {
+                background: #00b5e5;
+            }
+            QPushButton#secondary {
+                background: #333;
+                color: #fff;
+            }
+            QPushButton#secondary:hover {
+                background: #444;
+            }
+        """)
+        
+        self._build()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not getattr(self, '_dark_titlebar_set', False):
+            self._dark_titlebar_set = True
+            if sys.platform == 'win32':
+                try:
+                    import ctypes
+                    ctypes.windll.dwmapi.DwmSetWindowAttribute(
+                        int(self.winId()), 20,
+                        ctypes.byref(ctypes.c_int(1)), ctypes.sizeof(ctypes.c_int)
+                    )
+                except Exception:
+                    pass
+
+    def _build(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(24, 24, 24, 24)
+        layout.setSpacing(16)
+        
+        # 标题
+        title = QLabel("是否将此应用设为默认视频播放器？")
+        title.setObjectName("title")
+        layout.addWidget(title)
+        
+        # 副标题
+        subtitle = QLabel("设置后，双击视频文件将自动使用此播放器打开。")
+        subtitle.setObjectName("subtitle")
+        subtitle.setWordWrap(True)
+        layout.addWidget(subtitle)
+        
+        layout.addStretch()
+        
+        # 复选框
+        self.checkbox = QCheckBox("不再提示")
+        layout.addWidget(self.checkbox)
+        
+        # 按钮行
+        btn_row = QHBoxLayout()
+        btn_row.setSpacing(12)
+        btn_row.addStretch()
+        
+        self.no_btn = QPushButton("暂不设置")
+        self.no_btn.setObjectName("secondary")
+        self.no_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.no_btn.clicked.connect(self.reject)
+        btn_row.addWidget(self.no_btn)
+        
+        self.yes_btn = QPushButton("设为默认")
+        self.yes_btn.setObjectName("primary")
+        self.yes_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.yes_btn.clicked.connect(self._on_accept)
+        btn_row.addWidget(self.yes_btn)
+        
+        layout.addLayout(btn_row)
+    
+    def _on_accept(self):
+        self.result_accepted = True
+        self.accept()
+    
+    def is_never_ask_checked(self) -> bool:
+        return self.checkbox.isChecked()
@@ -0,0 +1,245 @@
+"""
+mpv 模拟模块（无需 libmpv，用于界面基准测试）
+- 模拟属性读写、属性观察器和事件回调（在独立的“事件线程”中触发）
+- 加载、跳转等操作的延迟可配置
+使用方法:
+    import fake_mpv
+    fake_mpv.install(load_delay=0.05)   # 之后 import mpv 得到的是本模块
+"""
+import sys
+import time
+import queue
+import threading
+from typing import Callable
+
+
+# 可配置的模拟参数
+CONFIG = {
+    'load_delay': 0.05,  # loadfile 到 file-loaded 的延迟（秒）
+    'seek_delay': 0.01,  # 跳转到 playback-restart 的延迟（秒）
+    'duration': 1440.0,  # 模拟视频时长（秒）
+    'tick': 0.1,  # time-pos 更新间隔（秒）
+}
+
+DEFAULT_TRACKS = [
+    {'id': 1, 'type': 'video', 'codec': 'h264', 'selected': True},
+    {'id': 1, 'type': 'audio', 'codec': 'aac', 'lang': 'jpn', 'title': '', 'selected': True},
+    {'id': 2, 'type': 'audio', 'codec': 'aac', 'lang': 'chi', 'title': '', 'selected': False},
+    {'id': 1, 'type': 'sub', 'codec': 'ass', 'lang': 'chi', 'title': '', 'selected': True, 'external': False},
+]
+
+
+class ShutdownError(Exception):
+    """与 python-mpv 同名的异常"""
+
+
+class MpvEvent:
+    """模拟 python-mpv 的事件对象"""
+
+    def __init__(self, event_id: str, data=None):
+        self.event_id = event_id
+        self.data = data
+
+    def as_dict(self) -> dict:
+        return {'event': self.event_id, 'data': self.data}
+
+
+class MPV:
+    """mpv.MPV 的模拟实现"""
+
+    mpv_version = 'fake-mpv 0.0'
+
+    def __init__(self, *extra_flags, log_handler=None, loglevel=None, start_event_thread=True, **options):
+        state = {
+            '_props': {
+                'pause': False, 'speed': 1.0, 'volume': 100, 'mute': False,
+                'time-pos': None, 'duration': None, 'eof-reached': False,
+                'track-list': [], 'chapter-list': [], 'aid': 1, 'sid': 1,
+                'sub-delay': 0.0, 'sub-visibility': True,
+                'frame-drop-count': 0, 'decoder-frame-drop-count': 0,
+                'avsync': 0.0, 'estimated-vf-fps': 23.976, 'container-fps': 23.976,
+                'video-codec': 'h264', 'audio-codec-name': 'aac', 'hwdec-current': 'no',
+                'demuxer-cache-duration': 30.0, 'demuxer-cache-state': {'fw-bytes': 16 * 1024 * 1024},
+            },
+            '_options': dict(options),
+            '_observers': {},
+            '_event_handlers': {},
+            '_log_handler': log_handler,
+            '_commands': queue.Queue(),
+            '_terminated': False,
+            '_playing': False,
+        }
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+        self._thread = threading.Thread(target=self._event_loop, name='fake-mpv-event', daemon=True)
+        self._thread.start()
+
+    # ========== 属性 ==========
+
+    @staticmethod
+    def _name(attr: str) -> str:
+        return attr.replace('_', '-')
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return self._props.get(self._name(attr))
+
+    def __setattr__(self, attr, value):
+        if attr.startswith('_'):
+            object.__setattr__(self, attr, value)
+        else:
+            self._set(self._name(attr), value)
+
+    def __getitem__(self, name):
+        return self._props.get(name)
+
+    def __setitem__(self, name, value):
+        self._set(name, value)
+
+    def _set(self, name: str, value):
+        self._props[name] = value
+        self._notify(name, value)
+
+    def _notify(self, name: str, value):
+        for handler in list(self._observers.get(name, ())):
+            handler(name, value)
+
+    # ========== 观察器 / 事件 ==========
+
+    def observe_property(self, name: str, handler: Callable):
+        self._observers.setdefault(name, []).append(handler)
+        # 与 mpv 一致：注册后立即收到一次当前值
+        handler(name, self._props.get(name))
+
+    def unobserve_property(self, name: str, handler: Callable):
+        handlers = self._observers.get(name, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def property_observer(self, name: str):
+        def decorator(handler):
+            self.observe_property(name, handler)
+            return handler
+        return decorator
+
+    def event_callback(self, *event_types):
+        def decorator(callback):
+            for event_type in event_types:
+                self._event_handlers.setdefault(event_type, []).append(callback)
+            return callback
+        return decorator
+
+    def _emit(self, event_id: str, data=None):
+        event = MpvEvent(event_id, data)
+        for callback in list(self._event_handlers.get(event_id, ())):
+            callback(event)
+
+    # ========== 命令 ==========
+
+    def play(self, filename: str):
+        self.loadfile(filename)
+
+    def loadfile(self, filename: str, mode: str = 'replace', index=None, **options):
+        self._commands.put(('load', filename, options))
+
+    def seek(self, amount, reference='relative', precision='default-precise'):
+        self._commands.put(('seek', float(amount), reference))
+
+    def stop(self, keep_playlist=False):
+        self._commands.put(('stop',))
+
+    def sub_add(self, path, flags='select', title=None, lang=None):
+        tracks = list(self._props['track-list'])
+        tracks.append({'id': len(tracks) + 1, 'type': 'sub', 'lang': lang or '', 'title': title or path,
+                       'selected': True, 'external': True})
+        self._set('track-list', tracks)
+
+    def command(self, name, *args):
+        if name == 'loadfile':
+            self.loadfile(*args)
+        elif name == 'seek':
+            self.seek(*args)
+        elif name == 'stop':
+            self.stop()
+        return None
+
+    def terminate(self):
+        if not self._terminated:
+            self._terminated = True
+            self._commands.put(('quit',))
+
+    def wait_for_playback(self, timeout=None):
+        deadline = time.monotonic() + (timeout or 3600)
+        while self._playing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # ========== 模拟事件线程 ==========
+
+    def _event_loop(self):
+        while True:
+            try:
+                cmd = self._commands.get(timeout=CONFIG['tick'])
+            except queue.Empty:
+                self._advance_clock()
+                continue
+            kind = cmd[0]
+            if kind == 'quit':
+                self._emit('shutdown')
+                break
+            if kind == 'load':
+                self._do_load(cmd[1], cmd[2])
+            elif kind == 'seek':
+                self._do_seek(cmd[1], cmd[2])
+            elif kind == 'stop':
+                self._playing = False
+                self._emit('end-file', {'reason': 'stop'})
+                self._set('time-pos', None)
+                self._set('duration', None)
+
+    def _do_load(self, filename: str, options: dict):
+        if self._playing:
+            self._emit('end-file', {'reason': 'stop'})
+        self._emit('start-file')
+        time.sleep(CONFIG['load_delay'])
+        self._props['filename'] = filename
+        self._props['path'] = filename
+        self._set('eof-reached', False)
+        self._set('track-list', [dict(t) for t in DEFAULT_TRACKS])
+        self._set('duration', CONFIG['duration'])
+        self._set('time-pos', 0.0)
+        for key, value in options.items():
+            self._set(key.replace('_', '-'), value)
+        self._playing = True
+        self._emit('file-loaded')
+        self._emit('playback-restart')
+
+    def _do_seek(self, amount: float, reference: str):
+        if not self._playing:
+            return
+        time.sleep(CONFIG['seek_delay'])
+        duration = self._props['duration'] or 0
+        if 'absolute' in reference:
+            pos = amount
+        else:
+            pos = (self._props['time-pos'] or 0) + amount
+        self._set('time-pos', max(0.0, min(duration, pos)))
+        self._emit('playback-restart')
+
+    def _advance_clock(self):
+        if not self._playing or self._props['pause']:
+            return
+        duration = self._props['duration'] or 0
+        pos = (self._props['time-pos'] or 0) + CONFIG['tick'] * (self._props['speed'] or 1.0)
+        if pos >= duration:
+            self._set('time-pos', duration)
+            self._set('eof-reached', True)
+            self._set('pause', True)  # keep-open：停在最后一帧
+            return
+        self._set('time-pos', pos)
+
+
+def install(**config):
+    """用本模块替换 sys.modules 中的 mpv，必须在导入 player_core 之前调用"""
+    CONFIG.update(config)
+    sys.modules['mpv'] = sys.modules[__name__]
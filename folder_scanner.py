@@ -0,0 +1,171 @@
+"""
+后台文件夹扫描
+- 在工作线程中用 os.scandir 扫描视频文件，可递归子文件夹（如 "Season 1/…"）
+- 按自然顺序排序（"第2集" 在 "第10集" 之前），排序键只计算一次
+- 每扫描完一个目录就把结果分批发送给界面，第一批到达即可开始播放
+- 打开其他文件夹时取消正在进行的扫描，过期结果通过扫描编号丢弃
+- 目录修改时间未变时直接使用上次保存的快照（见 folder_snapshot.py）
+"""
+import os
+import re
+import time
+import logging
+import threading
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from tracing import tracer
+from folder_snapshot import snapshot_cache, make_record, is_record_valid
+
+
+VIDEO_EXTENSIONS = frozenset({
+    '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mpeg', '.mpg', '.3gp'
+})
+DEFAULT_SCAN_DEPTH = 2  # 默认递归深度，0 表示只扫描所选文件夹
+BATCH_SIZE = 1000  # 单批发送的最大文件数
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def is_video_file(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+
+
+def natural_key(name: str) -> tuple:
+    """自然排序键：数字部分按数值比较
+    例如 "EP2" < "EP10"，"S01E02" 拆分为 ('s', 1, 'e', 2, '')
+    """
+    parts = _DIGITS.split(name.casefold())
+    # 拆分结果中奇数位置一定是数字，保证同位置类型一致、可以比较
+    return tuple(int(p) if i % 2 else p for i, p in enumerate(parts)), name
+
+
+def path_sort_key(root: str, path: str) -> tuple:
+    """文件在整个播放列表中的排序键（与扫描顺序一致：同一目录中文件在前、子文件夹在后）"""
+    parts = os.path.relpath(path, root).split(os.sep)
+    return tuple((1, natural_key(p)) for p in parts[:-1]) + ((0, natural_key(parts[-1])),)
+
+
+class FolderScanner(QObject):
+    """后台扫描视频文件
+    同一目录中先列出文件再进入子文件夹（深度优先），
+    因此各批次按顺序追加即为完整的排序结果
+    """
+
+    batchFound = pyqtSignal(int, list)  # 扫描编号, 新发现的文件路径（已排序）
+    finished = pyqtSignal(int, int, object)  # 扫描编号, 文件总数, 目录列表 {目录路径: 记录}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._generation = 0
+        self._cancel_event: Optional[threading.Event] = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def scan(self, folder_path: str, depth: int = DEFAULT_SCAN_DEPTH, use_snapshot: bool = True) -> int:
+        """开始扫描（会取消上一次扫描）
+        use_snapshot: 为 False 时忽略快照，重新列出所有目录（手动刷新）
+        返回: 本次扫描编号
+        """
+        self.cancel()
+        self._cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=self._run,
+            args=(self._generation, folder_path, max(0, depth), use_snapshot, self._cancel_event),
+            name='folder-scanner',
+            daemon=True,
+        )
+        thread.start()
+        return self._generation
+
+    def cancel(self):
+        """取消正在进行的扫描（已发出但尚未处理的结果也会因编号变化而被丢弃）"""
+        self._generation += 1
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+    def _run(self, generation: int, root: str, depth: int, use_snapshot: bool, cancel: threading.Event):
+        start = time.perf_counter()
+        total = 0
+        cached = snapshot_cache.load(root) if use_snapshot else {}
+        listing: dict = {}
+        stats = {'cached': 0, 'listed': 0}
+        try:
+            with tracer.span('scan.folder', cat='scan', args={'folder': root, 'depth': depth}):
+                total = self._walk(generation, root, depth, cancel, cached, listing, stats)
+        except Exception as e:
+            logging.error(f"扫描文件夹失败 {root}: {e}")
+        if cancel.is_set():
+            logging.info(f"已取消扫描 {root}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        logging.info(
+            f"扫描完成 {root}：{total} 个视频，用时 {elapsed:.0f}ms"
+            f"（列出 {stats['listed']} 个目录，使用快照 {stats['cached']} 个）"
+        )
+        if stats['listed'] or listing.keys() != cached.keys():
+            snapshot_cache.save(root, listing)
+        self.finished.emit(generation, total, listing)
+
+    def _walk(self, generation: int, path: str, depth: int, cancel: threading.Event,
+              cached: dict, listing: dict, stats: dict) -> int:
+        """扫描一个目录，先发送本目录文件，再按顺序进入子文件夹"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as e:
+            logging.debug(f"无法读取目录 {path}: {e}")
+            return 0
+        record = cached.get(path)
+        if record is not None and is_record_valid(record, mtime_ns):
+            stats['cached'] += 1
+        else:
+            record = self._list_dir(path, mtime_ns, cancel)
+            if record is None:
+                return 0
+            stats['listed'] += 1
+        listing[path] = record
+
+        paths = [os.path.join(path, f[0]) for f in record['files']]
+        for i in range(0, len(paths), BATCH_SIZE):
+            if cancel.is_set():
+                return 0
+            self.batchFound.emit(generation, paths[i:i + BATCH_SIZE])
+        total = len(paths)
+
+        if depth > 0:
+            for name in record['subdirs']:
+                if cancel.is_set():
+                    return total
+                total += self._walk(generation, os.path.join(path, name), depth - 1,
+                                    cancel, cached, listing, stats)
+        return total
+
+    @staticmethod
+    def _list_dir(path: str, mtime_ns: int, cancel: threading.Event) -> Optional[dict]:
+        """列出目录中的视频文件和子文件夹，返回排好序的快照记录"""
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if cancel.is_set():
+                        return None
+                    try:
+                        if entry.is_file():
+                            if is_video_file(entry.name):
+                                st = entry.stat()
+                                files.append([entry.name, st.st_size, st.st_mtime_ns])
+                        elif not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.debug(f"无法读取目录 {path}: {e}")
+            return None
+        files.sort(key=lambda f: natural_key(f[0]))
+        subdirs.sort(key=natural_key)
+        return make_record(mtime_ns, files, subdirs)
@@ -1,7 +1,7 @@
 """
 播放设置管理
-- 全局设置：播放速度、快进步长
-- 文件夹设置：跳过片头、跳过片尾、播放进度
+- 全局设置：播放速度、快进步长、响度均衡
+- 文件夹设置：跳过片头、跳过片尾、播放进度、播放过的文件时长、自动识别的片头片尾、音轨和字幕选择
 所有设置都保存在程序目录
 """
 import os
@@ -11,6 +11,9 @@ import hashlib
 from dataclasses import dataclass, asdict
 from typing import Optional
 
+from perf_stats import perf_stats
+from tracing import tracer
+
 
 # 程序目录（兼容 PyInstaller 打包）
 if getattr(sys, 'frozen', False):
@@ -20,8 +23,8 @@ else:
     # 开发时，使用脚本所在目录
     APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# 设置目录
-SETTINGS_DIR = os.path.join(APP_DIR, "settings")
+# 设置目录（可用环境变量 PLAYER_SETTINGS_DIR 指定，如基准测试时使用临时目录）
+SETTINGS_DIR = os.environ.get("PLAYER_SETTINGS_DIR") or os.path.join(APP_DIR, "settings")
 
 
 def ensure_settings_dir():
@@ -30,6 +33,10 @@ def ensure_settings_dir():
         os.makedirs(SETTINGS_DIR)
 
 
+# 播放进度达到该百分比视为已看完
+WATCHED_PERCENT = 95
+
+
 def get_folder_id(folder_path: str) -> str:
     """根据文件夹路径生成唯一ID"""
     # 使用 MD5 哈希生成短 ID
@@ -41,6 +48,14 @@ class GlobalSettings:
     """全局设置（应用级别）"""
     speed: float = 1.0
     seek_step: int = 10
+    perf_enabled: bool = False  # 启用性能埋点（也可用环境变量 PLAYER_PERF=1）
+    trace_enabled: bool = True  # 启用时间线追踪（环形缓冲，也可用环境变量 PLAYER_TRACE=0/1）
+    mpv_log_level: str = "warn"  # 写入日志的 mpv 消息级别（fatal/error/warn/info/v/debug）
+    log_level: str = "INFO"  # crash.log 日志级别（也可用环境变量 PLAYER_LOG_LEVEL）
+    stall_threshold_ms: int = 2000  # 主线程卡顿阈值，0 表示关闭（也可用环境变量 PLAYER_STALL_MS）
+    scan_depth: int = 2  # 打开文件夹时递归扫描子文件夹的深度，0 表示只扫描所选文件夹
+    normalize_loudness: bool = True  # 按预先分析的响度调整各文件的音量增益
+    loudness_target: float = -18.0  # 响度均衡的目标（LUFS）
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -50,6 +65,14 @@ class GlobalSettings:
         return cls(
             speed=data.get("speed", 1.0),
             seek_step=data.get("seek_step", 10),
+            perf_enabled=data.get("perf_enabled", False),
+            trace_enabled=data.get("trace_enabled", True),
+            mpv_log_level=data.get("mpv_log_level", "warn"),
+            log_level=data.get("log_level", "INFO"),
+            stall_threshold_ms=data.get("stall_threshold_ms", 2000),
+            scan_depth=data.get("scan_depth", 2),
+            normalize_loudness=data.get("normalize_loudness", True),
+            loudness_target=data.get("loudness_target", -18.0),
         )
 
 
@@ -60,17 +83,37 @@ class FolderPlaySettings:
     skip_intro: int = 0
     skip_outro: int = 0
     progress: dict = None  # 每个文件的播放进度 {filename: percentage}
+    durations: dict = None  # 播放过的文件时长 {filename: seconds}
+    intro_ranges: dict = None  # 自动识别的片头 {filename: [start, end]}，[] 表示已识别但没有找到
+    outro_ranges: dict = None  # 自动识别的片尾 {filename: [start, end]}
+    track_choices: dict = None  # 每个文件的音轨/字幕选择 {filename: {aid, sid, alang, slang, sub_delay}}
+    track_defaults: dict = None  # 文件夹默认的音轨/字幕选择（最近一次的选择），没有单独记录的文件使用
 
     def __post_init__(self):
         if self.progress is None:
             self.progress = {}
+        if self.durations is None:
+            self.durations = {}
+        if self.intro_ranges is None:
+            self.intro_ranges = {}
+        if self.outro_ranges is None:
+            self.outro_ranges = {}
+        if self.track_choices is None:
+            self.track_choices = {}
+        if self.track_defaults is None:
+            self.track_defaults = {}
 
     def to_dict(self) -> dict:
         return {
             "folder_path": self.folder_path,
             "skip_intro": self.skip_intro,
             "skip_outro": self.skip_outro,
-            "progress": self.progress
+            "progress": self.progress,
+            "durations": self.durations,
+            "intro_ranges": self.intro_ranges,
+            "outro_ranges": self.outro_ranges,
+            "track_choices": self.track_choices,
+            "track_defaults": self.track_defaults,
         }
 
     @classmethod
@@ -80,6 +123,11 @@ class FolderPlaySettings:
             skip_intro=data.get("skip_intro", 0),
             skip_outro=data.get("skip_outro", 0),
             progress=data.get("progress", {}),
+            durations=data.get("durations", {}),
+            intro_ranges=data.get("intro_ranges", {}),
+            outro_ranges=data.get("outro_ranges", {}),
+            track_choices=data.get("track_choices", {}),
+            track_defaults=data.get("track_defaults", {}),
         )
 
 
@@ -103,6 +151,8 @@ class GlobalSettingsManager:
             except:
                 pass
     
+    @perf_stats.timed('settings.global_load')
+    @tracer.traced('settings.global_load', cat='settings')
     def load(self) -> GlobalSettings:
         """加载全局设置"""
         if self._settings:
@@ -120,6 +170,8 @@ class GlobalSettingsManager:
         
         return self._settings
     
+    @perf_stats.timed('settings.global_save')
+    @tracer.traced('settings.global_save', cat='settings')
     def save(self, settings: GlobalSettings) -> None:
         """保存全局设置"""
         try:
@@ -155,6 +207,8 @@ class FolderSettingsManager:
         """从文件路径获取文件夹路径"""
         return os.path.dirname(os.path.abspath(file_path))
     
+    @perf_stats.timed('settings.folder_load')
+    @tracer.traced('settings.folder_load', cat='settings')
     def load_settings(self, file_path: str) -> FolderPlaySettings:
         """加载文件所在文件夹的设置"""
         folder_path = self.get_folder_path(file_path)
@@ -178,6 +232,8 @@ class FolderSettingsManager:
         self._cache[folder_path] = settings
         return settings
     
+    @perf_stats.timed('settings.folder_save')
+    @tracer.traced('settings.folder_save', cat='settings')
     def save_settings(self, file_path: str, settings: FolderPlaySettings) -> None:
         """保存设置到程序目录"""
         folder_path = self.get_folder_path(file_path)
@@ -203,19 +259,105 @@ class FolderSettingsManager:
         self.save_settings(file_path, settings)
         return settings
     
-    def save_progress(self, file_path: str, percentage: float) -> None:
-        """保存单个文件的播放进度"""
+    def save_progress(self, file_path: str, percentage: float, duration: float = 0) -> None:
+        """保存单个文件的播放进度（duration 大于 0 时同时保存时长）"""
         filename = os.path.basename(file_path)
         settings = self.load_settings(file_path)
         settings.progress[filename] = round(percentage, 1)
+        if duration > 0:
+            settings.durations[filename] = round(duration)
         self.save_settings(file_path, settings)
     
+    def rename_progress(self, old_path: str, new_path: str) -> None:
+        """文件被重命名时迁移播放进度（同一文件夹内）"""
+        if os.path.dirname(old_path) != os.path.dirname(new_path):
+            return
+        settings = self.load_settings(old_path)
+        old_name, new_name = os.path.basename(old_path), os.path.basename(new_path)
+        moved = False
+        tables = (settings.progress, settings.durations, settings.intro_ranges, settings.outro_ranges,
+                  settings.track_choices)
+        for table in tables:
+            value = table.pop(old_name, None)
+            if value is not None:
+                table[new_name] = value
+                moved = True
+        if moved:
+            self.save_settings(new_path, settings)
+
+    def save_detected_ranges(self, file_path: str, ranges: dict) -> bool:
+        """保存自动识别的片头片尾（同一文件夹内的文件）
+        ranges: {filename: ([片头开始, 结束] 或 [], [片尾开始, 结束] 或 [])}
+        返回: 是否有变化
+        """
+        settings = self.load_settings(file_path)
+        changed = False
+        for filename, (intro, outro) in ranges.items():
+            if settings.intro_ranges.get(filename) != list(intro):
+                settings.intro_ranges[filename] = list(intro)
+                changed = True
+            if settings.outro_ranges.get(filename) != list(outro):
+                settings.outro_ranges[filename] = list(outro)
+                changed = True
+        if changed:
+            self.save_settings(file_path, settings)
+        return changed
+
+    def get_detected_ranges(self, file_path: str) -> tuple:
+        """获取单个文件自动识别的片头片尾
+        返回: (片头, 片尾)，各为 (开始秒, 结束秒) 或 None
+        """
+        filename = os.path.basename(file_path)
+        settings = self.load_settings(file_path)
+        intro = settings.intro_ranges.get(filename)
+        outro = settings.outro_ranges.get(filename)
+        return (tuple(intro) if intro else None), (tuple(outro) if outro else None)
+    
+    def save_track_choice(self, file_path: str, **choice) -> None:
+        """保存单个文件的音轨/字幕选择，同时作为文件夹的默认值
+        choice: aid / sid（"no" 表示关闭字幕）/ alang / slang / sub_delay，值为 None 时删除该项
+        """
+        filename = os.path.basename(file_path)
+        settings = self.load_settings(file_path)
+        entry = settings.track_choices.setdefault(filename, {})
+        for table in (entry, settings.track_defaults):
+            for key, value in choice.items():
+                if value is None:
+                    table.pop(key, None)
+                else:
+                    table[key] = value
+        self.save_settings(file_path, settings)
+
+    def get_track_options(self, file_path: str) -> dict:
+        """加载文件时传给 mpv 的单文件选项（音轨、字幕、字幕延迟）
+        本文件的选择优先；没有时按文件夹默认值，优先用语言匹配（各集的轨道编号可能不同）。
+        总是给出 aid/sid/sub-delay，避免沿用上一个文件中切换的轨道和延迟
+        """
+        settings = self.load_settings(file_path)
+        entry = settings.track_choices.get(os.path.basename(file_path), {})
+        defaults = settings.track_defaults
+        options = {}
+        for key, lang_key in (("aid", "alang"), ("sid", "slang")):
+            if key in entry:
+                options[key] = entry[key]
+            elif defaults.get(key) == "no":
+                options[key] = "no"
+            elif defaults.get(lang_key):
+                options[key] = "auto"
+                options[lang_key] = defaults[lang_key]
+            else:
+                options[key] = defaults.get(key, "auto")
+        options["sub-delay"] = entry.get("sub_delay", defaults.get("sub_delay", 0))
+        return options
+
     def get_progress(self, file_path: str) -> float:
         """获取单个文件的播放进度（百分比）"""
         filename = os.path.basename(file_path)
         settings = self.load_settings(file_path)
         return settings.progress.get(filename, 0)
     
+    @perf_stats.timed('settings.get_all_progress')
+    @tracer.traced('settings.get_all_progress', cat='settings')
     def get_all_progress(self, folder_path: str) -> dict:
         """获取文件夹中所有文件的播放进度"""
         # 标准化路径，确保哈希一致
@@ -230,6 +372,23 @@ class FolderSettingsManager:
                 pass
         return {}
     
+    @perf_stats.timed('settings.get_progress_and_durations')
+    @tracer.traced('settings.get_progress_and_durations', cat='settings')
+    def get_progress_and_durations(self, folder_path: str) -> tuple:
+        """获取文件夹中所有文件的播放进度和时长
+        返回: ({filename: percentage}, {filename: seconds})
+        """
+        folder_path = os.path.abspath(folder_path)
+        settings_path = self._get_settings_path(folder_path)
+        if os.path.exists(settings_path):
+            try:
+                with open(settings_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    return data.get("progress", {}), data.get("durations", {})
+            except:
+                pass
+        return {}, {}
+    
     def clear_all_settings(self) -> int:
         """清理所有文件夹设置
         返回: 清理的文件数量
@@ -0,0 +1,132 @@
+"""
+文件夹列表快照
+- 保存每个目录的视频文件（已按自然顺序排序）、大小、修改时间和子文件夹
+- 再次打开文件夹时，目录自身的修改时间未变就直接使用快照，不再列出目录（网络共享上尤其明显）
+- 快照保存在 settings/snapshots 中，按最近使用淘汰，数量和总大小都有上限
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+from folder_settings import SETTINGS_DIR, get_folder_id
+
+
+SNAPSHOT_DIR = os.path.join(SETTINGS_DIR, "snapshots")
+SNAPSHOT_VERSION = 1
+MAX_SNAPSHOTS = 64  # 最多保存的文件夹数量
+MAX_TOTAL_BYTES = 32 * 1024 * 1024  # 快照总大小上限
+# 修改时间精度有限（FAT 为 2 秒，部分网络共享更粗），
+# 列出目录时距离修改时间太近的记录可能漏掉同一时间片内的变化，不作为可信快照
+MTIME_SLACK_NS = 2 * 1_000_000_000
+
+
+def make_record(mtime_ns: int, files: list, subdirs: list) -> dict:
+    """目录记录
+    files: [[文件名, 大小, 修改时间], ...]（已排序）
+    subdirs: [子文件夹名, ...]（已排序）
+    """
+    return {"mtime_ns": mtime_ns, "listed_ns": time.time_ns(), "files": files, "subdirs": subdirs}
+
+
+def is_record_valid(record: dict, mtime_ns: int) -> bool:
+    """目录修改时间未变且快照可信时返回 True"""
+    return (
+        record.get("mtime_ns") == mtime_ns
+        and record.get("listed_ns", 0) - mtime_ns > MTIME_SLACK_NS
+    )
+
+
+class SnapshotCache:
+    """文件夹快照缓存（可在扫描线程中使用）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _path(self, root: str) -> str:
+        return os.path.join(SNAPSHOT_DIR, f"snap_{get_folder_id(os.path.abspath(root))}.json")
+
+    def load(self, root: str) -> dict:
+        """读取快照
+        返回: {目录路径: 记录}，没有快照时返回空字典
+        """
+        path = self._path(root)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != SNAPSHOT_VERSION or data.get("root") != root:
+                    return {}
+                os.utime(path)  # 标记为最近使用
+                return data.get("dirs", {})
+            except (OSError, ValueError):
+                return {}
+
+    def save(self, root: str, dirs: dict):
+        """保存快照并淘汰最久未使用的快照"""
+        data = {"version": SNAPSHOT_VERSION, "root": root, "dirs": dirs}
+        path = self._path(root)
+        with self._lock:
+            try:
+                os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logging.warning(f"保存文件夹快照失败: {e}")
+                return
+            self._evict()
+
+    def invalidate(self, root: str):
+        """删除文件夹的快照"""
+        with self._lock:
+            try:
+                os.remove(self._path(root))
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """删除全部快照
+        返回: 删除的数量
+        """
+        count = 0
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.remove(entry.path)
+                    count += 1
+                except OSError:
+                    pass
+        return count
+
+    def _entries(self) -> list:
+        try:
+            with os.scandir(SNAPSHOT_DIR) as it:
+                return [e for e in it if e.name.startswith("snap_") and e.name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _evict(self):
+        """超过数量或总大小上限时，按最近使用时间淘汰"""
+        items = []
+        for entry in self._entries():
+            try:
+                st = entry.stat()
+                items.append((st.st_mtime, st.st_size, entry.path))
+            except OSError:
+                continue
+        items.sort(reverse=True)
+        total = 0
+        for i, (_, size, path) in enumerate(items):
+            total += size
+            if i >= MAX_SNAPSHOTS or (total > MAX_TOTAL_BYTES and i > 0):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+# 全局实例
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,233 @@
+"""
+文件夹监视
+- 用 QFileSystemWatcher 监视当前文件夹及其子文件夹（深度与扫描一致）
+- 目录变化先合并一段时间，再在后台线程中只重新列出变化的目录
+- 与上一次的列表比较得到新增、删除和重命名（大小和修改时间相同的删除+新增视为重命名）
+"""
+import os
+import time
+import logging
+import threading
+
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from folder_scanner import is_video_file
+from tracing import tracer
+
+
+DEBOUNCE_MS = 500  # 最后一次变化后等待的时间
+MAX_DELAY_MS = 3000  # 持续变化时最长等待时间
+
+
+class _WatchState:
+    """一次监视会话的状态（只在后台线程中修改，重新监视时整体替换）"""
+
+    def __init__(self, root: str, depth: int, known_files: list):
+        self.root = root
+        self.depths = {root: depth}  # 目录 -> 剩余递归深度
+        self.entries: dict = {}  # 目录 -> {文件路径: (大小, 修改时间)}
+        self.known: dict = {}  # 尚未列出的目录 -> 播放列表中已有的文件
+        for f in known_files:
+            self.known.setdefault(os.path.dirname(f), set()).add(f)
+        self.baseline = True
+
+    def use_listing(self, listing: dict):
+        """直接使用扫描得到的目录列表作为比较基准，不再重新列出"""
+        root_depth = self.depths[self.root]
+        for path, record in listing.items():
+            rel = os.path.relpath(path, self.root)
+            level = 0 if rel == os.curdir else len(rel.split(os.sep))
+            if level > root_depth:
+                continue
+            self.depths[path] = root_depth - level
+            self.entries[path] = {
+                os.path.join(path, name): (size, mtime_ns) for name, size, mtime_ns in record['files']
+            }
+        self.known.clear()
+        self.baseline = False
+
+
+class FolderWatcher(QObject):
+    """监视文件夹中视频文件的变化"""
+
+    changed = pyqtSignal(list, list, list)  # 新增文件, 删除文件, 重命名 [(旧路径, 新路径)]
+    _refreshed = pyqtSignal(int, object)  # 内部：后台刷新完成
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._flush)
+        self._refreshed.connect(self._on_refreshed)
+
+        self._generation = 0
+        self._state: _WatchState | None = None
+        self._dirty: set = set()
+        self._first_dirty = 0.0
+        self._busy = False
+
+    def watch(self, root: str, depth: int, known_files: list, listing: dict | None = None):
+        """开始监视文件夹
+        known_files: 播放列表中已有的文件，首次列出目录时与之比较，补上扫描后发生的变化
+        listing: 扫描得到的目录列表（folder_scanner 的快照记录），提供时不再重新列出目录
+        """
+        self.stop()
+        self._state = _WatchState(root, max(0, depth), known_files)
+        if listing:
+            self._state.use_listing(listing)
+            self._watcher.addPaths(list(self._state.depths))
+            return
+        self._watcher.addPath(root)
+        self._dirty = {root}
+        self._flush()
+
+    def stop(self):
+        """停止监视"""
+        self._generation += 1
+        self._state = None
+        self._dirty.clear()
+        self._debounce.stop()
+        self._busy = False
+        paths = self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
+
+    def _on_directory_changed(self, path: str):
+        if self._state is None:
+            return
+        now = time.monotonic()
+        if not self._dirty:
+            self._first_dirty = now
+        self._dirty.add(path)
+        if self._busy:
+            return
+        waited_ms = (now - self._first_dirty) * 1000
+        self._debounce.start(int(max(0, min(DEBOUNCE_MS, MAX_DELAY_MS - waited_ms))))
+
+    def _flush(self):
+        """在后台线程中重新列出变化的目录"""
+        if self._state is None or self._busy or not self._dirty:
+            return
+        dirs = list(self._dirty)
+        self._dirty.clear()
+        self._busy = True
+        threading.Thread(
+            target=self._run,
+            args=(self._generation, self._state, dirs),
+            name='folder-watcher',
+            daemon=True,
+        ).start()
+
+    def _run(self, generation: int, state: _WatchState, dirs: list):
+        try:
+            with tracer.span('watch.refresh', cat='scan', args={'dirs': len(dirs)}):
+                result = self._refresh(state, dirs)
+        except Exception as e:
+            logging.error(f"刷新文件夹变化失败: {e}")
+            result = None
+        self._refreshed.emit(generation, result)
+
+    def _on_refreshed(self, generation: int, result):
+        if generation != self._generation:
+            return
+        self._busy = False
+        if result is not None:
+            added, removed, renamed, new_dirs, gone_dirs = result
+            self._state.depths.update(new_dirs)
+            for path in gone_dirs:
+                self._state.depths.pop(path, None)
+            if new_dirs:
+                self._watcher.addPaths(list(new_dirs))
+            gone = [p for p in gone_dirs if p in self._watcher.directories()]
+            if gone:
+                self._watcher.removePaths(gone)
+            if added or removed or renamed:
+                logging.info(f"文件夹变化：新增 {len(added)}，删除 {len(removed)}，重命名 {len(renamed)}")
+                self.changed.emit(added, removed, renamed)
+        if self._dirty:
+            # 刷新期间又有变化
+            self._debounce.start(DEBOUNCE_MS)
+
+    @staticmethod
+    def _refresh(state: _WatchState, dirs: list) -> tuple:
+        """重新列出目录并与上一次比较（后台线程）"""
+        added, removed = {}, {}  # 路径 -> (大小, 修改时间)，首次比较的已有文件为 None
+        new_dirs: dict = {}
+        gone_dirs: list = []
+        pending = list(dirs)
+
+        def drop_dir(path: str):
+            for d in [d for d in state.entries if d == path or d.startswith(path + os.sep)]:
+                removed.update(state.entries.pop(d))
+                gone_dirs.append(d)
+
+        while pending:
+            path = pending.pop()
+            depth = new_dirs.get(path, state.depths.get(path))
+            if depth is None:
+                continue
+            old = state.entries.get(path)
+            if old is None:
+                old = dict.fromkeys(state.known.pop(path, ()))
+            current = {}
+            subdirs = set()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file():
+                                if is_video_file(entry.name):
+                                    st = entry.stat()
+                                    current[entry.path] = (st.st_size, st.st_mtime_ns)
+                            elif depth > 0 and not entry.name.startswith('.') \
+                                    and entry.is_dir(follow_symlinks=False):
+                                subdirs.add(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                # 目录已被删除或无法访问
+                removed.update(old)
+                drop_dir(path)
+                if path not in gone_dirs:
+                    gone_dirs.append(path)
+                continue
+
+            for f in old.keys() - current.keys():
+                removed[f] = old[f]
+            for f in current.keys() - old.keys():
+                added[f] = current[f]
+            state.entries[path] = current
+
+            # 新出现的子文件夹递归列出，消失的子文件夹整体删除
+            for d in subdirs:
+                if d not in state.entries and d not in new_dirs:
+                    new_dirs[d] = depth - 1
+                    pending.append(d)
+            for d in [d for d in state.entries if os.path.dirname(d) == path and d not in subdirs]:
+                drop_dir(d)
+
+        if state.baseline:
+            # 播放列表中存在、但所在目录已不存在的文件
+            for files in state.known.values():
+                removed.update(dict.fromkeys(files))
+            state.known.clear()
+            state.baseline = False
+
+        # 大小和修改时间都相同的一对删除+新增视为重命名
+        renamed = []
+        by_stat: dict = {}
+        for f, stat in removed.items():
+            if stat is not None:
+                by_stat.setdefault(stat, []).append(f)
+        for f, stat in list(added.items()):
+            candidates = by_stat.get(stat)
+            if stat is not None and candidates and len(candidates) == 1:
+                old_path = candidates.pop()
+                renamed.append((old_path, f))
+                del added[f]
+                del removed[old_path]
+        for d in gone_dirs:
+            new_dirs.pop(d, None)
+        return list(added), list(removed), renamed, new_dirs, gone_dirs
@@ -0,0 +1,426 @@
+"""
+片头片尾自动识别（跨剧集音频指纹）
+- 在独立进程中用无界面 mpv 解码每集开头和结尾几分钟的音频（单声道 8kHz），
+  用 NumPy 计算频谱指纹：每 0.1 秒一个 32 位值，各位是相邻频带能量差随时间变化的符号
+- 指纹按 (路径, 大小, 修改时间) 缓存在 media_cache 中，每个文件只解码一次
+- 同一子文件夹内的相邻剧集两两比对，在两集中都出现的最长一段即片头（开头部分）或片尾（结尾部分）
+- 识别结果通过 analyzed 信号交给主线程，保存在文件夹设置中（见 folder_settings.py）
+- 未安装 NumPy 时不做识别
+"""
+import os
+import time
+import base64
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+
+import mpv
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from media_cache import media_cache, file_stat
+from media_probe import probe_order
+from mpv_log import MpvLogRouter
+from tracing import tracer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+FINGERPRINT_KIND = "fingerprint"
+FINGERPRINT_VERSION = 1  # 指纹算法变化时递增，旧缓存自动失效
+ANALYZE_WORKERS = max(1, min(2, (os.cpu_count() or 2) // 2))  # 解码进程数
+INTRO_WINDOW_S = 360  # 在开头多少秒内寻找片头
+OUTRO_WINDOW_S = 240  # 在结尾多少秒内寻找片尾
+MIN_EPISODE_S = 600  # 短于该时长的文件不识别（短片、预告）
+DECODE_TIMEOUT_S = 120.0
+HOLD_AFTER_LOAD_S = 5.0  # 播放器加载文件后暂停提交解码的时间
+
+SAMPLE_RATE = 8000
+FRAME_SIZE = 2048  # 分析窗口 256ms
+HOP_SIZE = 800  # 帧移 100ms
+HOP_S = HOP_SIZE / SAMPLE_RATE
+BAND_EDGES_HZ = (300, 3000)  # 33 个对数频带，相邻差分得到 32 位
+BAND_COUNT = 33
+SILENCE_RMS = 60.0  # 低于该音量的帧视为静音，不参与比对（s16 采样幅度）
+
+MAX_BIT_ERRORS = 6  # 两帧指纹相差不超过该位数视为相同
+MAX_HASH_HITS = 8  # 同一指纹值在另一集中出现过多次（如持续的单音）时不用于估计偏移
+TOP_OFFSETS = 3  # 每对剧集检查的候选偏移数
+MIN_SEGMENT_S = 15  # 共同片段的最短时长
+MAX_SEGMENT_S = 180  # 共同片段的最长时长（更长的通常是重复的正片，如总集篇）
+GAP_S = 1.5  # 共同片段内允许的不匹配间隙
+MIN_DENSITY = 0.5  # 共同片段内匹配帧的最低比例
+NEIGHBOURS = 2  # 每集与前后各几集比对
+
+
+def available() -> bool:
+    """是否可以识别（需要 NumPy）"""
+    return np is not None
+
+
+# ---------- 指纹（在解码进程中运行） ---------- #
+
+def decode_audio(path: str, start: float, length: float) -> tuple:
+    """解码一段单声道 8kHz 音频，start 为负数时从文件末尾倒数
+    返回: (int16 采样数组, 文件时长)；失败时采样为 None
+    """
+    fd, out_path = tempfile.mkstemp(suffix=".pcm")
+    os.close(fd)
+    router = MpvLogRouter('error')
+    duration = [0.0]
+    try:
+        encoder = mpv.MPV(
+            log_handler=router,
+            loglevel=router.level,
+            o=out_path,
+            of='s16le',
+            oac='pcm_s16le',
+            audio_format='s16',
+            audio_samplerate=SAMPLE_RATE,
+            audio_channels='mono',
+            start=f"{start:.3f}",
+            length=f"{length:.3f}",
+            vid='no',
+            sid='no',
+            osc=False,
+            load_scripts=False,
+            ytdl=False,
+            input_default_bindings=False,
+        )
+
+        @encoder.property_observer('duration')
+        def on_duration(_name, value):
+            if value:
+                duration[0] = value
+
+        try:
+            encoder.play(path)
+            encoder.wait_for_playback(timeout=DECODE_TIMEOUT_S)
+        finally:
+            encoder.terminate()
+        return np.fromfile(out_path, dtype='<i2'), duration[0]
+    except Exception as e:
+        logging.debug(f"解码音频失败 {path} @{start:.0f}s: {e}")
+        return None, duration[0]
+    finally:
+        router.close()
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+
+
+def compute_fingerprint(samples) -> "np.ndarray":
+    """每 HOP_S 秒一个 32 位指纹值；静音帧为 0"""
+    if samples is None or len(samples) < FRAME_SIZE + 2 * HOP_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE].astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE).astype(np.float32), axis=1)) ** 2
+    edges = np.round(np.geomspace(*BAND_EDGES_HZ, BAND_COUNT + 1) * FRAME_SIZE / SAMPLE_RATE).astype(int)
+    energy = np.add.reduceat(spectrum[:, edges[0]:edges[-1]], edges[:-1] - edges[0], axis=1)
+    band_diff = np.diff(np.log(energy + 1e-6), axis=1)  # (帧数, 32)
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    values = np.packbits(bits, axis=1, bitorder='little').view('<u4').ravel().astype(np.uint32)
+    values[values == 0] = 1
+    values[(rms[1:] < SILENCE_RMS) | (rms[:-1] < SILENCE_RMS)] = 0
+    return values
+
+
+def _encode(values) -> str:
+    return base64.b64encode(values.astype('<u4').tobytes()).decode('ascii')
+
+
+def _decode(text: str) -> "np.ndarray":
+    return np.frombuffer(base64.b64decode(text), dtype='<u4').astype(np.uint32)
+
+
+def fingerprint_file(path: str) -> dict:
+    """解码开头和结尾的音频并计算指纹（解码进程的入口）
+    返回: {"duration", "intro", "outro_start", "outro"}；文件太短时没有指纹；无法解码时返回 {"error": True}
+    """
+    try:
+        samples, duration = decode_audio(path, 0, INTRO_WINDOW_S)
+        if samples is None or not duration:
+            return {"error": True}
+        info = {"version": FINGERPRINT_VERSION, "duration": duration}
+        if duration < MIN_EPISODE_S:
+            return info
+        info["intro"] = _encode(compute_fingerprint(samples))
+        outro_start = max(0.0, duration - OUTRO_WINDOW_S)
+        samples, _ = decode_audio(path, outro_start, OUTRO_WINDOW_S)
+        info["outro_start"] = outro_start
+        info["outro"] = _encode(compute_fingerprint(samples))
+        return info
+    except Exception as e:
+        logging.debug(f"计算音频指纹失败 {path}: {e}")
+        return {"error": True}
+
+
+# ---------- 比对 ---------- #
+
+def _popcount(values) -> "np.ndarray":
+    return np.unpackbits(values.astype('<u4').view(np.uint8)).reshape(-1, 32).sum(axis=1)
+
+
+def _candidate_offsets(a, b) -> list:
+    """按完全相同的指纹值估计 b 相对 a 的帧偏移，返回票数最多的几个"""
+    order = np.argsort(b, kind='stable')
+    sorted_b = b[order]
+    a_index = np.flatnonzero(a)
+    lo = np.searchsorted(sorted_b, a[a_index], 'left')
+    hi = np.searchsorted(sorted_b, a[a_index], 'right')
+    counts = hi - lo
+    keep = (counts > 0) & (counts <= MAX_HASH_HITS)
+    a_index, lo, counts = a_index[keep], lo[keep], counts[keep]
+    if not len(counts):
+        return []
+    # 展开所有 (a 帧, b 帧) 配对
+    pair_a = np.repeat(a_index, counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_b = order[np.repeat(lo, counts) + within]
+    votes = np.bincount(pair_b - pair_a + len(a), minlength=len(a) + len(b) + 1)
+    votes = votes + np.r_[0, votes[:-1]] + np.r_[votes[1:], 0]  # 相邻偏移合并（帧没有对齐）
+    top = np.argsort(votes)[::-1][:TOP_OFFSETS]
+    return [int(o) - len(a) for o in top if votes[o] >= 3]
+
+
+def match_segment(a, b) -> Optional[tuple]:
+    """两段指纹中最长的共同片段
+    返回: (a 起始帧, a 结束帧, b 起始帧)；没有时返回 None
+    """
+    if not len(a) or not len(b):
+        return None
+    min_frames = int(MIN_SEGMENT_S / HOP_S)
+    gap_frames = int(GAP_S / HOP_S)
+    best = None
+    for offset in _candidate_offsets(a, b):
+        start, end = max(0, -offset), min(len(a), len(b) - offset)
+        if end - start < min_frames:
+            continue
+        x, y = a[start:end], b[start + offset:end + offset]
+        matched = np.flatnonzero((_popcount(x ^ y) <= MAX_BIT_ERRORS) & (x != 0) & (y != 0))
+        if len(matched) < min_frames * MIN_DENSITY:
+            continue
+        breaks = np.flatnonzero(np.diff(matched) > gap_frames)
+        run_start = matched[np.r_[0, breaks + 1]]
+        run_end = matched[np.r_[breaks, len(matched) - 1]] + 1
+        run_count = np.diff(np.r_[0, breaks + 1, len(matched)])
+        spans = run_end - run_start
+        spans[(spans < min_frames) | (run_count < spans * MIN_DENSITY)] = 0
+        k = int(np.argmax(spans))
+        if spans[k] and (best is None or spans[k] > best[1] - best[0]):
+            best = (start + int(run_start[k]), start + int(run_end[k]), start + int(run_start[k]) + offset)
+    return best
+
+
+def detect_ranges(fingerprints: list, rows: Optional[set] = None) -> list:
+    """同一子文件夹内按顺序排列的各集指纹 -> 各集的 (片头, 片尾)
+    片头/片尾为 [开始秒, 结束秒]，没有识别到时为 []；指纹为 None 的项和不在 rows 中的项结果为 None
+    """
+    decoded = [
+        None if fp is None or "intro" not in fp
+        else (_decode(fp["intro"]), _decode(fp["outro"]), fp["outro_start"])
+        for fp in fingerprints
+    ]
+    results = []
+    for i, fp in enumerate(fingerprints):
+        if fp is None or (rows is not None and i not in rows):
+            results.append(None)
+            continue
+        if decoded[i] is None:
+            results.append(([], []))
+            continue
+        intro, outro = [], []
+        for j in range(max(0, i - NEIGHBOURS), min(len(decoded), i + NEIGHBOURS + 1)):
+            if j == i or decoded[j] is None:
+                continue
+            intro = _longer(intro, _segment(decoded[i][0], decoded[j][0], 0.0))
+            outro = _longer(outro, _segment(decoded[i][1], decoded[j][1], decoded[i][2]))
+        results.append((intro, outro))
+    return results
+
+
+def _segment(a, b, base: float) -> list:
+    match = match_segment(a, b)
+    if match is None:
+        return []
+    # 指纹值 k 由第 k、k+1 帧得到，对应窗口 [k+1, k+2) 帧移
+    start = base + (match[0] + 1) * HOP_S
+    end = base + (match[1] + 1) * HOP_S
+    if end - start > MAX_SEGMENT_S:
+        return []
+    return [round(start, 1), round(end, 1)]
+
+
+def _longer(current: list, candidate: list) -> list:
+    if candidate and (not current or candidate[1] - candidate[0] > current[1] - current[0]):
+        return candidate
+    return current
+
+
+# ---------- 后台识别 ---------- #
+
+class IntroDetector(QObject):
+    """后台识别文件夹中各集的片头片尾"""
+
+    analyzed = pyqtSignal(int, dict)  # 识别编号, {文件路径: (片头, 片尾)}
+
+    def __init__(self, parent=None, workers: int = ANALYZE_WORKERS):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._job: Optional[tuple] = None  # (编号, 文件列表, 当前项)
+        self._hold_until = 0.0
+        self._stopping = False
+        self._workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._warned = False
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def analyze(self, files: list, current: int) -> int:
+        """识别文件列表（会取消上一次识别）
+        返回: 本次识别编号
+        """
+        with self._cond:
+            self._generation += 1
+            if not available():
+                if not self._warned:
+                    self._warned = True
+                    logging.info("未安装 NumPy，不自动识别片头片尾")
+                return self._generation
+            self._job = (self._generation, list(files), current)
+            self._cond.notify_all()
+        self._start()
+        return self._generation
+
+    def hold(self, seconds: float = HOLD_AFTER_LOAD_S):
+        """暂停提交新的解码任务一段时间（播放器加载文件时调用）"""
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def cancel(self):
+        """取消正在进行的识别"""
+        with self._cond:
+            self._generation += 1
+            self._job = None
+            self._cond.notify_all()
+
+    def stop(self):
+        """停止后台线程和解码进程（正在解码的文件会在超时内结束）"""
+        with self._cond:
+            self._stopping = True
+            self._job = None
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _start(self):
+        if self._thread is None and not self._stopping:
+            self._thread = threading.Thread(target=self._run, name='intro-detector', daemon=True)
+            self._thread.start()
+
+    def _current_generation(self) -> Optional[int]:
+        with self._cond:
+            return None if self._stopping else self._generation
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job, self._job = self._job, None
+            try:
+                self._analyze(*job)
+            except Exception as e:
+                logging.error(f"片头片尾识别失败: {e}")
+
+    def _analyze(self, generation: int, files: list, current: int):
+        # 按子文件夹分组（各季的片头不同），组内保持播放列表顺序
+        groups: dict = {}
+        for path in files:
+            groups.setdefault(os.path.dirname(path), []).append(path)
+        fingerprints: dict = {}
+        pending = []
+        for i in probe_order(len(files), current):
+            path = files[i]
+            fp = media_cache.get(FINGERPRINT_KIND, path)
+            if fp is not None and fp.get("version") == FINGERPRINT_VERSION:
+                fingerprints[path] = fp
+            else:
+                pending.append(path)
+        self._emit(generation, groups, fingerprints, set(fingerprints))
+
+        futures: dict = {}
+        while pending or futures:
+            if self._current_generation() != generation:
+                for future in futures:
+                    future.cancel()
+                return
+            # 提交解码任务（加载文件后的一段时间内不提交）
+            while pending and len(futures) < self._workers and time.monotonic() >= self._hold_until:
+                path = pending.pop(0)
+                stat = file_stat(path)
+                if stat is not None:
+                    futures[self._pool().submit(fingerprint_file, path)] = (path, stat)
+            if not futures:
+                with self._cond:
+                    self._cond.wait(max(0.1, self._hold_until - time.monotonic()))
+                continue
+            done, _ = wait(futures, timeout=0.5, return_when=FIRST_COMPLETED)
+            changed = set()
+            for future in done:
+                path, stat = futures.pop(future)
+                try:
+                    fp = future.result()
+                except Exception as e:
+                    logging.warning(f"音频指纹进程失败 {path}: {e}")
+                    continue
+                if not fp.get("error"):
+                    fp["version"] = FINGERPRINT_VERSION
+                media_cache.put(FINGERPRINT_KIND, path, fp, stat)
+                fingerprints[path] = fp
+                changed.add(path)
+            if changed:
+                self._emit(generation, groups, fingerprints, changed)
+
+    def _emit(self, generation: int, groups: dict, fingerprints: dict, changed: set):
+        """重新比对包含变化文件的子文件夹，发出变化文件及其相邻剧集的结果"""
+        results = {}
+        for paths in groups.values():
+            rows = [i for i, p in enumerate(paths) if p in changed]
+            if not rows:
+                continue
+            affected = {j for i in rows for j in range(i - NEIGHBOURS, i + NEIGHBOURS + 1)}
+            with tracer.span('intro.match', cat='probe', args={'files': len(paths)}):
+                ranges = detect_ranges([
+                    None if (fp := fingerprints.get(p)) is None or fp.get("error") else fp for p in paths
+                ], affected)
+            for j, path in enumerate(paths):
+                if ranges[j] is not None:
+                    results[path] = ranges[j]
+        if results and self._current_generation() == generation:
+            self.analyzed.emit(generation, results)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn：不复制主进程的 Qt 和 mpv 线程状态（Windows 上也只能用 spawn）
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
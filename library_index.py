@@ -0,0 +1,411 @@
+"""
+媒体库索引
+- 记录所有打开过的文件夹和其中的文件（大小、修改时间、时长、观看进度、最后播放时间）
+- 保存在 settings/library.db（SQLite，WAL 模式），界面线程只读，写入由后台线程按队列合并提交
+- 文件名搜索使用 FTS5 三元组索引（任意子串），SQLite 不支持时退回 LIKE
+- 启动一段时间后在后台分批校验：删除已不存在的文件，无法访问的文件夹（如网络共享离线）只做标记
+"""
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from typing import Callable, Optional
+
+from folder_settings import SETTINGS_DIR, WATCHED_PERCENT, ensure_settings_dir
+from playlist_search import normalize
+from tracing import tracer
+
+
+LIBRARY_PATH = os.path.join(SETTINGS_DIR, "library.db")
+SCHEMA_VERSION = 1
+COMMIT_BATCH = 500  # 一次提交最多合并的写入任务数
+REVALIDATE_DELAY_S = 30.0  # 启动后多久开始校验
+REVALIDATE_BATCH = 200  # 每批校验的文件数
+REVALIDATE_PAUSE_S = 0.05  # 批次之间的间隔，避免长时间占用磁盘和写入线程
+FTS_MIN_TERM = 3  # 三元组索引要求查询词至少 3 个字符
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    last_opened REAL NOT NULL DEFAULT 0,
+    missing INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    folder_id INTEGER NOT NULL REFERENCES folders(id) ON DELETE CASCADE,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    norm TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    progress REAL NOT NULL DEFAULT 0,
+    position REAL NOT NULL DEFAULT 0,
+    last_played REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files(folder_id);
+CREATE INDEX IF NOT EXISTS files_last_played ON files(last_played) WHERE last_played > 0;
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    norm, content='files', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts(rowid, norm) VALUES (new.id, new.norm);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, norm) VALUES ('delete', old.id, old.norm);
+END;
+CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE OF norm ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, norm) VALUES ('delete', old.id, old.norm);
+    INSERT INTO files_fts(rowid, norm) VALUES (new.id, new.norm);
+END;
+"""
+
+_RESULT_COLUMNS = (
+    "f.path, f.name, d.path, f.size, f.duration, f.progress, f.position, f.last_played"
+)
+
+
+def _search_text(root: str, path: str) -> str:
+    """用于搜索的文本：文件夹名 + 相对路径（不含扩展名）"""
+    rel = os.path.splitext(os.path.relpath(path, root))[0]
+    return normalize(f"{os.path.basename(root)} {rel}")
+
+
+def _row_to_dict(row) -> dict:
+    path, name, folder, size, duration, progress, position, last_played = row
+    return {
+        "path": path,
+        "name": name,
+        "folder": folder,
+        "size": size,
+        "duration": duration,
+        "progress": progress,
+        "position": position,
+        "last_played": last_played,
+        "watched": progress >= WATCHED_PERCENT,
+    }
+
+
+class LibraryIndex:
+    """媒体库索引"""
+
+    def __init__(self, path: str = LIBRARY_PATH):
+        self._path = path
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._fts = False
+        self._revalidate_timer: Optional[threading.Timer] = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    # ---------- 生命周期 ---------- #
+
+    def start(self, revalidate_delay_s: float = REVALIDATE_DELAY_S):
+        """打开数据库并启动后台写入线程"""
+        if self._thread is not None:
+            return
+        try:
+            ensure_settings_dir()
+            conn = self._connect()
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self._fts = True
+            except sqlite3.OperationalError as e:
+                logging.info(f"SQLite 不支持 FTS5 三元组索引，媒体库搜索使用 LIKE: {e}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+            conn.close()
+            self._reader = self._connect()
+        except sqlite3.Error as e:
+            logging.error(f"打开媒体库失败: {e}")
+            return
+        self._thread = threading.Thread(target=self._run, name='library-writer', daemon=True)
+        self._thread.start()
+        if revalidate_delay_s >= 0:
+            self._revalidate_timer = threading.Timer(revalidate_delay_s, self.revalidate)
+            self._revalidate_timer.daemon = True
+            self._revalidate_timer.start()
+
+    def close(self):
+        """写完队列中的任务后关闭"""
+        if self._revalidate_timer is not None:
+            self._revalidate_timer.cancel()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(5.0)
+            self._thread = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, timeout=5.0)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _submit(self, task: Callable[[sqlite3.Connection], None]):
+        if self._thread is not None:
+            self._queue.put(task)
+
+    def flush(self, timeout: float = 0.3):
+        """等待已提交的写入完成（之后的查询可以读到），超时后不再等待"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+
+        def task(conn: sqlite3.Connection):
+            conn.commit()
+            done.set()
+        self._submit(task)
+        done.wait(timeout)
+
+    def _run(self):
+        """后台写入线程：合并队列中的任务后一次提交"""
+        conn = self._connect()
+        running = True
+        while running:
+            task = self._queue.get()
+            tasks = [task]
+            while len(tasks) < COMMIT_BATCH:
+                try:
+                    tasks.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with tracer.span('library.write', cat='library', args={'tasks': len(tasks)}):
+                for task in tasks:
+                    if task is None:
+                        running = False
+                        continue
+                    try:
+                        task(conn)
+                    except Exception as e:
+                        logging.error(f"媒体库写入失败: {e}")
+                try:
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logging.error(f"媒体库提交失败: {e}")
+        conn.close()
+
+    # ---------- 写入（界面线程调用，后台执行） ---------- #
+
+    @staticmethod
+    def _folder_id(conn: sqlite3.Connection, folder: str, opened: bool = False) -> int:
+        now = time.time() if opened else 0
+        conn.execute(
+            "INSERT INTO folders(path, name, last_opened) VALUES (?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET missing = 0, "
+            "last_opened = MAX(last_opened, excluded.last_opened)",
+            (folder, os.path.basename(folder) or folder, now),
+        )
+        return conn.execute("SELECT id FROM folders WHERE path = ?", (folder,)).fetchone()[0]
+
+    @staticmethod
+    def _upsert_files(conn: sqlite3.Connection, folder_id: int, root: str, files: list):
+        """files: [(路径, 大小, 修改时间)]"""
+        conn.executemany(
+            "INSERT INTO files(folder_id, path, name, norm, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns "
+            "WHERE size != excluded.size OR mtime_ns != excluded.mtime_ns",
+            [(folder_id, path, os.path.basename(path), _search_text(root, path), size, mtime_ns)
+             for path, size, mtime_ns in files],
+        )
+
+    def record_folder(self, root: str, listing: dict):
+        """记录打开的文件夹
+        listing: 扫描得到的目录列表 {目录路径: 快照记录}（见 folder_scanner）
+        """
+        dirs = {path: [(os.path.join(path, name), size, mtime_ns) for name, size, mtime_ns in record['files']]
+                for path, record in listing.items()}
+
+        def task(conn: sqlite3.Connection):
+            folder_id = self._folder_id(conn, root, opened=True)
+            listed = set()
+            for files in dirs.values():
+                self._upsert_files(conn, folder_id, root, files)
+                listed.update(f[0] for f in files)
+            # 删除本次列出的目录中已不存在的文件（未列出的目录，如超出扫描深度的，保持不变）
+            stale = [
+                (path,) for (path,) in conn.execute("SELECT path FROM files WHERE folder_id = ?", (folder_id,))
+                if path not in listed and os.path.dirname(path) in dirs
+            ]
+            conn.executemany("DELETE FROM files WHERE path = ?", stale)
+        self._submit(task)
+
+    def record_file(self, path: str):
+        """记录单独打开的文件（不属于已记录的文件夹时，以所在目录作为文件夹）"""
+        def task(conn: sqlite3.Connection):
+            if conn.execute("SELECT 1 FROM files WHERE path = ?", (path,)).fetchone():
+                return
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+            folder = os.path.dirname(path)
+            self._upsert_files(conn, self._folder_id(conn, folder, opened=True), folder,
+                               [(path, st.st_size, st.st_mtime_ns)])
+        self._submit(task)
+
+    def update_progress(self, path: str, percentage: float, duration: float, position: float):
+        """更新观看进度（保存播放进度时调用）"""
+        now = time.time()
+
+        def task(conn: sqlite3.Connection):
+            cur = conn.execute(
+                "UPDATE files SET progress = ?, duration = ?, position = ?, last_played = ? WHERE path = ?",
+                (round(percentage, 1), duration or None, position, now, path),
+            )
+            if cur.rowcount == 0:
+                folder = os.path.dirname(path)
+                folder_id = self._folder_id(conn, folder)
+                conn.execute(
+                    "INSERT INTO files(folder_id, path, name, norm, progress, duration, position, last_played) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (folder_id, path, os.path.basename(path), _search_text(folder, path),
+                     round(percentage, 1), duration or None, position, now),
+                )
+        self._submit(task)
+
+    def apply_changes(self, root: str, added: list, removed: list, renamed: list):
+        """同步文件夹监视发现的变化"""
+        def task(conn: sqlite3.Connection):
+            folder_id = self._folder_id(conn, root)
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+            for old_path, new_path in renamed:
+                conn.execute(
+                    "UPDATE OR REPLACE files SET path = ?, name = ?, norm = ? WHERE path = ?",
+                    (new_path, os.path.basename(new_path), _search_text(root, new_path), old_path),
+                )
+            files = []
+            for path in added:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, st.st_size, st.st_mtime_ns))
+            self._upsert_files(conn, folder_id, root, files)
+        self._submit(task)
+
+    def revalidate(self):
+        """后台分批校验文件是否仍然存在"""
+        def task(conn: sqlite3.Connection):
+            folders = conn.execute("SELECT id, path FROM folders").fetchall()
+            reachable = []
+            for folder_id, path in folders:
+                missing = 0 if os.path.isdir(path) else 1
+                conn.execute("UPDATE folders SET missing = ? WHERE id = ?", (missing, folder_id))
+                if not missing:
+                    reachable.append(folder_id)
+            if reachable:
+                self._submit(self._revalidate_batch(reachable, 0))
+        self._submit(task)
+
+    def _revalidate_batch(self, folder_ids: list, after_id: int):
+        def task(conn: sqlite3.Connection):
+            placeholders = ",".join("?" * len(folder_ids))
+            rows = conn.execute(
+                f"SELECT id, path FROM files WHERE id > ? AND folder_id IN ({placeholders}) "
+                f"ORDER BY id LIMIT ?",
+                (after_id, *folder_ids, REVALIDATE_BATCH),
+            ).fetchall()
+            if not rows:
+                logging.info("媒体库校验完成")
+                return
+            gone = [(file_id,) for file_id, path in rows if not os.path.exists(path)]
+            if gone:
+                conn.executemany("DELETE FROM files WHERE id = ?", gone)
+            # 批次之间稍作停顿，期间其他写入可以先执行
+            timer = threading.Timer(REVALIDATE_PAUSE_S, self._submit,
+                                    args=(self._revalidate_batch(folder_ids, rows[-1][0]),))
+            timer.daemon = True
+            timer.start()
+        return task
+
+    # ---------- 查询（界面线程） ---------- #
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """在整个媒体库中按文件夹名和文件名搜索（规范化规则与播放列表搜索相同）"""
+        if self._reader is None:
+            return []
+        terms = normalize(query).split()
+        if not terms:
+            return []
+        fts_terms = [t for t in terms if len(t) >= FTS_MIN_TERM] if self._fts else []
+        like_terms = [t for t in terms if t not in fts_terms]
+        sql = f"SELECT {_RESULT_COLUMNS} FROM files f JOIN folders d ON d.id = f.folder_id"
+        where, params = [], []
+        if fts_terms:
+            sql = (f"SELECT {_RESULT_COLUMNS} FROM files_fts "
+                   f"JOIN files f ON f.id = files_fts.rowid JOIN folders d ON d.id = f.folder_id")
+            where.append("files_fts MATCH ?")
+            params.append(" ".join('"' + t.replace('"', '""') + '"' for t in fts_terms))
+        for term in like_terms:
+            where.append("f.norm LIKE ? ESCAPE '\\'")
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        sql += " WHERE " + " AND ".join(where) + " ORDER BY f.last_played DESC LIMIT ?"
+        params.append(limit)
+        try:
+            with tracer.span('library.search', cat='library'):
+                return [_row_to_dict(row) for row in self._reader.execute(sql, params)]
+        except sqlite3.Error as e:
+            logging.warning(f"媒体库搜索失败: {e}")
+            return []
+
+    def recent(self, limit: int = 6) -> list:
+        """最近播放：每个文件夹最后播放的文件，按播放时间倒序（走 last_played 部分索引，不扫描全部文件）"""
+        if self._reader is None:
+            return []
+        try:
+            rows = self._reader.execute(
+                f"SELECT {_RESULT_COLUMNS}, MAX(f.last_played) FROM files f INDEXED BY files_last_played "
+                f"JOIN folders d ON d.id = f.folder_id WHERE f.last_played > 0 "
+                f"GROUP BY f.folder_id ORDER BY MAX(f.last_played) DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"读取最近播放失败: {e}")
+            return []
+        return [_row_to_dict(row[:-1]) for row in rows]
+
+    def folder_files(self, path: str) -> tuple:
+        """文件所属的文件夹及其中已记录的全部文件
+        返回: (文件夹路径, [文件路径])；文件不在媒体库中时返回 (None, [])
+        """
+        if self._reader is None:
+            return None, []
+        row = self._reader.execute(
+            "SELECT d.id, d.path FROM files f JOIN folders d ON d.id = f.folder_id WHERE f.path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None, []
+        folder_id, folder = row
+        files = [p for (p,) in self._reader.execute("SELECT path FROM files WHERE folder_id = ?", (folder_id,))]
+        return folder, files
+
+    def stats(self) -> dict:
+        """媒体库统计"""
+        if self._reader is None:
+            return {"folders": 0, "files": 0, "watched": 0}
+        folders = self._reader.execute("SELECT COUNT(*) FROM folders").fetchone()[0]
+        files, watched = self._reader.execute(
+            "SELECT COUNT(*), COALESCE(SUM(progress >= ?), 0) FROM files", (WATCHED_PERCENT,)
+        ).fetchone()
+        return {"folders": folders, "files": files, "watched": watched}
+
+
+# 全局实例
+library = LibraryIndex()
@@ -0,0 +1,313 @@
+"""
+响度分析（按文件预先计算音量增益）
+- 在独立进程中用无界面 mpv 分段解码整个文件的音频（立体声 24kHz，每段 120 秒），只解码一遍，
+  临时文件和内存都只与一段的长度有关
+- 按 EBU R128（ITU-R BS.1770）计算整体响度：K 加权在频域进行（每 100ms 子块做 FFT，乘以滤波器
+  幅频响应的平方），400ms 门限块（重叠 75%）由相邻 4 个子块的能量平均得到，
+  再做 -70 LUFS 绝对门限和 -10 LU 相对门限
+- 结果按 (路径, 大小, 修改时间) 缓存在 media_cache 中；加载文件时由 PlayerCore.load 以单文件选项
+  volume-gain 应用，播放时不需要实时的响度均衡滤镜
+- 解码失败（包括超时）不缓存，下次扫描时重新分析
+- 下一集优先分析；未安装 NumPy 时不做分析
+"""
+import os
+import math
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import mpv
+
+from media_cache import media_cache, file_stat
+from media_probe import probe_order
+from mpv_log import MpvLogRouter
+from tracing import tracer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+LOUDNESS_KIND = "loudness"
+LOUDNESS_VERSION = 1  # 算法变化时递增，旧缓存自动失效
+SAMPLE_RATE = 24000
+CHANNELS = 2
+SEGMENT_S = 120  # 每次解码的时长
+MAX_SEGMENTS = 360  # 最多分析的段数（12 小时）
+DECODE_TIMEOUT_S = 60.0
+HOLD_AFTER_LOAD_S = 5.0  # 播放器加载文件后暂停分析的时间
+
+SUBBLOCK_S = 0.1  # 子块长度（门限块的 1/4）
+BLOCK_SUBBLOCKS = 4  # 400ms 门限块
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+MIN_GAIN_DB = -12.0
+MAX_GAIN_DB = 12.0
+
+
+def available() -> bool:
+    """是否可以分析（需要 NumPy）"""
+    return np is not None
+
+
+def volume_gain(info: Optional[dict], target: float) -> float:
+    """把文件响度调整到 target（LUFS）需要的增益（dB），没有分析结果时为 0
+    提升音量时不超过峰值余量，避免削波
+    """
+    if not info or info.get("integrated") is None:
+        return 0.0
+    gain = min(max(target - info["integrated"], MIN_GAIN_DB), MAX_GAIN_DB)
+    if gain > 0:
+        gain = max(0.0, min(gain, -info.get("peak", 0.0)))
+    return round(gain, 1)
+
+
+# ---------- 测量（在分析进程中运行） ---------- #
+
+def _biquad_power(b: tuple, a: tuple, omega) -> "np.ndarray":
+    z = np.exp(-1j * omega)
+    h = (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+    return np.abs(h) ** 2
+
+
+def k_weighting(size: int, rate: int = SAMPLE_RATE) -> "np.ndarray":
+    """长度为 size 的 rfft 各频点上 K 加权滤波器（高架 + 高通）的功率响应"""
+    omega = 2 * np.pi * np.fft.rfftfreq(size, 1.0 / rate) / rate
+    # 第一级：高架滤波器（模拟头部声学效应）
+    k = math.tan(math.pi * 1681.974450955533 / rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    shelf = _biquad_power(
+        (vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k),
+        (1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k),
+        omega,
+    )
+    # 第二级：高通滤波器（RLB 加权）
+    k = math.tan(math.pi * 38.13547087602444 / rate)
+    q = 0.5003270373238773
+    highpass = _biquad_power((1.0, -2.0, 1.0), (1.0, 2 * (k * k - 1) / (1 + k / q + k * k),
+                                                (1 - k / q + k * k) / (1 + k / q + k * k)), omega)
+    return shelf * highpass
+
+
+def subblock_power(samples, weights) -> "np.ndarray":
+    """(采样数, 声道) 的音频 -> 每个 100ms 子块 K 加权后的均方值（各声道相加）"""
+    size = len(weights) * 2 - 2
+    count = len(samples) // size
+    if count == 0:
+        return np.zeros(0)
+    blocks = samples[:count * size].reshape(count, size, samples.shape[1])
+    spectrum = np.abs(np.fft.rfft(blocks, axis=1)) ** 2  # (子块, 频点, 声道)
+    # Parseval：单边谱中除直流和奈奎斯特频点外都计两次
+    scale = np.full(len(weights), 2.0)
+    scale[0] = scale[-1] = 1.0
+    return (spectrum * (weights * scale)[None, :, None]).sum(axis=(1, 2)) / (size * size)
+
+
+def integrated_loudness(powers) -> Optional[float]:
+    """子块能量 -> 门限后的整体响度（LUFS）；全部低于绝对门限时返回 None"""
+    powers = np.asarray(powers, dtype=np.float64)
+    if len(powers) < BLOCK_SUBBLOCKS:
+        return None
+    cumulative = np.concatenate(([0.0], np.cumsum(powers)))
+    blocks = (cumulative[BLOCK_SUBBLOCKS:] - cumulative[:-BLOCK_SUBBLOCKS]) / BLOCK_SUBBLOCKS
+    with np.errstate(divide='ignore'):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[loudness > ABSOLUTE_GATE_LUFS]
+    if not len(gated):
+        return None
+    threshold = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE_LU
+    gated = blocks[(loudness > ABSOLUTE_GATE_LUFS) & (loudness > threshold)]
+    return round(-0.691 + 10 * math.log10(gated.mean()), 2)
+
+
+def decode_segment(path: str, start: float, length: float):
+    """解码一段立体声音频，返回 (采样数, 2) 的 float32 数组（-1~1）；失败时返回 None"""
+    fd, out_path = tempfile.mkstemp(suffix=".pcm")
+    os.close(fd)
+    router = MpvLogRouter('error')
+    try:
+        encoder = mpv.MPV(
+            log_handler=router,
+            loglevel=router.level,
+            o=out_path,
+            of='s16le',
+            oac='pcm_s16le',
+            audio_format='s16',
+            audio_samplerate=SAMPLE_RATE,
+            audio_channels='stereo',
+            start=f"{start:.3f}",
+            length=f"{length:.3f}",
+            hr_seek='yes',
+            vid='no',
+            sid='no',
+            osc=False,
+            load_scripts=False,
+            ytdl=False,
+            input_default_bindings=False,
+        )
+        try:
+            encoder.play(path)
+            encoder.wait_for_playback(timeout=DECODE_TIMEOUT_S)
+        finally:
+            encoder.terminate()
+        data = np.fromfile(out_path, dtype='<i2')
+        data = data[:len(data) // CHANNELS * CHANNELS].reshape(-1, CHANNELS)
+        return data.astype(np.float32) / 32768.0
+    except Exception as e:
+        logging.debug(f"解码音频失败 {path} @{start:.0f}s: {e}")
+        return None
+    finally:
+        router.close()
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+
+
+def measure_loudness(path: str) -> dict:
+    """逐段解码并测量整个文件（分析进程的入口）
+    返回: {"integrated": LUFS 或 None, "peak": 采样峰值 dBFS}；无法解码时返回 {"error": True}
+    """
+    weights = k_weighting(int(SAMPLE_RATE * SUBBLOCK_S))
+    powers = []
+    peak = 0.0
+    for index in range(MAX_SEGMENTS):
+        samples = decode_segment(path, index * SEGMENT_S, SEGMENT_S)
+        if samples is None:
+            if index == 0:
+                return {"error": True}
+            break
+        if len(samples):
+            powers.append(subblock_power(samples, weights))
+            peak = max(peak, float(np.abs(samples).max()))
+        if len(samples) < SEGMENT_S * SAMPLE_RATE * 0.99:
+            break  # 已到文件结尾
+    if not powers:
+        return {"error": True}
+    return {
+        "version": LOUDNESS_VERSION,
+        "integrated": integrated_loudness(np.concatenate(powers)),
+        "peak": round(20 * math.log10(peak), 2) if peak > 0 else -96.0,
+    }
+
+
+# ---------- 后台分析 ---------- #
+
+class LoudnessScanner:
+    """后台分析播放列表中各文件的响度（结果只写入缓存，下次加载时使用）"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: list = []  # 待分析的文件（已按优先级排序）
+        self._queued: set = set()
+        self._hold_until = 0.0
+        self._stopping = False
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._warned = False
+
+    def scan(self, files: list, current: int):
+        """分析文件列表（替换尚未开始的任务），从下一集开始"""
+        if not available():
+            if files and not self._warned:
+                self._warned = True
+                logging.info("未安装 NumPy，不做响度分析")
+            return
+        with self._cond:
+            self._pending = [files[i] for i in probe_order(len(files), current + 1)]
+            self._queued = set(self._pending)
+            self._cond.notify_all()
+        self._start()
+
+    def add(self, files: list):
+        """追加新出现的文件"""
+        if not available():
+            return
+        with self._cond:
+            for path in files:
+                if path not in self._queued:
+                    self._queued.add(path)
+                    self._pending.append(path)
+            self._cond.notify_all()
+        self._start()
+
+    def set_current(self, files: list, current: int):
+        """当前播放项变化：剩余文件按新的位置重新排序（下一集优先）"""
+        with self._cond:
+            if not self._pending:
+                return
+            remaining = set(self._pending)
+            self._pending = [files[i] for i in probe_order(len(files), current + 1) if files[i] in remaining]
+
+    def hold(self, seconds: float = HOLD_AFTER_LOAD_S):
+        """暂停分析一段时间（播放器加载文件时调用）"""
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def cancel(self):
+        """丢弃尚未开始的任务"""
+        with self._cond:
+            self._pending = []
+            self._queued = set()
+
+    def stop(self):
+        """停止后台线程和分析进程（正在分析的文件会在解码超时内结束）"""
+        with self._cond:
+            self._stopping = True
+            self._pending = []
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _start(self):
+        if self._thread is None and not self._stopping:
+            self._thread = threading.Thread(target=self._run, name='loudness', daemon=True)
+            self._thread.start()
+
+    def _next(self) -> Optional[str]:
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                wait = self._hold_until - time.monotonic()
+                if self._pending and wait <= 0:
+                    return self._pending.pop(0)
+                self._cond.wait(wait if self._pending else None)
+
+    def _run(self):
+        while True:
+            path = self._next()
+            if path is None:
+                return
+            stat = file_stat(path)
+            if stat is None:
+                continue
+            cached = media_cache.get(LOUDNESS_KIND, path, stat)
+            if cached is not None and cached.get("version") == LOUDNESS_VERSION:
+                continue
+            try:
+                with tracer.span('loudness.file', cat='probe'):
+                    info = self._pool().submit(measure_loudness, path).result()
+            except Exception as e:
+                if not self._stopping:
+                    logging.warning(f"响度分析失败 {path}: {e}")
+                continue
+            if not info.get("error"):  # 可能只是暂时读取缓慢，不记录失败
+                media_cache.put(LOUDNESS_KIND, path, info, stat)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
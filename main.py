@@ -4,8 +4,14 @@
 """
 import sys
 import os
+import queue
+import atexit
 import logging
+import logging.handlers
 import traceback
+import multiprocessing
+
+from perf_stats import perf_stats
 
 
 def _get_app_exe_dir() -> str:
@@ -28,8 +34,53 @@ def _get_resource_dir() -> str:
     return os.path.dirname(os.path.abspath(__file__))
 
 
+# 日志文件轮转参数
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener: logging.handlers.QueueListener | None = None
+
+
+class _FlushingQueueHandler(logging.handlers.QueueHandler):
+    """异步日志入队；ERROR 及以上级别等待写入磁盘后再返回，保证崩溃前的消息不丢失"""
+
+    def emit(self, record):
+        with perf_stats.measure('logging.emit'):
+            super().emit(record)
+        if record.levelno >= logging.ERROR:
+            _flush_logging()
+
+
+def _flush_logging():
+    """等待队列中的日志全部写入文件"""
+    if _log_listener is None or _log_listener._thread is None:
+        return
+    _log_queue.join()
+    for handler in _log_listener.handlers:
+        handler.flush()
+
+
+def _stop_logging():
+    """停止后台写日志线程（会先写完队列中剩余的日志）"""
+    global _log_listener
+    if _log_listener is not None and _log_listener._thread is not None:
+        _log_listener.stop()
+    _log_listener = None
+
+
+def _set_log_level(level_name: str):
+    """设置日志级别（DEBUG/INFO/WARNING/ERROR）"""
+    level = logging.getLevelName(str(level_name).upper())
+    if isinstance(level, int):
+        logging.getLogger().setLevel(level)
+
+
 def _setup_logging() -> str:
-    """配置日志，优先写到 exe 目录，失败则退回到 AppData。返回日志路径。"""
+    """配置日志，优先写到 exe 目录，失败则退回到 AppData。返回日志路径。
+    所有线程只把日志放入队列，由后台线程写入按大小轮转的 crash.log。
+    """
+    global _log_listener
     primary_dir = _get_app_exe_dir()
     log_path = os.path.join(primary_dir, 'crash.log')
     try:
@@ -44,198 +95,70 @@ def _setup_logging() -> str:
         os.makedirs(fallback_dir, exist_ok=True)
         log_path = os.path.join(fallback_dir, 'crash.log')
 
-    logging.basicConfig(
-        filename=log_path,
-        level=logging.DEBUG,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        encoding='utf-8',
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
     )
-    return log_path
-
+    file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
 
-_log_path = _setup_logging()
+    _log_listener = logging.handlers.QueueListener(_log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_stop_logging)
 
-# 启用 faulthandler：即使 C 层崩溃（段错误/访问违规）也会写入 fault.log
-import faulthandler as _faulthandler
-_fault_log_path = os.path.join(_get_app_exe_dir(), 'fault.log')
-try:
-    _fault_log_file = open(_fault_log_path, 'a', encoding='utf-8')
-    _faulthandler.enable(_fault_log_file)
-except Exception:
-    _faulthandler.enable()  # 退回到 stderr
+    root = logging.getLogger()
+    root.addHandler(_FlushingQueueHandler(_log_queue))
+    _set_log_level(os.environ.get('PLAYER_LOG_LEVEL', 'INFO'))
+    return log_path
 
-logging.info("========== 程序启动 ==========")
-logging.info(f"版本: Python {sys.version.split()[0]}, Executable: {sys.executable}")
 
-# 设置 DLL 搜索路径（Python 3.8+ 必须用 os.add_dll_directory，PATH 对 ctypes 无效）
-# 句柄必须保存到模块级列表，否则 GC 会立即回收并移除搜索目录
+_log_path = ''
+_fault_log_file = None
+# DLL 搜索目录的句柄必须保存到模块级列表，否则 GC 会立即回收并移除搜索目录
 _dll_dir_handles = []
 
-if sys.platform == 'win32':
-    _resource_dir = _get_resource_dir()
-    _dll_dirs_to_add = [_resource_dir]
-    for _sub in ('PyQt6/Qt6/bin', 'PyQt6/Qt6/plugins'):
-        _p = os.path.join(_resource_dir, *_sub.split('/'))
-        if os.path.isdir(_p):
-            _dll_dirs_to_add.append(_p)
 
-    for _d in _dll_dirs_to_add:
-        try:
-            _dll_dir_handles.append(os.add_dll_directory(_d))
-        except Exception as _e:
-            logging.warning(f"add_dll_directory 失败 {_d}: {_e}")
+def _init_process():
+    """主进程的初始化：日志、faulthandler、DLL 搜索路径
+    不放在模块级：后台分析的解码进程（spawn）会重新导入本模块，不能再打开日志文件或写启动日志
+    """
+    global _log_path, _fault_log_file
+    _log_path = _setup_logging()
 
-    os.environ['PATH'] = os.pathsep.join(_dll_dirs_to_add) + os.pathsep + os.environ.get('PATH', '')
+    # 启用 faulthandler：即使 C 层崩溃（段错误/访问违规）也会写入 fault.log
+    import faulthandler
+    fault_log_path = os.path.join(_get_app_exe_dir(), 'fault.log')
+    try:
+        _fault_log_file = open(fault_log_path, 'a', encoding='utf-8')
+        faulthandler.enable(_fault_log_file)
+    except Exception:
+        faulthandler.enable()  # 退回到 stderr
 
-    # 设置 Windows 任务栏图标（需要在 QApplication 创建前设置）
-    import ctypes
-    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID('player.videoplayer.1.0')
+    logging.info("========== 程序启动 ==========")
+    logging.info(f"版本: Python {sys.version.split()[0]}, Executable: {sys.executable}")
 
-from PyQt6.QtWidgets import (
-    QApplication, QDialog, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QCheckBox
-)
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QFont, QIcon
+    # 设置 DLL 搜索路径（Python 3.8+ 必须用 os.add_dll_directory，PATH 对 ctypes 无效）
+    if sys.platform == 'win32':
+        resource_dir = _get_resource_dir()
+        dll_dirs = [resource_dir]
+        for sub in ('PyQt6/Qt6/bin', 'PyQt6/Qt6/plugins'):
+            path = os.path.join(resource_dir, *sub.split('/'))
+            if os.path.isdir(path):
+                dll_dirs.append(path)
 
-# 注意：MainWindow 延迟导入（在 _main_inner 内），避免模块级 C 崩溃无法记录日志
+        for d in dll_dirs:
+            try:
+                _dll_dir_handles.append(os.add_dll_directory(d))
+            except Exception as e:
+                logging.warning(f"add_dll_directory 失败 {d}: {e}")
 
+        os.environ['PATH'] = os.pathsep.join(dll_dirs) + os.pathsep + os.environ.get('PATH', '')
 
-class DefaultPlayerDialog(QDialog):
-    """自定义深色风格的默认播放器对话框"""
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("设置默认播放器")
-        self.setFixedSize(400, 200)
-        self.result_accepted = False
-        
-        # 设置窗口图标
-        icon_path = os.path.join(_get_resource_dir(), 'icon.ico')
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
-        
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #1a1a1a;
-                color: #fff;
-                font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
-            }
-            QLabel {
-                color: #e0e0e0;
-                background: transparent;
-            }
-            QLabel#title {
-                font-size: 15px;
-                font-weight: bold;
-                color: #fff;
-            }
-            QLabel#subtitle {
-                font-size: 13px;
-                color: #888;
-            }
-            QCheckBox {
-                color: #888;
-                font-size: 12px;
-                spacing: 6px;
-            }
-            QCheckBox::indicator {
-                width: 16px;
-                height: 16px;
-                border: 1px solid #555;
-                border-radius: 3px;
-                background: #2a2a2a;
-            }
-            QCheckBox::indicator:checked {
-                background: #00a1d6;
-                border-color: #00a1d6;
-            }
-            QPushButton {
-                border: none;
-                border-radius: 4px;
-                padding: 10px 24px;
-                font-size: 13px;
-                font-weight: bold;
-            }
-            QPushButton#primary {
-                background: #00a1d6;
-                color: #fff;
-            }
-            QPushButton#primary:hover {
-                background: #00b5e5;
-            }
-            QPushButton#secondary {
-                background: #333;
-                color: #fff;
-            }
-            QPushButton#secondary:hover {
-                background: #444;
-            }
-        """)
-        
-        self._build()
-
-    def showEvent(self, event):
-        super().showEvent(event)
-        if not getattr(self, '_dark_titlebar_set', False):
-            self._dark_titlebar_set = True
-            if sys.platform == 'win32':
-                try:
-                    import ctypes
-                    ctypes.windll.dwmapi.DwmSetWindowAttribute(
-                        int(self.winId()), 20,
-                        ctypes.byref(ctypes.c_int(1)), ctypes.sizeof(ctypes.c_int)
-                    )
-                except Exception:
-                    pass
-
-    def _build(self):
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(24, 24, 24, 24)
-        layout.setSpacing(16)
-        
-        # 标题
-        title = QLabel("是否将此应用设为默认视频播放器？")
-        title.setObjectName("title")
-        layout.addWidget(title)
-        
-        # 副标题
-        subtitle = QLabel("设置后，双击视频文件将自动使用此播放器打开。")
-        subtitle.setObjectName("subtitle")
-        subtitle.setWordWrap(True)
-        layout.addWidget(subtitle)
-        
-        layout.addStretch()
-        
-        # 复选框
-        self.checkbox = QCheckBox("不再提示")
-        layout.addWidget(self.checkbox)
-        
-        # 按钮行
-        btn_row = QHBoxLayout()
-        btn_row.setSpacing(12)
-        btn_row.addStretch()
-        
-        self.no_btn = QPushButton("暂不设置")
-        self.no_btn.setObjectName("secondary")
-        self.no_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.no_btn.clicked.connect(self.reject)
-        btn_row.addWidget(self.no_btn)
-        
-        self.yes_btn = QPushButton("设为默认")
-        self.yes_btn.setObjectName("primary")
-        self.yes_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.yes_btn.clicked.connect(self._on_accept)
-        btn_row.addWidget(self.yes_btn)
-        
-        layout.addLayout(btn_row)
-    
-    def _on_accept(self):
-        self.result_accepted = True
-        self.accept()
-    
-    def is_never_ask_checked(self) -> bool:
-        return self.checkbox.isChecked()
+        # 设置 Windows 任务栏图标（需要在 QApplication 创建前设置）
+        import ctypes
+        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID('player.videoplayer.1.0')
+
+
+# 注意：PyQt6 和 MainWindow 延迟导入（在 _main_inner 内），避免模块级 C 崩溃无法记录日志，
+# 解码进程重新导入本模块时也不会加载 Qt
 
 
 def check_default_player(window):
@@ -244,6 +167,7 @@ def check_default_player(window):
         return
     
     from default_player import default_player_manager
+    from default_player_dialog import DefaultPlayerDialog
     
     if not default_player_manager.should_ask_default():
         return
@@ -263,13 +187,25 @@ def check_default_player(window):
         window._show_toast("已注册文件关联，请在系统设置中确认", 3000)
 
 
+def _export_crash_trace():
+    """崩溃时导出时间线追踪，便于定位崩溃前的操作"""
+    try:
+        from tracing import tracer
+        if tracer.enabled:
+            tracer.export(os.path.join(os.path.dirname(_log_path), 'trace_crash.json'))
+    except Exception:
+        pass
+
+
 def main():
     """主函数"""
+    _init_process()
     try:
         _main_inner()
     except Exception as e:
         logging.critical(f"程序崩溃: {e}")
         logging.critical(traceback.format_exc())
+        _export_crash_trace()
         # 尝试弹出错误对话框
         try:
             from PyQt6.QtWidgets import QApplication, QMessageBox
@@ -280,9 +216,48 @@ def main():
         sys.exit(1)
 
 
+def _pop_profile_arg(argv: list) -> float | None:
+    """从命令行参数中取出 --profile[=秒数]（同时移除，避免被当作文件路径）
+    未指定时读取环境变量 PLAYER_PROFILE。返回采样秒数，未启用返回 None。
+    """
+    from sampling_profiler import DEFAULT_DURATION_S
+    duration = None
+    for arg in list(argv[1:]):
+        if arg == '--profile' or arg.startswith('--profile='):
+            argv.remove(arg)
+            value = arg.partition('=')[2]
+            try:
+                duration = float(value) if value else DEFAULT_DURATION_S
+            except ValueError:
+                duration = DEFAULT_DURATION_S
+    if duration is None and os.environ.get('PLAYER_PROFILE'):
+        try:
+            duration = float(os.environ['PLAYER_PROFILE'])
+        except ValueError:
+            duration = DEFAULT_DURATION_S
+    return duration
+
+
 def _main_inner():
     """实际的主函数逻辑"""
+    profile_seconds = _pop_profile_arg(sys.argv)
+
     # 延迟导入：确保 DLL 目录已注册，且任何 ImportError 都能被 main() 捕获
+    from folder_settings import global_settings
+    from tracing import tracer
+    g_settings = global_settings.load()
+    if g_settings.perf_enabled:
+        perf_stats.enable()
+    if perf_stats.enabled:
+        logging.info("性能统计已启用")
+    if 'PLAYER_TRACE' not in os.environ:
+        tracer.enable(g_settings.trace_enabled)
+    if 'PLAYER_LOG_LEVEL' not in os.environ:
+        _set_log_level(g_settings.log_level)
+
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt, QTimer
+    from PyQt6.QtGui import QFont, QIcon
     from main_window import MainWindow
 
     QApplication.setHighDpiScaleFactorRoundingPolicy(
@@ -302,9 +277,27 @@ def _main_inner():
     font = QFont("Microsoft YaHei", 10)
     app.setFont(font)
 
+    # 主线程卡顿看门狗：卡顿超过阈值时把所有线程调用栈写入 fault.log
+    stall_ms = g_settings.stall_threshold_ms
+    if 'PLAYER_STALL_MS' in os.environ:
+        try:
+            stall_ms = int(os.environ['PLAYER_STALL_MS'])
+        except ValueError:
+            logging.warning(f"PLAYER_STALL_MS 无效: {os.environ['PLAYER_STALL_MS']!r}，使用设置中的 {stall_ms}ms")
+    if stall_ms > 0:
+        from stall_watchdog import StallWatchdog
+        watchdog = StallWatchdog(_fault_log_file, stall_ms, app)
+        watchdog.start()
+        app.aboutToQuit.connect(watchdog.stop)
+
     window = MainWindow()
+    window.set_log_dir(os.path.dirname(_log_path))
     window.show()
 
+    if profile_seconds:
+        from sampling_profiler import start_profiling
+        start_profiling(os.path.dirname(_log_path), profile_seconds)
+
     if len(sys.argv) > 1:
         file_path = sys.argv[1]
         if os.path.isfile(file_path):
@@ -316,6 +309,9 @@ def _main_inner():
 
 
 if __name__ == "__main__":
+    # 打包后后台分析的解码进程也从 exe 启动：在任何初始化之前转入子进程入口
+    # （模块级只有定义，日志、faulthandler 和 Qt 都在 main() 中初始化）
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e:
@@ -4,19 +4,45 @@
 """
 import os
 import sys
+import time
+import bisect
+import threading
 import logging
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QSlider, QLabel, QFileDialog, QSpinBox,
     QDoubleSpinBox, QFrame, QSizePolicy, QMessageBox, QApplication,
-    QDialog, QFormLayout, QMenu, QListWidget, QSplitter, QListWidgetItem
+    QDialog, QFormLayout, QMenu, QListView, QSplitter, QStyledItemDelegate, QStyle,
+    QLineEdit
+)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QSize, QRect, QPoint, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import (
+    QDragEnterEvent, QDropEvent, QAction, QKeySequence, QIcon,
+    QPainter, QColor, QFont, QFontMetrics, QPixmap
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QSize
-from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QAction, QKeySequence, QIcon
 import qtawesome as qta
 
 from player_core import PlayerCore
-from folder_settings import folder_settings, global_settings
+from folder_settings import folder_settings, global_settings, APP_DIR, WATCHED_PERCENT
+from perf_stats import perf_stats
+from tracing import tracer
+from playback_quality import QualityMonitor
+from folder_scanner import FolderScanner, path_sort_key
+from folder_watcher import FolderWatcher
+from folder_snapshot import snapshot_cache
+from media_cache import media_cache
+from library_index import library
+from media_probe import MediaProber, describe, PROBE_KIND
+from thumbnailer import Thumbnailer, BUCKET_S, THUMB_WIDTH, THUMB_HEIGHT, clear_disk_cache as clear_thumbnail_cache
+from poster_frames import PosterPool, clear_poster_cache
+from intro_detector import IntroDetector
+from scene_detector import SceneDetector, cached_chapters
+from loudness import LoudnessScanner, LOUDNESS_KIND, volume_gain
+from playlist_search import SearchIndex
+
+
+PLAYLIST_PROGRESS_INTERVAL_S = 2.0  # 播放列表当前项进度的更新间隔
+CONTINUE_WATCHING_COUNT = 6  # 欢迎页"继续观看"显示的条数
 
 
 class VideoWidget(QFrame):
@@ -46,7 +72,32 @@ class VideoWidget(QFrame):
 
 
 class ClickableSlider(QSlider):
-    """可点击的进度条"""
+    """可点击的进度条（悬停时报告鼠标位置，用于显示缩略图；可显示章节刻度）"""
+
+    hovered = pyqtSignal(float, int)  # 位置比例 0~1, 鼠标 x 坐标
+    hoverLeft = pyqtSignal()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.setMouseTracking(True)
+        self._chapter_marks: list = []  # 章节开始位置（比例 0~1）
+
+    def set_chapters(self, marks: list):
+        """设置章节刻度（位置比例列表），空列表时不显示"""
+        if marks != self._chapter_marks:
+            self._chapter_marks = marks
+            self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._chapter_marks:
+            return
+        painter = QPainter(self)
+        color = QColor(255, 255, 255, 200)
+        y = self.height() // 2 - 3
+        for mark in self._chapter_marks:
+            painter.fillRect(int(mark * self.width()) - 1, y, 2, 6, color)
+        painter.end()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -55,6 +106,86 @@ class ClickableSlider(QSlider):
             self.sliderMoved.emit(int(value))
         super().mousePressEvent(event)
 
+    def mouseMoveEvent(self, event):
+        x = event.position().x()
+        self.hovered.emit(min(max(x / max(self.width(), 1), 0.0), 1.0), int(x))
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        self.hoverLeft.emit()
+        super().leaveEvent(event)
+
+
+class ThumbnailPopup(QWidget):
+    """进度条上方的缩略图和时间"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet("background: rgba(0, 0, 0, 0.8); border-radius: 4px;")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(3, 3, 3, 3)
+        layout.setSpacing(2)
+        self.image_label = QLabel()
+        self.image_label.setFixedSize(THUMB_WIDTH, THUMB_HEIGHT)
+        self.image_label.setStyleSheet("background: #111; border-radius: 2px;")
+        layout.addWidget(self.image_label)
+        self.time_label = QLabel()
+        self.time_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.time_label.setStyleSheet("color: #fff; font-size: 12px; background: transparent;")
+        layout.addWidget(self.time_label)
+        self.adjustSize()
+        self.hide()
+
+    def set_image(self, image):
+        """image 为 None 时显示空白（等待生成）"""
+        if image is None:
+            self.image_label.clear()
+        else:
+            self.image_label.setPixmap(QPixmap.fromImage(image))
+
+    def set_time(self, text: str):
+        self.time_label.setText(text)
+
+
+class QualityHud(QLabel):
+    """播放质量悬浮面板（丢帧、音画同步、缓存、解码信息）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet("""
+            QLabel {
+                background: rgba(0, 0, 0, 0.6);
+                color: #e0e0e0;
+                font-family: Consolas, "Courier New", monospace;
+                font-size: 12px;
+                padding: 8px 12px;
+                border-radius: 4px;
+            }
+        """)
+        self.hide()
+
+    def update_stats(self, stats: dict):
+        """根据 PlayerCore.sample_quality 的结果刷新显示"""
+        def num(value, fmt):
+            return format(value, fmt) if isinstance(value, (int, float)) else "-"
+
+        hwdec = stats.get('hwdec-current')
+        hwdec_text = f"硬解 {hwdec}" if hwdec and hwdec != 'no' else "软解"
+        cache_bytes = stats.get('demuxer-cache-bytes')
+        lines = [
+            f"视频: {stats.get('video-codec') or '-'} ({hwdec_text})",
+            f"音频: {stats.get('audio-codec-name') or '-'}",
+            f"帧率: {num(stats.get('estimated-vf-fps'), '.2f')} / {num(stats.get('container-fps'), '.3f')} (实际/容器)",
+            f"丢帧: 输出 {stats.get('frame-drop-count') or 0}  解码 {stats.get('decoder-frame-drop-count') or 0}",
+            f"音画同步: {num(stats.get('avsync'), '+.3f')}s",
+            f"缓存: {num(stats.get('demuxer-cache-duration'), '.1f')}s / "
+            f"{num(cache_bytes / (1024 * 1024) if cache_bytes else None, '.1f')} MB",
+        ]
+        self.setText("\n".join(lines))
+        self.adjustSize()
+
 
 class SettingsDialog(QDialog):
     """全局设置对话框"""
@@ -216,118 +347,473 @@ class SettingsDialog(QDialog):
         )
         if reply == QMessageBox.StandardButton.Yes:
             count = folder_settings.clear_all_settings()
+            snapshot_cache.clear()
+            media_cache.clear()
+            clear_thumbnail_cache()
+            clear_poster_cache()
             QMessageBox.information(self, "清理完成", f"已清理 {count} 个文件夹的设置文件")
 
 
-class ScrollingLabel(QLabel):
-    """鼠标悬停时滚动的标签"""
-    
-    def __init__(self, text="", parent=None):
-        super().__init__(text, parent)
-        self._original_text = text
-        self._scroll_pos = 0
-        self._timer = QTimer(self)
-        self._timer.timeout.connect(self._scroll)
-        self._is_hovering = False
-        self.setMouseTracking(True)
-    
-    def setText(self, text):
-        self._original_text = text
-        self._scroll_pos = 0
-        super().setText(text)
-    
-    def enterEvent(self, event):
-        self._is_hovering = True
-        # 检查文本是否超出宽度
-        fm = self.fontMetrics()
-        if fm.horizontalAdvance(self._original_text) > self.width() - 10:
-            self._scroll_pos = 0
-            self._timer.start(100)
-        super().enterEvent(event)
-    
-    def leaveEvent(self, event):
-        self._is_hovering = False
-        self._timer.stop()
-        self._scroll_pos = 0
-        super().setText(self._original_text)
-        super().leaveEvent(event)
-    
-    def _scroll(self):
-        if not self._is_hovering:
+class PlaylistModel(QAbstractListModel):
+    """播放列表数据模型 - 只保存数据，由委托按需绘制可见行
+    同时增量维护文件夹汇总（已看集数、剩余时长），进度变化时只调整变化的文件
+    """
+
+    ProgressRole = Qt.ItemDataRole.UserRole + 1
+    IsCurrentRole = Qt.ItemDataRole.UserRole + 2
+    DurationRole = Qt.ItemDataRole.UserRole + 3
+    PosterRole = Qt.ItemDataRole.UserRole + 4
+
+    aggregateChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._files: list = []
+        self._names: list = []  # 显示名称（不含扩展名），设置文件时计算一次
+        self._filenames: list = []  # 文件名（悬停提示）
+        self._rows: dict = {}  # 文件路径 -> 行号
+        self._progress: dict = {}  # 文件路径 -> 播放进度
+        self._durations: dict = {}  # 文件路径 -> 时长（秒），只有播放过的文件才有
+        self._info: dict = {}  # 文件路径 -> 后台探测得到的媒体信息（见 media_probe.py）
+        self._posters: dict = {}  # 文件路径 -> 封面帧 QImage（见 poster_frames.py）
+        self._current = -1
+        self._live_path = None  # 正在播放、进度由播放器实时更新的文件
+        self._reset_aggregate()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._files)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        row = index.row()
+        if not index.isValid() or row >= len(self._files):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._names[row]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            summary = describe(self._info.get(self._files[row]))
+            return f"{self._filenames[row]}\n{summary}" if summary else self._filenames[row]
+        if role == self.ProgressRole:
+            return self._progress.get(self._files[row], 0)
+        if role == self.IsCurrentRole:
+            return row == self._current
+        if role == self.DurationRole:
+            return self._duration(self._files[row])
+        if role == self.PosterRole:
+            return self._posters.get(self._files[row])
+        return None
+
+    @property
+    def current(self) -> int:
+        return self._current
+
+    def display_names(self) -> list:
+        return self._names
+
+    # ---------- 汇总 ---------- #
+
+    def _reset_aggregate(self):
+        self._watched = 0  # 已看完的文件数
+        self._known_count = 0  # 已知时长的文件数
+        self._known_total = 0.0  # 已知时长之和
+        self._known_remaining = 0.0  # 已知时长文件的剩余时长
+        self._unknown_remaining = 0.0  # 未知时长文件的剩余比例之和（按平均时长估算）
+
+    def _duration(self, path: str):
+        """文件时长：优先使用播放时记录的时长，其次是探测结果"""
+        duration = self._durations.get(path)
+        if not duration:
+            info = self._info.get(path)
+            duration = info.get('duration') if info else None
+        return duration or None
+
+    def _account(self, path: str, sign: int):
+        """把一个文件计入（sign=1）或移出（sign=-1）汇总"""
+        progress = self._progress.get(path, 0)
+        watched = progress >= WATCHED_PERCENT
+        left = 0.0 if watched else 1 - min(progress, 100) / 100
+        if watched:
+            self._watched += sign
+        duration = self._duration(path)
+        if duration:
+            self._known_count += sign
+            self._known_total += sign * duration
+            self._known_remaining += sign * duration * left
+        else:
+            self._unknown_remaining += sign * left
+
+    def aggregate(self) -> dict:
+        """文件夹汇总
+        返回: {"total": 文件数, "watched": 已看完, "remaining_s": 估算剩余时长（没有已知时长时为 None）}
+        """
+        remaining = None
+        if self._known_count > 0:
+            average = self._known_total / self._known_count
+            remaining = max(0.0, self._known_remaining + self._unknown_remaining * average)
+        return {"total": len(self._files), "watched": self._watched, "remaining_s": remaining}
+
+    # ---------- 数据更新 ---------- #
+
+    def set_files(self, files: list, progress: dict, durations: dict, current: int):
+        """重置全部数据"""
+        self.beginResetModel()
+        self._files = list(files)
+        self._filenames = [os.path.basename(f) for f in files]
+        self._names = [os.path.splitext(name)[0] for name in self._filenames]
+        self._rows = {f: row for row, f in enumerate(self._files)}
+        self._progress = progress
+        self._durations = durations
+        self._info = {f: self._info[f] for f in self._files if f in self._info}
+        self._posters = {f: self._posters[f] for f in self._files if f in self._posters}
+        self._current = current
+        self._live_path = None
+        self._reset_aggregate()
+        for f in self._files:
+            self._account(f, 1)
+        self.endResetModel()
+        self.aggregateChanged.emit()
+
+    def append_files(self, files: list, progress: dict, durations: dict):
+        """在末尾追加文件（扫描过程中分批调用）"""
+        self.insert_files(len(self._files), files, progress, durations)
+
+    def insert_files(self, row: int, files: list, progress: dict, durations: dict):
+        """在指定位置插入文件"""
+        if not files:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(files) - 1)
+        filenames = [os.path.basename(f) for f in files]
+        self._files[row:row] = files
+        self._filenames[row:row] = filenames
+        self._names[row:row] = [os.path.splitext(name)[0] for name in filenames]
+        self._progress.update(progress)
+        self._durations.update(durations)
+        for f in files:
+            self._account(f, 1)
+        if row <= self._current:
+            self._current += len(files)
+        self._update_rows(row)
+        self.endInsertRows()
+        self.aggregateChanged.emit()
+
+    def remove_rows(self, row: int, count: int = 1):
+        """删除从 row 开始的 count 行"""
+        if count <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for f in self._files[row:row + count]:
+            self._account(f, -1)
+            self._rows.pop(f, None)
+            self._progress.pop(f, None)
+            self._durations.pop(f, None)
+            self._info.pop(f, None)
+            self._posters.pop(f, None)
+        del self._files[row:row + count]
+        del self._filenames[row:row + count]
+        del self._names[row:row + count]
+        if self._current >= row + count:
+            self._current -= count
+        elif self._current >= row:
+            self._current = -1
+        self._update_rows(row)
+        self.endRemoveRows()
+        self.aggregateChanged.emit()
+
+    def _update_rows(self, start: int):
+        """更新 start 之后各行的 文件路径 -> 行号 映射"""
+        self._rows.update((f, start + i) for i, f in enumerate(self._files[start:]))
+
+    def set_current(self, current: int):
+        """切换当前项：只通知新旧两行变化"""
+        old = self._current
+        if old == current:
             return
-        display_text = self._original_text + "    " + self._original_text
-        self._scroll_pos = (self._scroll_pos + 1) % (len(self._original_text) + 4)
-        super().setText(display_text[self._scroll_pos:])
+        self._current = current
+        self._live_path = None
+        for row in (old, current):
+            if 0 <= row < len(self._files):
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx, [self.IsCurrentRole])
+
+    def set_progress(self, progress: dict, durations: dict):
+        """用保存的进度更新：只调整有变化的文件
+        正在播放的文件保留实时进度（保存的进度只在切换文件时写入，可能较旧）
+        """
+        if self._live_path is not None and self._live_path in self._progress:
+            progress[self._live_path] = self._progress[self._live_path]
+            if self._live_path in self._durations:
+                durations[self._live_path] = self._durations[self._live_path]
+        changed = {f for f, value in progress.items() if self._progress.get(f) != value}
+        changed.update(f for f in self._progress if f not in progress)
+        changed.update(f for f, value in durations.items() if self._durations.get(f) != value)
+        changed.update(f for f in self._durations if f not in durations)
+        changed.intersection_update(self._rows)
+        for f in changed:
+            self._account(f, -1)
+        self._progress = progress
+        self._durations = durations
+        for f in changed:
+            self._account(f, 1)
+            idx = self.index(self._rows[f])
+            self.dataChanged.emit(idx, idx, [self.ProgressRole])
+        if changed:
+            self.aggregateChanged.emit()
+
+    def set_media_info(self, infos: dict):
+        """后台探测结果到达：更新时长和汇总"""
+        changed = False
+        for path, info in infos.items():
+            row = self._rows.get(path)
+            if row is None:
+                continue
+            self._account(path, -1)
+            self._info[path] = info
+            self._account(path, 1)
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [self.DurationRole, Qt.ItemDataRole.ToolTipRole])
+            changed = True
+        if changed:
+            self.aggregateChanged.emit()
+
+    def has_poster(self, path: str) -> bool:
+        return path in self._posters
+
+    def set_poster(self, path: str, image):
+        """封面帧生成完成"""
+        row = self._rows.get(path)
+        if row is None:
+            return
+        self._posters[path] = image
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx, [self.PosterRole])
 
+    def set_row_progress(self, row: int, progress: float, duration: float):
+        """播放中实时更新一行的进度（只在显示的百分比变化时重绘该行）"""
+        if not 0 <= row < len(self._files):
+            return
+        path = self._files[row]
+        self._live_path = path
+        old = self._progress.get(path, 0)
+        progress = round(progress, 1)
+        duration = round(duration) if duration > 0 else self._durations.get(path)
+        if old == progress and self._durations.get(path) == duration:
+            return
+        self._account(path, -1)
+        self._progress[path] = progress
+        if duration:
+            self._durations[path] = duration
+        self._account(path, 1)
+        if int(old) != int(progress):
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [self.ProgressRole])
+        self.aggregateChanged.emit()
 
-class PlaylistItemWidget(QWidget):
-    """播放列表项 - 显示标题和进度"""
-    
-    def __init__(self, title: str, progress: float = 0, is_current: bool = False, parent=None):
+
+class PlaylistFilterModel(QAbstractListModel):
+    """播放列表过滤模型 - 按搜索结果排列源模型的行，未过滤时与源模型一一对应"""
+
+    def __init__(self, source: PlaylistModel, parent=None):
         super().__init__(parent)
-        self.setFixedHeight(50)
-        
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(12, 8, 12, 8)
-        layout.setSpacing(8)
-        
+        self._source = source
+        self._search = SearchIndex()
+        self._index_dirty = True  # 源数据变化后需要重建搜索索引
+        self._query = ""
+        self._rows = None  # 过滤后的源行号（按相关度排序），None 表示未过滤
+        self._proxy_rows: dict = {}  # 源行号 -> 过滤后的行号
+
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._on_source_reset)
+        source.rowsAboutToBeInserted.connect(self._on_rows_about_to_be_inserted)
+        source.rowsInserted.connect(self._on_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        source.rowsRemoved.connect(self._on_rows_removed)
+        source.dataChanged.connect(self._on_source_data_changed)
+
+    @property
+    def is_filtered(self) -> bool:
+        return self._rows is not None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._source.rowCount() if self._rows is None else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        return self._source.data(self._source.index(self.source_row(index.row())), role)
+
+    def source_row(self, row: int) -> int:
+        """过滤后的行号 -> 播放列表索引"""
+        return row if self._rows is None else self._rows[row]
+
+    def proxy_row(self, source_row: int) -> int:
+        """播放列表索引 -> 过滤后的行号（不可见时返回 -1）"""
+        if self._rows is None:
+            return source_row
+        return self._proxy_rows.get(source_row, -1)
+
+    def set_filter(self, query: str):
+        """设置过滤条件（空字符串取消过滤）"""
+        self._query = query
+        self.beginResetModel()
+        self._apply_filter()
+        self.endResetModel()
+
+    def prepare_index(self):
+        """在后台线程中预先规范化文件名，首次输入时无需等待"""
+        if not self._index_dirty:
+            return
+        names = list(self._source.display_names())
+        threading.Thread(target=self._search.prepare, args=(names,), name='playlist-search', daemon=True).start()
+
+    def _apply_filter(self):
+        rows = None
+        if self._query.strip():
+            if self._index_dirty:
+                self._search.build(self._source.display_names())
+                self._index_dirty = False
+            rows = self._search.search(self._query)
+        self._rows = rows
+        self._proxy_rows = {} if rows is None else {src: row for row, src in enumerate(rows)}
+
+    def _refilter(self):
+        self.beginResetModel()
+        self._apply_filter()
+        self.endResetModel()
+
+    def _on_source_reset(self):
+        self._index_dirty = True
+        self._apply_filter()
+        self.endResetModel()
+
+    def _on_rows_about_to_be_inserted(self, parent, first: int, last: int):
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_rows_inserted(self, parent, first: int, last: int):
+        self._index_dirty = True
+        if self._rows is None:
+            self.endInsertRows()
+        else:
+            self._refilter()
+
+    def _on_rows_about_to_be_removed(self, parent, first: int, last: int):
+        if self._rows is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+
+    def _on_rows_removed(self, parent, first: int, last: int):
+        self._index_dirty = True
+        if self._rows is None:
+            self.endRemoveRows()
+        else:
+            self._refilter()
+
+    def _on_source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles=()):
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            row = self.proxy_row(source_row)
+            if row >= 0:
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx, roles)
+
+
+class PlaylistItemDelegate(QStyledItemDelegate):
+    """播放列表项绘制 - 播放指示器、封面帧、标题、时长、进度条和百分比"""
+
+    ROW_HEIGHT = 50
+    POSTER_WIDTH = 60  # 封面帧显示尺寸（16:9，高度与内容区一致）
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(0, self.ROW_HEIGHT)
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        painter.save()
+        rect = option.rect
+        state = option.state
+
+        # 背景与分隔线
+        if state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(rect, QColor(0, 161, 214, 77))
+        elif state & QStyle.StateFlag.State_MouseOver:
+            painter.fillRect(rect, QColor(255, 255, 255, 13))
+        painter.setPen(QColor("#2a2a2a"))
+        painter.drawLine(rect.left(), rect.bottom(), rect.right(), rect.bottom())
+
+        content = rect.adjusted(12, 8, -12, -8)
+
         # 播放指示器
-        self.indicator = QLabel("▶" if is_current else "")
-        self.indicator.setFixedWidth(16)
-        self.indicator.setStyleSheet("color: #00a1d6; font-size: 12px;")
-        layout.addWidget(self.indicator)
-        
-        # 标题和进度的垂直布局
-        info_layout = QVBoxLayout()
-        info_layout.setContentsMargins(0, 0, 0, 0)
-        info_layout.setSpacing(2)
-        
-        # 标题（滚动）
-        self.title_label = ScrollingLabel(title)
-        self.title_label.setStyleSheet("color: #fff; font-size: 13px; background: transparent;")
-        info_layout.addWidget(self.title_label)
-        
+        font = QFont(option.font)
+        if index.data(PlaylistModel.IsCurrentRole):
+            font.setPixelSize(12)
+            painter.setFont(font)
+            painter.setPen(QColor("#00a1d6"))
+            painter.drawText(QRect(content.left(), content.top(), 16, content.height()),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, "▶")
+
+        # 封面帧（尚未生成时显示占位）
+        poster_rect = QRect(content.left() + 18, content.top(), self.POSTER_WIDTH, content.height())
+        poster = index.data(PlaylistModel.PosterRole)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#222222"))
+        painter.drawRoundedRect(poster_rect, 2, 2)
+        if poster is not None:
+            painter.drawImage(poster_rect, poster)
+        text_left = poster_rect.right() + 9
+
+        # 时长（已知时显示在标题右侧）
+        title_right = content.right()
+        duration = index.data(PlaylistModel.DurationRole)
+        if duration:
+            font.setPixelSize(11)
+            painter.setFont(font)
+            painter.setPen(QColor("#888888"))
+            text = MainWindow._format_time(duration)
+            width = QFontMetrics(font).horizontalAdvance(text)
+            painter.drawText(QRect(content.right() - width, content.top(), width, 18),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, text)
+            title_right -= width + 8
+
+        # 标题（过长时省略，完整名称见悬停提示）
+        progress = index.data(PlaylistModel.ProgressRole) or 0
+        font.setPixelSize(13)
+        painter.setFont(font)
+        painter.setPen(QColor("#ffffff"))
+        title_rect = QRect(text_left, content.top(), title_right - text_left, 18)
+        title = QFontMetrics(font).elidedText(
+            index.data(Qt.ItemDataRole.DisplayRole) or "", Qt.TextElideMode.ElideRight, title_rect.width()
+        )
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, title)
+
         # 进度条和百分比
-        progress_layout = QHBoxLayout()
-        progress_layout.setContentsMargins(0, 0, 0, 0)
-        progress_layout.setSpacing(6)
-        
         if progress > 0:
-            # 进度条
-            self.progress_bar = QSlider(Qt.Orientation.Horizontal)
-            self.progress_bar.setRange(0, 100)
-            self.progress_bar.setValue(int(progress))
-            self.progress_bar.setEnabled(False)
-            self.progress_bar.setFixedHeight(4)
-            self.progress_bar.setStyleSheet("""
-                QSlider::groove:horizontal { background: #333; height: 4px; border-radius: 2px; }
-                QSlider::sub-page:horizontal { background: #00a1d6; border-radius: 2px; }
-                QSlider::handle:horizontal { width: 0px; }
-            """)
-            progress_layout.addWidget(self.progress_bar, 1)
-            
-            # 百分比
-            self.progress_label = QLabel(f"{progress:.0f}%")
-            self.progress_label.setStyleSheet("color: #888; font-size: 11px; background: transparent;")
-            self.progress_label.setFixedWidth(35)
-            progress_layout.addWidget(self.progress_label)
-        else:
-            progress_layout.addStretch()
-        
-        info_layout.addLayout(progress_layout)
-        layout.addLayout(info_layout, 1)
+            bar_right = content.right() - 35 - 6
+            bar = QRect(text_left, content.bottom() - 8, bar_right - text_left, 4)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#333333"))
+            painter.drawRoundedRect(bar, 2, 2)
+            filled = QRect(bar.left(), bar.top(), int(bar.width() * min(progress, 100) / 100), bar.height())
+            painter.setBrush(QColor("#00a1d6"))
+            painter.drawRoundedRect(filled, 2, 2)
+
+            font.setPixelSize(11)
+            painter.setFont(font)
+            painter.setPen(QColor("#888888"))
+            painter.drawText(QRect(bar_right + 6, content.bottom() - 14, 35, 16),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, f"{progress:.0f}%")
+        painter.restore()
 
 
 class PlaylistWidget(QWidget):
     """播放列表悬浮面板"""
     
     fileSelected = pyqtSignal(int)  # 发送选中的文件索引
+    refreshRequested = pyqtSignal()  # 请求重新扫描文件夹
+    visibleFilesChanged = pyqtSignal(list)  # 可见行中还没有封面帧的文件（优先生成）
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self._folder_path = ""
         self._files = []
-        self._progress = {}
+        self._scanning = False
         self.setFixedSize(350, 450)
         self.setStyleSheet("""
             QWidget#playlistPanel { 
@@ -335,25 +821,24 @@ class PlaylistWidget(QWidget):
                 border-radius: 8px;
                 border: 1px solid #333;
             }
-            QListWidget {
+            QListView {
                 background: transparent;
                 border: none;
                 color: #fff;
                 font-size: 13px;
                 outline: none;
             }
-            QListWidget::item {
-                padding: 0px;
-                border-bottom: 1px solid #2a2a2a;
-                background: transparent;
-            }
-            QListWidget::item:hover {
-                background: rgba(255,255,255,0.05);
-            }
-            QListWidget::item:selected {
-                background: rgba(0, 161, 214, 0.3);
-            }
             QLabel { color: #888; font-size: 11px; background: transparent; }
+            QLineEdit {
+                background: #2a2a2a;
+                color: #fff;
+                border: 1px solid #3a3a3a;
+                border-radius: 4px;
+                padding: 4px 8px;
+                margin: 0 12px 8px 12px;
+                font-size: 12px;
+            }
+            QLineEdit:focus { border-color: #00a1d6; }
             QLabel#titleLabel { 
                 color: #fff; 
                 font-size: 14px; 
@@ -397,6 +882,17 @@ class PlaylistWidget(QWidget):
         header.addWidget(title)
         header.addStretch()
         
+        # 刷新按钮（忽略快照重新扫描文件夹）
+        refresh_btn = QPushButton()
+        refresh_btn.setIcon(qta.icon('fa5s.sync-alt', color='#888888'))
+        refresh_btn.setIconSize(QSize(12, 12))
+        refresh_btn.setFixedSize(24, 24)
+        refresh_btn.setToolTip("刷新 (F5)")
+        refresh_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        refresh_btn.setStyleSheet("QPushButton { background: transparent; border: none; }")
+        refresh_btn.clicked.connect(lambda: self.refreshRequested.emit())
+        header.addWidget(refresh_btn)
+        
         # 关闭按钮
         close_btn = QPushButton("×")
         close_btn.setFixedSize(24, 24)
@@ -420,58 +916,257 @@ class PlaylistWidget(QWidget):
         self.folder_label.setWordWrap(True)
         layout.addWidget(self.folder_label)
         
-        # 文件列表
-        self.list_widget = QListWidget()
-        self.list_widget.itemDoubleClicked.connect(self._on_item_double_clicked)
-        self.list_widget.setVerticalScrollMode(QListWidget.ScrollMode.ScrollPerPixel)
-        layout.addWidget(self.list_widget, 1)
+        # 搜索框（按名称或集数过滤）
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索名称或集数，如 347")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._apply_filter)
+        self.search_edit.returnPressed.connect(self._play_first_match)
+        layout.addWidget(self.search_edit)
+        
+        # 文件列表（模型 + 委托，只绘制可见行）
+        self.model = PlaylistModel(self)
+        self.model.aggregateChanged.connect(self._update_info)
+        self.filter_model = PlaylistFilterModel(self.model, self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.filter_model)
+        self.list_view.setItemDelegate(PlaylistItemDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setMouseTracking(True)
+        self.list_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.list_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.list_view.doubleClicked.connect(self._on_item_double_clicked)
+        layout.addWidget(self.list_view, 1)
+
+        # 可见行变化（滚动、过滤、列表更新）后稍等再请求封面帧
+        self._visible_timer = QTimer(self)
+        self._visible_timer.setSingleShot(True)
+        self._visible_timer.setInterval(150)
+        self._visible_timer.timeout.connect(self._emit_visible_files)
+        self.list_view.verticalScrollBar().valueChanged.connect(self._visible_timer.start)
+        self.filter_model.modelReset.connect(self._visible_timer.start)
+        self.filter_model.rowsInserted.connect(self._visible_timer.start)
         
         # 底部信息
         self.info_label = QLabel("")
         self.info_label.setStyleSheet("padding: 8px 12px;")
         layout.addWidget(self.info_label)
+
+    @property
+    def folder_path(self) -> str:
+        return self._folder_path
     
     def set_files(self, folder_path: str, files: list, current_index: int):
         """设置文件列表"""
+        if folder_path != self._folder_path:
+            self.search_edit.clear()
         self._folder_path = folder_path
         self._files = files
-        self._progress = folder_settings.get_all_progress(folder_path)
+        self._scanning = False
         self.folder_label.setText(f"📁 {folder_path}")
         self._refresh_list(current_index)
-        self.info_label.setText(f"共 {len(files)} 个视频")
+        self._update_info()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.filter_model.prepare_index()
+        self._visible_timer.start()
+
+    def _emit_visible_files(self):
+        """发出可见行中还没有封面帧的文件"""
+        if not self.isVisible():
+            return
+        count = self.filter_model.rowCount()
+        if count == 0:
+            return
+        viewport = self.list_view.viewport()
+        top = self.list_view.indexAt(QPoint(0, 0)).row()
+        bottom = self.list_view.indexAt(QPoint(0, viewport.height() - 1)).row()
+        top = max(top, 0)
+        bottom = count - 1 if bottom < 0 else bottom
+        files = []
+        for row in range(top, bottom + 1):
+            path = self._files[self.filter_model.source_row(row)]
+            if not self.model.has_poster(path):
+                files.append(path)
+        if files:
+            self.visibleFilesChanged.emit(files)
+
+    def set_poster(self, path: str, image):
+        """封面帧生成完成"""
+        self.model.set_poster(path, image)
+
+    @perf_stats.timed('ui.playlist_filter')
+    def _apply_filter(self, text: str):
+        """按输入过滤列表"""
+        self.filter_model.set_filter(text)
+        if self.filter_model.is_filtered:
+            self.list_view.scrollToTop()
+        else:
+            self._select_row(self.model.current)
+        self._update_info()
+
+    def _play_first_match(self):
+        """回车播放第一个匹配项"""
+        if self.filter_model.is_filtered and self.filter_model.rowCount() > 0:
+            self.fileSelected.emit(self.filter_model.source_row(0))
+
+    def append_files(self, files: list):
+        """追加扫描到的文件（files 已追加到共享的文件列表中）"""
+        self.model.append_files(files, *self._collect_progress(files))
+
+    def insert_file(self, row: int, file_path: str):
+        """插入单个文件（file_path 已插入到共享的文件列表中）"""
+        self.model.insert_files(row, [file_path], *self._collect_progress([file_path]))
+
+    def remove_file(self, row: int):
+        """删除单个文件（已从共享的文件列表中删除）"""
+        self.model.remove_rows(row)
+
+    def set_media_info(self, infos: dict):
+        """后台探测结果（时长、编码等）"""
+        self.model.set_media_info(infos)
+
+    def set_current_progress(self, row: int, percentage: float, duration: float):
+        """播放中实时更新当前项的进度"""
+        self.model.set_row_progress(row, percentage, duration)
+
+    def set_scanning(self, scanning: bool):
+        """设置是否仍在扫描文件夹"""
+        self._scanning = scanning
+        self._update_info()
+
+    def _update_info(self):
+        stats = self.model.aggregate()
+        text = f"共 {stats['total']} 个视频"
+        if stats['watched']:
+            text += f" · 已看 {stats['watched']} 集"
+        if stats['remaining_s'] is not None and stats['watched'] < stats['total']:
+            text += f" · 剩余约 {self._format_remaining(stats['remaining_s'])}"
+        if self._scanning:
+            text += "（扫描中…）"
+        if self.filter_model.is_filtered:
+            text = f"匹配 {self.filter_model.rowCount()} 个 · {text}"
+        self.info_label.setText(text)
+
+    @staticmethod
+    def _format_remaining(seconds: float) -> str:
+        minutes = int(seconds // 60)
+        if minutes < 60:
+            return f"{max(minutes, 1)} 分钟"
+        return f"{minutes // 60} 小时 {minutes % 60} 分"
+
+    def _collect_progress(self, files: list) -> tuple:
+        """读取文件的播放进度和时长（按文件所在文件夹保存，子文件夹中的文件分别读取）
+        返回: ({文件路径: 百分比}, {文件路径: 秒})
+        """
+        by_folder = {}
+        for f in files:
+            by_folder.setdefault(os.path.dirname(f), []).append(f)
+        progress = {}
+        durations = {}
+        for folder, folder_files in by_folder.items():
+            saved, saved_durations = folder_settings.get_progress_and_durations(folder)
+            for f in folder_files:
+                name = os.path.basename(f)
+                value = saved.get(name)
+                if value:
+                    progress[f] = value
+                duration = saved_durations.get(name)
+                if duration:
+                    durations[f] = duration
+        return progress, durations
     
     def _refresh_list(self, current_index: int):
-        """刷新列表显示"""
-        self.list_widget.clear()
-        
-        for i, file_path in enumerate(self._files):
-            filename = os.path.basename(file_path)
-            name_without_ext = os.path.splitext(filename)[0]
-            progress = self._progress.get(filename, 0)
-            is_current = (i == current_index)
-            
-            # 创建列表项
-            item = QListWidgetItem(self.list_widget)
-            item.setSizeHint(QSize(0, 50))
-            
-            # 创建自定义 widget
-            widget = PlaylistItemWidget(name_without_ext, progress, is_current)
-            self.list_widget.setItemWidget(item, widget)
-        
-        if current_index >= 0 and current_index < len(self._files):
-            self.list_widget.setCurrentRow(current_index)
-            self.list_widget.scrollToItem(self.list_widget.item(current_index))
+        """重建列表数据（只在文件列表整体变化时调用）"""
+        self.model.set_files(self._files, *self._collect_progress(self._files), current_index)
+        self._select_row(current_index)
+
+    def _select_row(self, row: int):
+        if 0 <= row < self.model.rowCount():
+            proxy_row = self.filter_model.proxy_row(row)
+            if proxy_row < 0:
+                return
+            index = self.filter_model.index(proxy_row)
+            self.list_view.setCurrentIndex(index)
+            self.list_view.scrollTo(index)
     
+    @tracer.traced('ui.playlist_update_current')
     def update_current(self, current_index: int, files: list):
-        """更新当前播放项"""
-        self._files = files
-        if self._folder_path:
-            self._progress = folder_settings.get_all_progress(self._folder_path)
-        self._refresh_list(current_index)
+        """更新当前播放项（文件列表不变时只刷新变化的行）"""
+        if files is not self._files or len(files) != self.model.rowCount():
+            self._files = files
+            self._refresh_list(current_index)
+            return
+        self.model.set_current(current_index)
+        self.model.set_progress(*self._collect_progress(self._files))
+        self._select_row(current_index)
     
-    def _on_item_double_clicked(self, item):
-        index = self.list_widget.row(item)
-        self.fileSelected.emit(index)
+    def _on_item_double_clicked(self, index: QModelIndex):
+        self.fileSelected.emit(self.filter_model.source_row(index.row()))
+
+
+class ContinueWatchingWidget(QWidget):
+    """欢迎页的"继续观看"列表（每个文件夹最近播放的一集，来自媒体库）"""
+
+    entrySelected = pyqtSignal(str, str)  # 文件夹, 文件
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedWidth(440)
+        self.setStyleSheet("background: transparent;")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+        title = QLabel("继续观看")
+        title.setStyleSheet("font-size: 15px; font-weight: bold; color: #ccc;")
+        layout.addWidget(title)
+        self._rows = QVBoxLayout()
+        self._rows.setSpacing(6)
+        layout.addLayout(self._rows)
+        self.hide()
+
+    def set_entries(self, entries: list):
+        """entries: library.recent() 的结果"""
+        while self._rows.count():
+            self._rows.takeAt(0).widget().deleteLater()
+        for entry in entries:
+            self._rows.addWidget(self._make_button(entry))
+        self.setVisible(bool(entries))
+
+    def _make_button(self, entry: dict) -> QPushButton:
+        if entry['watched']:
+            status = "已看完，继续下一集"
+        elif entry['duration']:
+            remaining = entry['duration'] * (100 - entry['progress']) / 100
+            status = f"{entry['progress']:.0f}% · 剩余约 {PlaylistWidget._format_remaining(remaining)}"
+        else:
+            status = f"{entry['progress']:.0f}%"
+        folder_name = os.path.basename(entry['folder']) or entry['folder']
+        metrics = QFontMetrics(self.font())
+        name = metrics.elidedText(os.path.splitext(entry['name'])[0], Qt.TextElideMode.ElideMiddle, 400)
+
+        btn = QPushButton(f"{name}\n{folder_name} · {status}")
+        btn.setToolTip(entry['path'])
+        btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        btn.setFixedHeight(52)
+        btn.setStyleSheet("""
+            QPushButton {
+                background: #2a2a2a;
+                border: 1px solid #3a3a3a;
+                border-radius: 8px;
+                color: #ddd;
+                font-size: 13px;
+                text-align: left;
+                padding: 4px 12px;
+            }
+            QPushButton:hover {
+                background: #333;
+                border-color: #00a1d6;
+            }
+        """)
+        btn.clicked.connect(lambda _=False, e=entry: self.entrySelected.emit(e['folder'], e['path']))
+        return btn
 
 
 class MainWindow(QMainWindow):
@@ -497,6 +1192,7 @@ class MainWindow(QMainWindow):
         self.settings_dialog = SettingsDialog(self)
         self.playlist_widget = PlaylistWidget()
         self.playlist_widget.fileSelected.connect(self._on_playlist_select)
+        self.playlist_widget.refreshRequested.connect(self._refresh_folder)
         self.video_widget = VideoWidget()
         self.video_widget.doubleClicked.connect(self._toggle_fullscreen)
         self.video_widget.rightClicked.connect(self._open_file)
@@ -516,9 +1212,36 @@ class MainWindow(QMainWindow):
         self._hide_timer = QTimer(self)
         self._hide_timer.setSingleShot(True)
         self._hide_timer.timeout.connect(self._hide_controls)
+        self._log_dir = APP_DIR  # 诊断文件（性能快照等）输出目录，与 crash.log 一致
+        self._quality_monitor = QualityMonitor(os.path.join(self._log_dir, 'quality.log'))
+        self._scanner = FolderScanner(self)
+        self._pending_folder = None  # 正在扫描、尚未找到视频的文件夹
+        self._scan_pending = False  # 是否有扫描正在进行
+        self._refreshing = False  # 正在手动刷新当前文件夹
+        self._keep_current = False  # 扫描结果到达时继续播放当前文件（刷新或从"继续观看"进入）
+        self._last_playlist_progress = 0.0  # 上次更新播放列表当前项进度的时间
 
         self.videoEndedSignal.connect(self._on_video_ended)
         self.fileLoadedSignal.connect(self._on_file_loaded)
+        self._scanner.batchFound.connect(self._on_scan_batch)
+        self._scanner.finished.connect(self._on_scan_finished)
+        self._watcher = FolderWatcher(self)
+        self._watcher.changed.connect(self._on_folder_changed)
+        self._prober = MediaProber(self)
+        self._prober.probed.connect(self._on_media_probed)
+        self._posters = PosterPool(self)
+        self._posters.ready.connect(self._on_poster_ready)
+        self.playlist_widget.visibleFilesChanged.connect(self._posters.request_visible)
+        self._intro_detector = IntroDetector(self)
+        self._intro_detector.analyzed.connect(self._on_intro_analyzed)
+        self._scene_detector = SceneDetector(self)
+        self._scene_detector.detected.connect(self._on_scenes_detected)
+        self._loudness = LoudnessScanner()
+        self._thumbnailer = Thumbnailer(self)
+        self._thumbnailer.ready.connect(self._on_thumbnail_ready)
+        self._hover_bucket = None  # 进度条悬停位置所在的时间桶
+        self._hover_started = None  # 等待缩略图的开始时间（用于统计悬停到显示的延迟）
+        library.start()
 
         self._build_ui()
         self._setup_shortcuts()
@@ -531,6 +1254,11 @@ class MainWindow(QMainWindow):
         self._timer.timeout.connect(self._update_progress)
         self._timer.start(200)
 
+        # 低频采样播放质量（每秒一次），用于质量面板和会话日志
+        self._quality_timer = QTimer(self)
+        self._quality_timer.timeout.connect(self._sample_quality)
+        self._quality_timer.start(1000)
+
         # 拖放支持
         self.setAcceptDrops(True)
 
@@ -675,6 +1403,12 @@ class MainWindow(QMainWindow):
         hint_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         welcome_layout.addWidget(hint_label)
         
+        # 继续观看（启动时直接从媒体库读取）
+        self.continue_widget = ContinueWatchingWidget()
+        self.continue_widget.entrySelected.connect(self._resume_entry)
+        welcome_layout.addWidget(self.continue_widget, 0, Qt.AlignmentFlag.AlignHCenter)
+        self._refresh_continue_watching()
+        
         self.stacked_widget.addWidget(self.welcome_page)
         
         # ===== 播放页 =====
@@ -710,6 +1444,8 @@ class MainWindow(QMainWindow):
         self.progress_slider.sliderPressed.connect(self._on_seek_start)
         self.progress_slider.sliderReleased.connect(self._on_seek_end)
         self.progress_slider.sliderMoved.connect(self._on_seek_move)
+        self.progress_slider.hovered.connect(self._on_slider_hover)
+        self.progress_slider.hoverLeft.connect(self._on_slider_leave)
         c_layout.addWidget(self.progress_slider)
 
         # 控制按钮行
@@ -826,6 +1562,12 @@ class MainWindow(QMainWindow):
         self.toast_timer.setSingleShot(True)
         self.toast_timer.timeout.connect(self.toast_label.hide)
 
+        # 播放质量面板（按 I 切换）
+        self.quality_hud = QualityHud(central)
+
+        # 进度条悬停缩略图
+        self.thumbnail_popup = ThumbnailPopup(central)
+
     def _show_toast(self, message: str, duration: int = 1500):
         """显示 Toast 提示"""
         self.toast_label.setText(message)
@@ -887,6 +1629,10 @@ class MainWindow(QMainWindow):
             (Qt.Key.Key_M, self._toggle_mute),
             (Qt.Key.Key_F, self._toggle_fullscreen),
             (Qt.Key.Key_Escape, self._exit_fullscreen),
+            (Qt.Key.Key_I, self._toggle_quality_hud),
+            (Qt.Key.Key_F5, self._refresh_folder),
+            (Qt.Key.Key_PageUp, self._prev_chapter),
+            (Qt.Key.Key_PageDown, self._next_chapter),
         ]
         for key, cb in mapping:
             act = QAction(self)
@@ -899,12 +1645,62 @@ class MainWindow(QMainWindow):
         open_act.triggered.connect(self._open_file)
         self.addAction(open_act)
 
+        # 隐藏快捷键：导出性能统计快照
+        perf_act = QAction(self)
+        perf_act.setShortcut(QKeySequence("Ctrl+Shift+P"))
+        perf_act.triggered.connect(self._dump_perf_stats)
+        self.addAction(perf_act)
+
+        # 隐藏快捷键：导出时间线追踪
+        trace_act = QAction(self)
+        trace_act.setShortcut(QKeySequence("Ctrl+Shift+T"))
+        trace_act.triggered.connect(self._export_trace)
+        self.addAction(trace_act)
+
+        # 隐藏快捷键：采样分析
+        profile_act = QAction(self)
+        profile_act.setShortcut(QKeySequence("Ctrl+Shift+F"))
+        profile_act.triggered.connect(self._start_profiling)
+        self.addAction(profile_act)
+
+    def set_log_dir(self, log_dir: str):
+        """设置诊断文件输出目录（与 crash.log 同目录）"""
+        self._log_dir = log_dir
+        self._quality_monitor.log_path = os.path.join(log_dir, 'quality.log')
+
+    def _dump_perf_stats(self):
+        """导出性能统计快照到文件和日志"""
+        if not perf_stats.enabled:
+            self._show_toast("性能统计未启用（设置环境变量 PLAYER_PERF=1）")
+            return
+        path = os.path.join(self._log_dir, f"perf_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        perf_stats.dump(path)
+        self._show_toast(f"性能统计已导出: {os.path.basename(path)}")
+
+    def _start_profiling(self):
+        """开始一次采样分析（结果写入 crash.log 同目录）"""
+        from sampling_profiler import start_profiling, DEFAULT_DURATION_S
+        path = start_profiling(self._log_dir)
+        if path:
+            self._show_toast(f"开始采样分析 {DEFAULT_DURATION_S:.0f} 秒")
+        else:
+            self._show_toast("采样分析正在进行中")
+
+    def _export_trace(self):
+        """导出时间线追踪（Chrome Trace JSON）"""
+        if not tracer.enabled:
+            self._show_toast("时间线追踪未启用")
+            return
+        path = os.path.join(self._log_dir, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        count = tracer.export(path)
+        self._show_toast(f"已导出 {count} 个追踪事件: {os.path.basename(path)}")
+
     # ========== 播放器初始化 ========== #
 
     def _init_player(self):
         try:
             wid = int(self.video_widget.winId())
-            self.player = PlayerCore(wid)
+            self.player = PlayerCore(wid, log_level=global_settings.load().mpv_log_level)
             self.player.set_position_callback(self._on_position_changed)
             self.player.set_duration_callback(self._on_duration_changed)
             # 使用 lambda 发射信号，避免跨线程直接调用
@@ -913,6 +1709,8 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"初始化播放器失败：{e}\n请确认 mpv 已正确安装。")
     
+    @perf_stats.timed('ui.on_file_loaded')
+    @tracer.traced('ui.on_file_loaded')
     def _on_file_loaded(self):
         """文件加载完成 - 在主线程中执行"""
         # 确保开始播放
@@ -922,21 +1720,39 @@ class MainWindow(QMainWindow):
             # 恢复播放进度
             if self._current_file and self.player.duration:
                 saved_progress = folder_settings.get_progress(self._current_file)
-                if saved_progress > 0 and saved_progress < 95:
+                if saved_progress > 0 and saved_progress < WATCHED_PERCENT:
                     # 有保存的进度且未播放完，跳转到该位置
                     target_pos = (saved_progress / 100) * self.player.duration
                     # 确保不会跳到片尾区域
-                    if self.player.skip_outro > 0:
-                        max_pos = self.player.duration - self.player.skip_outro - 5
-                        target_pos = min(target_pos, max_pos)
+                    outro_start = self.player.outro_start
+                    if outro_start is not None:
+                        target_pos = min(target_pos, outro_start - 5)
                     if target_pos > 0:
-                        self.player.seek_to(target_pos)
+                        with tracer.span('ui.resume_seek'):
+                            self.player.seek_to(target_pos)
                         self._show_toast(f"已恢复到 {saved_progress:.0f}%")
                 # 如果进度 >= 95%，视为已播完，从头开始（跳过片头）
-                
+
+            # 进度条悬停缩略图（加载完成后在后台预先生成）
+            if self._current_file and self.player.duration:
+                self._thumbnailer.set_file(self._current_file, self.player.duration)
+
+            # 章节刻度（片头片尾按钮显示章节得到的范围）
+            self._update_chapter_marks()
+            self._update_skip_buttons()
+
         # 更新按钮图标为暂停（表示正在播放）
         self.play_btn.setIcon(qta.icon('fa5s.pause', color='#ffffff'))
+
+    def _update_chapter_marks(self):
+        """按当前播放器的章节更新进度条上的刻度"""
+        duration = self.player.duration
+        self.progress_slider.set_chapters([
+            c["time"] / duration for c in self.player.chapters if duration and 0 < c["time"] < duration
+        ])
     
+    @perf_stats.timed('ui.on_video_ended')
+    @tracer.traced('ui.on_video_ended')
     def _on_video_ended(self):
         """视频播放结束（包括片尾跳过触发）- 在主线程中执行"""
         # 如果有文件夹列表，自动播放下一个
@@ -960,6 +1776,7 @@ class MainWindow(QMainWindow):
             "视频文件 (*.mp4 *.mkv *.avi *.mov *.wmv *.flv *.webm *.m4v *.mpeg *.mpg *.3gp);;所有文件 (*.*)"
         )
         if file_path:
+            self._cancel_scan()
             self._current_folder = None
             self._folder_files = []
             self._current_index = -1
@@ -971,28 +1788,198 @@ class MainWindow(QMainWindow):
         if folder_path:
             self._load_folder(folder_path)
     
-    def _load_folder(self, folder_path: str):
-        """加载文件夹中的视频文件"""
-        video_extensions = {'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mpeg', '.mpg', '.3gp'}
-        files = []
-        
-        for f in sorted(os.listdir(folder_path)):
-            ext = os.path.splitext(f)[1].lower()
-            if ext in video_extensions:
-                files.append(os.path.join(folder_path, f))
-        
-        if not files:
+    @perf_stats.timed('ui.load_folder')
+    @tracer.traced('ui.load_folder')
+    def _load_folder(self, folder_path: str, refresh: bool = False, start_file: str | None = None):
+        """加载文件夹中的视频文件（后台扫描，找到第一个视频即开始播放）
+        refresh: 手动刷新当前文件夹，忽略快照重新列出目录，不打断当前播放
+        start_file: 不等扫描结果，直接从该文件开始播放（播放列表随后补全）
+        """
+        self._cancel_scan()
+        self._pending_folder = folder_path
+        self._refreshing = refresh
+        self._keep_current = refresh or start_file is not None
+        self._scan_pending = True
+        self._scanner.scan(folder_path, global_settings.load().scan_depth, use_snapshot=not refresh)
+        if start_file is not None:
+            self._current_folder = folder_path
+            self._folder_files = []
+            self._current_index = -1
+            self._load_file(start_file)
+
+    def _refresh_folder(self):
+        """重新扫描当前文件夹"""
+        if not self._current_folder or self._scan_pending:
+            return
+        self._load_folder(self._current_folder, refresh=True)
+
+    def _on_scan_batch(self, generation: int, files: list):
+        """扫描到一批视频文件"""
+        if generation != self._scanner.generation:
+            return
+        if self._pending_folder is not None:
+            # 第一批结果：切换到新文件夹并开始播放
+            folder_path = self._pending_folder
+            self._pending_folder = None
+            self._current_folder = folder_path
+            self._folder_files = list(files)
+            
+            if self._keep_current:
+                # 刷新或从指定文件开始：继续播放当前文件，只更新列表
+                self._current_index = self._find_current_index(files)
+                self.playlist_widget.set_files(folder_path, self._folder_files, self._current_index)
+                self.playlist_widget.set_scanning(True)
+                return
+            
+            self._current_index = 0
+            # 更新播放列表数据（但不显示）
+            self.playlist_widget.set_files(folder_path, self._folder_files, 0)
+            self.playlist_widget.set_scanning(True)
+            
+            self._load_file(self._folder_files[0])
+        else:
+            offset = len(self._folder_files)
+            self._folder_files.extend(files)
+            self.playlist_widget.append_files(files)
+            if self._keep_current and self._current_index < 0:
+                index = self._find_current_index(files)
+                if index >= 0:
+                    self._current_index = offset + index
+                    self.playlist_widget.update_current(self._current_index, self._folder_files)
+
+    def _find_current_index(self, files: list) -> int:
+        try:
+            return files.index(self._current_file)
+        except ValueError:
+            return -1
+
+    def _on_scan_finished(self, generation: int, count: int, listing: dict):
+        """文件夹扫描完成"""
+        if generation != self._scanner.generation:
+            return
+        self._scan_pending = False
+        self.playlist_widget.set_scanning(False)
+        if self._pending_folder is not None:
+            self._pending_folder = None
             QMessageBox.warning(self, "提示", "该文件夹中没有找到视频文件")
             return
-        
-        self._current_folder = folder_path
-        self._folder_files = files
-        self._current_index = 0
-        
-        # 更新播放列表数据（但不显示）
-        self.playlist_widget.set_files(folder_path, files, 0)
-        
-        self._load_file(files[0])
+        if self._refreshing:
+            self._refreshing = False
+            self._show_toast(f"播放列表已刷新，共 {count} 个视频")
+        library.record_folder(self._current_folder, listing)
+        # 后台读取各集时长和编码信息，从当前播放项开始
+        self._prober.probe(self._folder_files, self._current_index)
+        self._posters.set_files(self._folder_files)
+        # 后台比对各集开头和结尾的音频，识别片头片尾
+        self._intro_detector.analyze(self._folder_files, self._current_index)
+        # 后台分析各集响度（下一集优先），加载时按结果调整音量增益
+        self._loudness.scan(self._folder_files, self._current_index)
+        # 扫描完成后监视文件夹变化，新下载的剧集自动加入播放列表
+        self._watcher.watch(
+            self._current_folder, global_settings.load().scan_depth, self._folder_files, listing
+        )
+
+    @tracer.traced('ui.folder_changed')
+    def _on_folder_changed(self, added: list, removed: list, renamed: list):
+        """把文件夹中的变化增量应用到播放列表，保持当前播放项不变"""
+        if not self._current_folder:
+            return
+        files = self._folder_files
+        root = self._current_folder
+
+        def remove(path: str):
+            try:
+                row = files.index(path)
+            except ValueError:
+                return
+            del files[row]
+            self.playlist_widget.remove_file(row)
+
+        for old_path, new_path in renamed:
+            remove(old_path)
+            folder_settings.rename_progress(old_path, new_path)
+            if old_path == self._current_file:
+                self._current_file = new_path
+                self.setWindowTitle(f"视频播放器 - {os.path.basename(new_path)}")
+        for path in removed:
+            remove(path)
+
+        existing = set(files)
+        keys = [path_sort_key(root, f) for f in files]
+        for path in added + [new_path for _, new_path in renamed]:
+            if path in existing:
+                continue
+            key = path_sort_key(root, path)
+            row = bisect.bisect(keys, key)
+            keys.insert(row, key)
+            files.insert(row, path)
+            existing.add(path)
+            self.playlist_widget.insert_file(row, path)
+
+        # 当前文件的位置可能变化；当前文件被删除时指向它之前的一项，"下一个"仍能接着播放
+        if self._current_file in existing:
+            self._current_index = files.index(self._current_file)
+        elif self._current_file and self._current_index >= 0:
+            self._current_index = bisect.bisect(keys, path_sort_key(root, self._current_file)) - 1
+        self.playlist_widget.update_current(self._current_index, files)
+        self._prober.add(added + [new_path for _, new_path in renamed])
+        self._posters.add(added + [new_path for _, new_path in renamed])
+        self._loudness.add(added + [new_path for _, new_path in renamed])
+        if added or renamed:
+            # 已分析过的文件直接读取缓存的指纹，只解码新文件
+            self._intro_detector.analyze(files, self._current_index)
+        library.apply_changes(root, added, removed, renamed)
+
+    def _on_media_probed(self, generation: int, infos: dict):
+        """后台探测结果到达"""
+        if generation == self._prober.generation:
+            self.playlist_widget.set_media_info(infos)
+            # 没有章节的文件在后台按场景切换生成章节
+            self._scene_detector.add({
+                path: info.get("duration", 0) for path, info in infos.items()
+                if not info.get("error") and not info.get("chapters")
+            })
+            if self._current_file in infos:
+                self._scene_detector.set_current(self._current_file)
+
+    def _on_scenes_detected(self, path: str, chapters: list):
+        """场景检测生成的章节到达"""
+        if self.player and path == self._current_file and not self.player.chapters:
+            self.player.set_chapters(chapters)
+            self._update_chapter_marks()
+
+    def _on_poster_ready(self, generation: int, path: str, image):
+        """封面帧生成完成"""
+        if generation == self._posters.generation:
+            self.playlist_widget.set_poster(path, image)
+
+    def _on_intro_analyzed(self, generation: int, results: dict):
+        """片头片尾识别结果到达：保存到各文件所在文件夹的设置"""
+        if generation != self._intro_detector.generation:
+            return
+        by_folder: dict = {}
+        for path, ranges in results.items():
+            by_folder.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = ranges
+        for folder, ranges in by_folder.items():
+            folder_settings.save_detected_ranges(os.path.join(folder, next(iter(ranges))), ranges)
+        if self.player and self._current_file in results:
+            self.player.set_detected_ranges(*folder_settings.get_detected_ranges(self._current_file))
+            self._update_skip_buttons()
+
+    def _cancel_scan(self):
+        """取消正在进行的文件夹扫描和文件夹监视"""
+        self._watcher.stop()
+        self._scanner.cancel()
+        self._prober.cancel()
+        self._posters.cancel()
+        self._intro_detector.cancel()
+        self._scene_detector.cancel()
+        self._loudness.cancel()
+        self._pending_folder = None
+        self._scan_pending = False
+        self._refreshing = False
+        self._keep_current = False
+        self.playlist_widget.set_scanning(False)
     
     def _show_playlist_panel(self):
         """显示播放列表悬浮面板"""
@@ -1022,6 +2009,8 @@ class MainWindow(QMainWindow):
         else:
             self._show_toast("已经是第一个了")
 
+    @perf_stats.timed('ui.load_file')
+    @tracer.traced('ui.load_file')
     def _load_file(self, file_path: str):
         if not self.player:
             return
@@ -1030,6 +2019,9 @@ class MainWindow(QMainWindow):
         self._save_current_progress()
         
         self._current_file = file_path
+        self._quality_monitor.begin_file(file_path)
+        if not self._current_folder:
+            library.record_file(file_path)
         self.setWindowTitle(f"视频播放器 - {os.path.basename(file_path)}")
         
         # 切换到播放页
@@ -1045,17 +2037,41 @@ class MainWindow(QMainWindow):
         f_settings = folder_settings.load_settings(file_path)
         self.player.skip_intro = f_settings.skip_intro
         self.player.skip_outro = f_settings.skip_outro
+        self.player.set_detected_ranges(*folder_settings.get_detected_ranges(file_path))
         
         # 更新UI显示
         self.speed_btn.setText(f"{g_settings.speed}x" if g_settings.speed != 1.0 else "倍速")
-        self.skip_intro_btn.setText(f"片头 {f_settings.skip_intro}s" if f_settings.skip_intro > 0 else "片头")
-        self.skip_outro_btn.setText(f"片尾 {f_settings.skip_outro}s" if f_settings.skip_outro > 0 else "片尾")
+        self._update_skip_buttons()
         
         # 更新播放列表当前项
         if self._folder_files:
             self.playlist_widget.update_current(self._current_index, self._folder_files)
-        
-        self.player.load(file_path)
+            self._prober.set_current(self._folder_files, self._current_index)
+            self._loudness.set_current(self._folder_files, self._current_index)
+        
+        # 加载期间暂停后台探测、封面帧和缩略图预生成，让出磁盘/网络
+        self._prober.hold()
+        self._posters.hold()
+        self._intro_detector.hold()
+        self._scene_detector.hold()
+        self._scene_detector.set_current(file_path)
+        self._loudness.hold()
+        self._thumbnailer.clear()
+        self._thumbnailer.hold()
+        self.progress_slider.set_chapters([])
+        # 探测时已缓存的章节（没有章节时用场景检测生成的章节）直接交给播放器，不再从 mpv 读取
+        chapters = cached_chapters(file_path)
+        info = media_cache.get(PROBE_KIND, file_path)
+        if chapters is None:
+            chapters = info.get("chapters") if info and not info.get("error") else None
+        # 响度均衡：按预先分析的结果设置本文件的音量增益（总是设置，避免沿用上一个文件的值）
+        gain = 0.0
+        if g_settings.normalize_loudness:
+            gain = volume_gain(media_cache.get(LOUDNESS_KIND, file_path), g_settings.loudness_target)
+        # 音轨、字幕和字幕延迟作为单文件选项传入，解码开始前就选中上次的轨道
+        options = folder_settings.get_track_options(file_path)
+        options['volume-gain'] = gain
+        self.player.load(file_path, chapters=chapters, options=options)
         # 按钮图标会在 _on_file_loaded 中根据实际播放状态更新
         self._show_controls()
         self._maybe_start_hide_timer()
@@ -1080,30 +2096,69 @@ class MainWindow(QMainWindow):
             self.player.stop()
             self.play_btn.setIcon(qta.icon('fa5s.play', color='#ffffff'))
             self.progress_slider.setValue(0)
+            self.progress_slider.set_chapters([])
             self.time_label.setText("00:00 / 00:00")
     
+    @tracer.traced('ui.save_current_progress')
     def _save_current_progress(self):
         """保存当前文件的播放进度"""
         try:
             if self._current_file and self.player and self.player.duration:
                 percentage = (self.player.position / self.player.duration) * 100
                 if percentage > 1:  # 只保存播放超过1%的进度
-                    folder_settings.save_progress(self._current_file, percentage)
+                    folder_settings.save_progress(self._current_file, percentage, self.player.duration)
+                    library.update_progress(
+                        self._current_file, percentage, self.player.duration, self.player.position
+                    )
         except Exception:
             # mpv 核心可能已关闭
             pass
 
     def _go_home(self):
         """返回主页"""
+        self._cancel_scan()
         self._stop()
+        self._quality_monitor.end_file()
+        self.quality_hud.hide()
+        self._thumbnailer.clear()
+        self.thumbnail_popup.hide()
+        self._posters.set_playing(False)
+        self._scene_detector.set_playing(False)
         self._current_file = None
         self._current_folder = None
         self._folder_files = []
         self._current_index = -1
         self.setWindowTitle("视频播放器")
+        self._refresh_continue_watching(flush=True)
         self.stacked_widget.setCurrentIndex(0)
         self.control_widget.hide()
 
+    def _refresh_continue_watching(self, flush: bool = False):
+        """更新欢迎页的"继续观看"列表
+        flush: 先等待刚保存的进度写入媒体库
+        """
+        if flush:
+            library.flush()
+        self.continue_widget.set_entries(library.recent(CONTINUE_WATCHING_COUNT))
+
+    def _resume_entry(self, folder: str, path: str):
+        """从"继续观看"进入：打开文件夹并直接播放该集（已看完则播放下一集），进度在加载后恢复"""
+        if not self.player:
+            return
+        if folder_settings.get_progress(path) >= WATCHED_PERCENT:
+            root, files = library.folder_files(path)
+            if root is not None:
+                files.sort(key=lambda f: path_sort_key(root, f))
+                index = files.index(path)
+                if index + 1 < len(files):
+                    path = files[index + 1]
+        if not os.path.isfile(path):
+            self._show_toast("文件已不存在")
+            return
+        if not os.path.isdir(folder):
+            folder = os.path.dirname(path)
+        self._load_folder(folder, start_file=path)
+
     def _seek_forward(self):
         if self.player:
             self.player.seek_forward()
@@ -1112,12 +2167,21 @@ class MainWindow(QMainWindow):
         if self.player:
             self.player.seek_backward()
 
+    def _next_chapter(self):
+        if self.player:
+            chapter = self.player.next_chapter()
+            self._show_toast((chapter["title"] or "下一章节") if chapter else "已经是最后一个章节了")
+
+    def _prev_chapter(self):
+        if self.player:
+            chapter = self.player.prev_chapter()
+            self._show_toast((chapter["title"] or "上一章节") if chapter else "没有上一个章节")
+
     def _replay(self):
         """重播当前视频"""
         if self.player:
             # 跳转到开头（考虑片头跳过）
-            start_pos = self.player.skip_intro if self.player.skip_intro > 0 else 0
-            self.player.seek_to(start_pos)
+            self.player.seek_to(self.player.start_position)
             self.player.play()
             self.play_btn.setIcon(qta.icon('fa5s.pause', color='#ffffff'))
             self._show_toast("重新播放")
@@ -1140,6 +2204,7 @@ class MainWindow(QMainWindow):
             pos = value / 1000 * self.player.duration
             self.time_label.setText(f"{self._format_time(pos)} / {self._format_time(self.player.duration)}")
 
+    @perf_stats.timed('ui.update_progress')
     def _update_progress(self):
         if not self.player or self._is_seeking:
             return
@@ -1148,6 +2213,44 @@ class MainWindow(QMainWindow):
             pos = self.player.position
             self.progress_slider.setValue(int(pos / duration * 1000))
             self.time_label.setText(f"{self._format_time(pos)} / {self._format_time(duration)}")
+            
+            # 低频更新播放列表中当前项的进度
+            now = time.monotonic()
+            if now - self._last_playlist_progress >= PLAYLIST_PROGRESS_INTERVAL_S:
+                self._last_playlist_progress = now
+                if 0 <= self._current_index < len(self._folder_files) \
+                        and self._folder_files[self._current_index] == self._current_file:
+                    self.playlist_widget.set_current_progress(
+                        self._current_index, pos / duration * 100, duration
+                    )
+
+    def _sample_quality(self):
+        """采样播放质量：写入采样窗口，面板可见时刷新显示"""
+        if not self.player or not self._quality_monitor.current_file:
+            return
+        try:
+            stats = self.player.sample_quality()
+            paused = self.player.is_paused
+        except Exception:
+            return
+        self._posters.set_playing(not paused)
+        self._scene_detector.set_playing(not paused)
+        if not paused:
+            self._quality_monitor.add_sample(stats)
+        if self.quality_hud.isVisible():
+            self.quality_hud.update_stats(stats)
+
+    def _toggle_quality_hud(self):
+        """切换播放质量面板"""
+        if self.quality_hud.isVisible():
+            self.quality_hud.hide()
+            return
+        if not self.player or not self._current_file:
+            return
+        self.quality_hud.update_stats(self.player.sample_quality())
+        self.quality_hud.move(10, 10)
+        self.quality_hud.show()
+        self.quality_hud.raise_()
 
     def _on_position_changed(self, position: float):
         # 实时进度更新由定时器完成
@@ -1156,6 +2259,51 @@ class MainWindow(QMainWindow):
     def _on_duration_changed(self, duration: float):
         self.time_label.setText(f"00:00 / {self._format_time(duration)}")
 
+    # ========== 进度条缩略图 ========== #
+
+    def _on_slider_hover(self, ratio: float, x: int):
+        """悬停在进度条上：显示该位置的缩略图（没有时先显示最近的一张并请求生成）"""
+        if not self.player or not self._current_file or not self.player.duration:
+            return
+        seconds = ratio * self.player.duration
+        bucket = int(seconds // BUCKET_S)
+        popup = self.thumbnail_popup
+        popup.set_time(self._format_time(seconds))
+        if bucket != self._hover_bucket:
+            self._hover_bucket = bucket
+            start = time.perf_counter()
+            image = self._thumbnailer.get(bucket)
+            if image is not None:
+                popup.set_image(image)
+                self._hover_started = None
+                if perf_stats.enabled:
+                    perf_stats.record('ui.thumbnail_hover_hit', (time.perf_counter() - start) * 1000)
+            else:
+                popup.set_image(self._thumbnailer.nearest(bucket))
+                self._hover_started = start
+                self._thumbnailer.request(bucket)
+        # 显示在鼠标上方，不超出窗口
+        parent = popup.parentWidget()
+        pos = self.progress_slider.mapTo(parent, QPoint(x, 0))
+        left = min(max(pos.x() - popup.width() // 2, 4), parent.width() - popup.width() - 4)
+        popup.move(left, pos.y() - popup.height() - 8)
+        popup.raise_()
+        popup.show()
+
+    def _on_slider_leave(self):
+        self.thumbnail_popup.hide()
+        self._hover_bucket = None
+        self._hover_started = None
+
+    def _on_thumbnail_ready(self, key: str, bucket: int, image):
+        """后台生成的缩略图：仍悬停在该位置时显示，并记录悬停到显示的延迟"""
+        if key != self._thumbnailer.key or bucket != self._hover_bucket:
+            return
+        self.thumbnail_popup.set_image(image)
+        if self._hover_started is not None and perf_stats.enabled:
+            perf_stats.record('ui.thumbnail_hover_miss', (time.perf_counter() - self._hover_started) * 1000)
+            self._hover_started = None
+
     # ========== 音量 ========== #
 
     def _on_volume_changed(self, value: int):
@@ -1179,11 +2327,14 @@ class MainWindow(QMainWindow):
             self.playlist_widget.hide()
         else:
             if self._folder_files:
-                self.playlist_widget.set_files(
-                    self._current_folder or "",
-                    self._folder_files,
-                    self._current_index
-                )
+                if self.playlist_widget.folder_path == (self._current_folder or ""):
+                    self.playlist_widget.update_current(self._current_index, self._folder_files)
+                else:
+                    self.playlist_widget.set_files(
+                        self._current_folder or "",
+                        self._folder_files,
+                        self._current_index
+                    )
             self._update_playlist_geometry()
             self.playlist_widget.show()
             self.playlist_widget.raise_()
@@ -1277,6 +2428,8 @@ class MainWindow(QMainWindow):
                 if track['id'] == track_id:
                     lang = track['lang'] or ""
                     self.audio_btn.setText(f"音轨 {lang}" if lang else "音轨")
+                    # 记住选择（同一文件夹的其他文件按语言选择）
+                    self._save_track_choice(aid=track_id, alang=lang)
                     break
 
     def _show_subtitle_menu(self):
@@ -1356,15 +2509,22 @@ class MainWindow(QMainWindow):
             else:
                 # 选择字幕轨道
                 self.player.set_subtitle_track(data)
-                # 更新按钮显示
+                # 更新按钮显示并记住选择
                 if data == 0:
                     self.subtitle_btn.setText("字幕")
+                    self._save_track_choice(sid="no")
                 else:
                     for track in tracks:
                         if track['id'] == data:
                             lang = track['lang'] or ""
                             self.subtitle_btn.setText(f"字幕 {lang}" if lang else "字幕")
+                            # 外挂字幕重新打开时不会自动加载，只记住语言
+                            self._save_track_choice(sid=None if track['external'] else data, slang=lang)
                             break
+
+    def _save_track_choice(self, **choice):
+        if self._current_file:
+            folder_settings.save_track_choice(self._current_file, **choice)
     
     def _load_external_subtitle(self):
         """加载外部字幕文件"""
@@ -1395,6 +2555,7 @@ class MainWindow(QMainWindow):
         )
         if ok:
             self.player.subtitle_delay = value
+            self._save_track_choice(sub_delay=value)
             self._show_toast(f"字幕延迟: {value:+.1f}s")
 
     def _show_settings(self):
@@ -1432,7 +2593,7 @@ class MainWindow(QMainWindow):
         if ok:
             self.player.skip_intro = value
             folder_settings.update_settings(self._current_file, skip_intro=value)
-            self.skip_intro_btn.setText(f"片头 {value}s" if value > 0 else "片头")
+            self._update_skip_buttons()
     
     def _set_skip_outro(self):
         """设置跳过片尾时间 - 默认值为距离视频结尾的时间"""
@@ -1452,7 +2613,19 @@ class MainWindow(QMainWindow):
         if ok:
             self.player.skip_outro = value
             folder_settings.update_settings(self._current_file, skip_outro=value)
-            self.skip_outro_btn.setText(f"片尾 {value}s" if value > 0 else "片尾")
+            self._update_skip_buttons()
+
+    def _update_skip_buttons(self):
+        """片头片尾按钮：章节标题 > 手动设置的秒数 > 音频识别的结果"""
+        sources = {'chapter': "章节", 'audio': "自动"}
+        for button, label, seconds, source in (
+            (self.skip_intro_btn, "片头", self.player.skip_intro, self.player.intro_source),
+            (self.skip_outro_btn, "片尾", self.player.skip_outro, self.player.outro_source),
+        ):
+            if source == 'chapter' or (source and seconds == 0):
+                button.setText(f"{label} {sources[source]}")
+            else:
+                button.setText(f"{label} {seconds}s" if seconds > 0 else label)
 
     # ========== 全屏 ========== #
 
@@ -1488,6 +2661,7 @@ class MainWindow(QMainWindow):
             if os.path.isdir(path):
                 self._load_folder(path)
             elif os.path.isfile(path):
+                self._cancel_scan()
                 self._current_folder = None
                 self._folder_files = []
                 self._current_index = -1
@@ -1581,7 +2755,20 @@ class MainWindow(QMainWindow):
             self.playlist_widget.raise_()
 
     def closeEvent(self, event):
+        self._scanner.cancel()
+        self._watcher.stop()
+        self._prober.stop()
+        self._posters.stop()
+        self._intro_detector.stop()
+        self._scene_detector.stop()
+        self._loudness.stop()
+        self._thumbnailer.stop()
         self._save_current_progress()
+        library.close()
+        self._quality_monitor.end_file()
+        self._quality_timer.stop()
+        if perf_stats.enabled:
+            perf_stats.dump()
         self._timer.stop()
         self._hide_timer.stop()
         if self.player:
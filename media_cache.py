@@ -0,0 +1,133 @@
+"""
+媒体分析结果缓存
+- 按 (路径, 大小, 修改时间) 缓存探测信息等分析结果，文件被替换或修改后自动失效
+- 保存在 settings/media_cache.db（SQLite，WAL 模式），不同类型的结果用 kind 区分
+- 结果以 JSON 保存；可在多个后台线程中使用
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+from folder_settings import SETTINGS_DIR, ensure_settings_dir
+
+
+MEDIA_CACHE_PATH = os.path.join(SETTINGS_DIR, "media_cache.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, path)
+) WITHOUT ROWID;
+"""
+
+
+def file_stat(path: str) -> Optional[tuple]:
+    """缓存键中的文件状态
+    返回: (大小, 修改时间)；文件不存在时返回 None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class MediaCache:
+    """媒体分析结果缓存"""
+
+    def __init__(self, path: str = MEDIA_CACHE_PATH):
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """首次使用时打开数据库（调用方持有锁）"""
+        if self._conn is None:
+            try:
+                ensure_settings_dir()
+                conn = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute("PRAGMA synchronous = NORMAL")
+                conn.executescript(_SCHEMA)
+                self._conn = conn
+            except sqlite3.Error as e:
+                logging.error(f"打开媒体缓存失败: {e}")
+        return self._conn
+
+    def get(self, kind: str, path: str, stat: Optional[tuple] = None) -> Optional[dict]:
+        """读取缓存；文件已变化或没有缓存时返回 None
+        stat: 已知的 (大小, 修改时间)，省略时读取文件状态
+        """
+        stat = stat or file_stat(path)
+        if stat is None:
+            return None
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT size, mtime_ns, data FROM entries WHERE kind = ? AND path = ?", (kind, path)
+            ).fetchone()
+        if row is None or (row[0], row[1]) != tuple(stat):
+            return None
+        try:
+            return json.loads(row[2])
+        except ValueError:
+            return None
+
+    def put(self, kind: str, path: str, data: dict, stat: Optional[tuple] = None):
+        """写入缓存"""
+        stat = stat or file_stat(path)
+        if stat is None:
+            return
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries(kind, path, size, mtime_ns, data) VALUES (?, ?, ?, ?, ?)",
+                    (kind, path, stat[0], stat[1], text),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"写入媒体缓存失败: {e}")
+
+    def invalidate(self, path: str):
+        """删除文件的全部缓存"""
+        with self._lock:
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+                conn.commit()
+
+    def clear(self) -> int:
+        """删除全部缓存
+        返回: 删除的条数
+        """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return 0
+            count = conn.execute("DELETE FROM entries").rowcount
+            conn.commit()
+            conn.execute("VACUUM")
+            return count
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局实例
+media_cache = MediaCache()
@@ -0,0 +1,286 @@
+"""
+后台媒体探测
+- 用无界面 mpv（不选择任何轨道、不缓存、暂停状态）只读取文件头：
+  时长、分辨率、编码、音轨/字幕轨和章节
+- 结果按 (路径, 大小, 修改时间) 缓存（见 media_cache.py），再次打开文件夹时直接读取；
+  无法打开或超时的文件不缓存（可能只是磁盘休眠或网络共享暂时较慢），下次打开文件夹时重新探测
+- 从当前播放项开始探测，后面的剧集优先；切换播放项时按新的位置重新排序
+- 播放器加载文件后暂停探测一段时间，不与播放争抢磁盘和网络
+- 打开其他文件夹时取消，过期结果通过探测编号丢弃
+"""
+import time
+import logging
+import threading
+from typing import Optional
+
+import mpv
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from media_cache import media_cache, file_stat
+from mpv_log import MpvLogRouter
+from tracing import tracer
+
+
+PROBE_KIND = "probe"
+PROBE_WORKERS = 2  # 同时探测的文件数（每个工作线程一个 mpv 实例）
+PROBE_TIMEOUT_S = 10.0  # 单个文件的探测超时
+HOLD_AFTER_LOAD_S = 3.0  # 播放器加载文件后暂停探测的时间
+EMIT_BATCH = 200  # 缓存命中时合并发送的条数
+
+
+def probe_order(count: int, current: int) -> list:
+    """探测顺序：当前项，然后向后两项、向前一项交替（后面的剧集更可能接着播放）"""
+    current = min(max(current, 0), max(count - 1, 0))
+    return sorted(range(count), key=lambda i: i - current if i >= current else 2 * (current - i))
+
+
+def _track_info(track: dict) -> dict:
+    info = {"id": track.get("id", 0), "codec": track.get("codec", "")}
+    for key in ("lang", "title"):
+        if track.get(key):
+            info[key] = track[key]
+    if track.get("external"):
+        info["external"] = True
+    return info
+
+
+class _ProbeSession:
+    """一个工作线程使用的无界面 mpv 实例"""
+
+    def __init__(self):
+        self._loaded = threading.Event()
+        self._ended = threading.Event()
+        self._log_router = MpvLogRouter('error')
+        self._mpv = mpv.MPV(
+            log_handler=self._log_router,
+            loglevel=self._log_router.level,
+            vo='null',
+            ao='null',
+            vid='no',
+            aid='no',
+            sid='no',
+            pause=True,
+            idle=True,
+            osc=False,
+            cache='no',
+            demuxer_readahead_secs=0,
+            input_default_bindings=False,
+            load_scripts=False,
+            ytdl=False,
+        )
+
+        @self._mpv.event_callback('file-loaded')
+        def on_loaded(_event):
+            self._loaded.set()
+
+        @self._mpv.event_callback('end-file')
+        def on_ended(_event):
+            self._ended.set()
+
+    def probe(self, path: str) -> dict:
+        """读取文件信息；无法打开时返回 {"error": True}"""
+        self._loaded.clear()
+        self._ended.clear()
+        self._mpv.play(path)
+        deadline = time.monotonic() + PROBE_TIMEOUT_S
+        while not self._loaded.is_set() and not self._ended.is_set():
+            if time.monotonic() > deadline:
+                logging.warning(f"探测超时 {path}")
+                break
+            self._loaded.wait(0.05)
+        info = {"error": True}
+        if self._loaded.is_set():
+            info = self._read_info()
+        # 等待文件关闭，避免本次的 end-file 事件影响下一个文件
+        self._ended.clear()
+        self._mpv.command('stop')
+        self._ended.wait(1.0)
+        return info
+
+    def _read_info(self) -> dict:
+        m = self._mpv
+        info = {"duration": m.duration or 0}
+        audio, subs = [], []
+        for track in m.track_list or []:
+            kind = track.get("type")
+            if kind == "video" and "video_codec" not in info and not track.get("albumart"):
+                info["video_codec"] = track.get("codec", "")
+                if track.get("demux-w") and track.get("demux-h"):
+                    info["width"] = track["demux-w"]
+                    info["height"] = track["demux-h"]
+            elif kind == "audio":
+                audio.append(_track_info(track))
+            elif kind == "sub":
+                subs.append(_track_info(track))
+        info["audio_tracks"] = audio
+        info["subtitle_tracks"] = subs
+        info["chapters"] = [
+            {"time": c.get("time", 0), "title": c.get("title", "")} for c in m.chapter_list or []
+        ]
+        return info
+
+    def close(self):
+        try:
+            self._mpv.terminate()
+        except Exception:
+            pass
+        self._log_router.close()
+
+
+def describe(info: dict) -> str:
+    """一行文字概括探测结果（用于悬停提示）"""
+    if not info or info.get("error"):
+        return ""
+    parts = []
+    if info.get("width"):
+        parts.append(f"{info['width']}×{info['height']}")
+    codecs = [info.get("video_codec", "")]
+    if info.get("audio_tracks"):
+        codecs.append(info["audio_tracks"][0].get("codec", ""))
+    codecs = [c for c in codecs if c]
+    if codecs:
+        parts.append(" / ".join(codecs))
+    if len(info.get("audio_tracks", ())) > 1:
+        parts.append(f"{len(info['audio_tracks'])} 条音轨")
+    if info.get("subtitle_tracks"):
+        parts.append(f"{len(info['subtitle_tracks'])} 条字幕")
+    if info.get("chapters"):
+        parts.append(f"{len(info['chapters'])} 个章节")
+    return " · ".join(parts)
+
+
+class MediaProber(QObject):
+    """后台探测播放列表中的视频"""
+
+    probed = pyqtSignal(int, dict)  # 探测编号, {文件路径: 信息}
+
+    def __init__(self, parent=None, workers: int = PROBE_WORKERS):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: list = []  # 待探测的文件（已按优先级排序）
+        self._hold_until = 0.0
+        self._stopping = False
+        self._workers = workers
+        self._threads: list = []
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def probe(self, files: list, current: int) -> int:
+        """探测文件列表（会取消上一次探测）
+        返回: 本次探测编号
+        """
+        with self._cond:
+            self._generation += 1
+            self._pending = [files[i] for i in probe_order(len(files), current)]
+            self._cond.notify_all()
+        self._start_workers()
+        return self._generation
+
+    def add(self, files: list):
+        """追加新出现的文件（文件夹监视发现的新文件，不影响已在队列中的顺序）"""
+        if not files:
+            return
+        with self._cond:
+            self._pending.extend(files)
+            self._cond.notify_all()
+        self._start_workers()
+
+    def set_current(self, files: list, current: int):
+        """当前播放项变化：剩余文件按新的位置重新排序（已发出的结果仍然有效）"""
+        with self._cond:
+            if not self._pending:
+                return
+            remaining = set(self._pending)
+            self._pending = [files[i] for i in probe_order(len(files), current) if files[i] in remaining]
+
+    def hold(self, seconds: float = HOLD_AFTER_LOAD_S):
+        """暂停探测一段时间（播放器加载文件时调用）"""
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def cancel(self):
+        """取消尚未开始的探测"""
+        with self._cond:
+            self._generation += 1
+            self._pending = []
+
+    def stop(self):
+        """停止工作线程并关闭 mpv 实例"""
+        with self._cond:
+            self._stopping = True
+            self._pending = []
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads = []
+
+    def _start_workers(self):
+        if self._threads or self._stopping:
+            return
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, name=f'media-probe-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> Optional[tuple]:
+        """取出下一个文件；没有任务时等待，停止时返回 None"""
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                wait = self._hold_until - time.monotonic()
+                if self._pending and wait <= 0:
+                    return self._generation, self._pending.pop(0)
+                self._cond.wait(wait if self._pending else None)
+
+    def _run(self):
+        session: Optional[_ProbeSession] = None
+        hits: dict = {}
+        hits_generation = self._generation
+        try:
+            while True:
+                with self._cond:
+                    idle = not self._pending
+                if hits and (idle or len(hits) >= EMIT_BATCH):
+                    self.probed.emit(hits_generation, hits)
+                    hits = {}
+                item = self._next()
+                if item is None:
+                    break
+                generation, path = item
+                if hits and generation != hits_generation:
+                    hits = {}
+                hits_generation = generation
+                stat = file_stat(path)
+                if stat is None:
+                    continue
+                info = media_cache.get(PROBE_KIND, path, stat)
+                if info is not None and not info.get("error"):  # 旧版本缓存的失败结果重新探测
+                    hits[path] = info
+                    continue
+                if hits:
+                    self.probed.emit(generation, hits)
+                    hits = {}
+                try:
+                    if session is None:
+                        session = _ProbeSession()
+                    with tracer.span('probe.file', cat='probe'):
+                        info = session.probe(path)
+                except Exception as e:
+                    # 单个文件出错不影响后续文件；mpv 实例可能已不可用，下一个文件重新创建
+                    logging.error(f"媒体探测失败 {path}: {e}")
+                    if session is not None:
+                        session.close()
+                        session = None
+                    continue
+                if not info.get("error"):
+                    media_cache.put(PROBE_KIND, path, info, stat)
+                self.probed.emit(generation, {path: info})
+        except Exception as e:
+            logging.error(f"媒体探测失败: {e}")
+        finally:
+            if session is not None:
+                session.close()
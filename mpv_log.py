@@ -0,0 +1,118 @@
+"""
+libmpv 日志转发
+- mpv 事件线程只做级别过滤、按模块限流和非阻塞入队
+- 后台线程从有界队列取出消息写入 Python logging（logger 名为 "mpv"）
+- 队列溢出或限流丢弃的消息会计数，并定期写入日志
+"""
+import time
+import queue
+import logging
+import threading
+
+
+# mpv 日志级别 -> Python logging 级别
+MPV_LEVELS = {
+    'fatal': logging.CRITICAL,
+    'error': logging.ERROR,
+    'warn': logging.WARNING,
+    'info': logging.INFO,
+    'status': logging.INFO,
+    'v': logging.DEBUG,
+    'debug': logging.DEBUG,
+    'trace': logging.DEBUG,
+}
+
+# 队列容量（条）
+QUEUE_SIZE = 1000
+
+# 每个模块的限流参数：突发上限和每秒补充的条数
+RATE_BURST = 20
+RATE_PER_SECOND = 5.0
+
+# 丢弃统计的汇报间隔（秒）
+DROP_REPORT_INTERVAL = 10.0
+
+
+class MpvLogRouter:
+    """作为 mpv.MPV(log_handler=...) 使用的日志转发器"""
+
+    def __init__(self, level: str = 'warn', queue_size: int = QUEUE_SIZE):
+        self.level = level if level in MPV_LEVELS else 'warn'
+        self._min_level = MPV_LEVELS[self.level]
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._logger = logging.getLogger('mpv')
+        # 令牌桶：{模块: [剩余令牌, 上次补充时间]}，只在 mpv 事件线程中访问
+        self._buckets: dict[str, list] = {}
+        # 丢弃计数（事件线程写，转发线程读）
+        self.dropped_overflow = 0
+        self.dropped_rate_limited: dict[str, int] = {}
+        self._reported_overflow = 0
+        self._reported_rate_limited: dict[str, int] = {}
+        self._thread = threading.Thread(target=self._run, name='mpv-log', daemon=True)
+        self._thread.start()
+
+    def __call__(self, loglevel: str, component: str, message: str):
+        """mpv 事件线程回调：不能阻塞，不做任何 I/O"""
+        level = MPV_LEVELS.get(loglevel, logging.INFO)
+        if level < self._min_level:
+            return
+        if not self._take_token(component):
+            self.dropped_rate_limited[component] = self.dropped_rate_limited.get(component, 0) + 1
+            return
+        try:
+            self._queue.put_nowait((level, component, message))
+        except queue.Full:
+            self.dropped_overflow += 1
+
+    def _take_token(self, component: str) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(component)
+        if bucket is None:
+            bucket = self._buckets[component] = [RATE_BURST, now]
+        tokens = min(RATE_BURST, bucket[0] + (now - bucket[1]) * RATE_PER_SECOND)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _run(self):
+        last_report = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=DROP_REPORT_INTERVAL)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                level, component, message = item
+                self._logger.log(level, f"[{component}] {message.rstrip()}")
+            now = time.monotonic()
+            if now - last_report >= DROP_REPORT_INTERVAL:
+                last_report = now
+                self._report_drops()
+        self._report_drops()
+
+    def _report_drops(self):
+        """汇报自上次以来新增的丢弃数量"""
+        overflow = self.dropped_overflow - self._reported_overflow
+        if overflow > 0:
+            self._logger.warning(f"mpv 日志队列溢出，丢弃 {overflow} 条")
+            self._reported_overflow += overflow
+        for component, count in list(self.dropped_rate_limited.items()):
+            new = count - self._reported_rate_limited.get(component, 0)
+            if new > 0:
+                self._logger.warning(f"mpv 模块 [{component}] 日志过多，限流丢弃 {new} 条")
+                self._reported_rate_limited[component] = count
+
+    def close(self, timeout: float = 1.0):
+        """停止转发线程（会先写完队列中剩余的消息）"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
@@ -0,0 +1,168 @@
+"""
+性能埋点
+- 按调用点统计调用次数、累计耗时和耗时直方图
+- 通过环境变量 PLAYER_PERF=1 或全局设置 perf_enabled 启用
+- 未启用时每次调用只多一次布尔判断
+- 可按需导出快照到文件或日志
+"""
+import os
+import time
+import json
+import bisect
+import logging
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+
+# 直方图桶上界（毫秒），最后一个桶收集超过 5 秒的调用
+BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# mpv 事件线程上的回调超过该耗时视为过慢（毫秒）
+SLOW_CALLBACK_MS = 20.0
+
+_NULL_CONTEXT = nullcontext()
+
+
+class CallSiteStats:
+    """单个调用点的统计数据"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "slow", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0  # 事件线程上的慢回调次数
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def percentile(self, p: float) -> float:
+        """根据直方图估算分位数（返回所在桶的上界）"""
+        if not self.count:
+            return 0.0
+        target = self.count * p
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "slow": self.slow,
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class PerfStats:
+    """性能统计收集器（线程安全）"""
+
+    def __init__(self):
+        self.enabled = os.environ.get("PLAYER_PERF", "") not in ("", "0")
+        self.slow_threshold_ms = SLOW_CALLBACK_MS
+        self._lock = threading.Lock()
+        self._sites: dict[str, CallSiteStats] = {}
+        self._started_at = time.time()
+
+    def enable(self, enabled: bool = True):
+        """启用/停用统计"""
+        self.enabled = enabled
+
+    def reset(self):
+        """清空已收集的数据"""
+        with self._lock:
+            self._sites.clear()
+            self._started_at = time.time()
+
+    def record(self, name: str, elapsed_ms: float, event_thread: bool = False):
+        """记录一次调用耗时"""
+        slow = event_thread and elapsed_ms >= self.slow_threshold_ms
+        with self._lock:
+            site = self._sites.get(name)
+            if site is None:
+                site = self._sites[name] = CallSiteStats()
+            site.count += 1
+            site.total_ms += elapsed_ms
+            if elapsed_ms > site.max_ms:
+                site.max_ms = elapsed_ms
+            site.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+            if slow:
+                site.slow += 1
+        if slow:
+            logging.warning(f"mpv 事件线程回调过慢: {name} 耗时 {elapsed_ms:.1f}ms")
+
+    def timed(self, name: str, event_thread: bool = False) -> Callable:
+        """装饰器：统计函数耗时
+        Args:
+            name: 调用点名称
+            event_thread: 是否运行在 mpv 事件线程上（超时会被标记为慢回调）
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, (time.perf_counter() - start) * 1000, event_thread)
+            return wrapper
+        return decorator
+
+    def measure(self, name: str, event_thread: bool = False):
+        """上下文管理器：统计代码块耗时"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._measure(name, event_thread)
+
+    @contextmanager
+    def _measure(self, name: str, event_thread: bool):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, event_thread)
+
+    def snapshot(self) -> dict:
+        """获取当前统计快照"""
+        with self._lock:
+            sites = {name: site.to_dict() for name, site in self._sites.items()}
+        return {
+            "started_at": self._started_at,
+            "captured_at": time.time(),
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "sites": sites,
+        }
+
+    def dump(self, path: Optional[str] = None) -> dict:
+        """导出快照：总是写入日志，指定 path 时同时写入 JSON 文件"""
+        snap = self.snapshot()
+        sites = sorted(snap["sites"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        logging.info(f"性能统计快照（{len(sites)} 个调用点）")
+        for name, s in sites:
+            logging.info(
+                f"  {name}: {s['count']} 次, 共 {s['total_ms']:.1f}ms, "
+                f"均值 {s['mean_ms']:.2f}ms, p99 {s['p99_ms']}ms, 最大 {s['max_ms']:.1f}ms"
+                + (f", 慢回调 {s['slow']} 次" if s["slow"] else "")
+            )
+        if path:
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(snap, f, indent=2, ensure_ascii=False)
+            except IOError as e:
+                logging.error(f"写入性能统计失败: {e}")
+        return snap
+
+
+# 全局实例
+perf_stats = PerfStats()
@@ -0,0 +1,125 @@
+"""
+播放质量监控
+- 保存当前文件最近一段时间的质量采样（丢帧、音画同步、缓存）
+- 切换文件时把采样窗口和诊断结论追加到会话日志 quality.log（JSON Lines）
+"""
+import os
+import json
+import time
+import logging
+from collections import deque
+from typing import Optional
+
+
+# 采样窗口长度（按每秒一次采样，约 2 分钟）
+WINDOW_SIZE = 120
+
+# 日志超过该大小时轮转（保留一个备份）
+MAX_LOG_BYTES = 2 * 1024 * 1024
+
+# 缓存低于该时长（秒）视为磁盘/网络读取跟不上
+LOW_CACHE_SECONDS = 1.0
+
+# 音画不同步超过该值（秒）视为异常
+AVSYNC_LIMIT = 0.1
+
+
+class QualityMonitor:
+    """播放质量采样窗口"""
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self._file: Optional[str] = None
+        self._started_at = 0.0
+        self._samples: deque = deque(maxlen=WINDOW_SIZE)
+        self._low_cache_count = 0
+        self._max_avsync = 0.0
+        self._last_stats: dict = {}
+
+    @property
+    def current_file(self) -> Optional[str]:
+        return self._file
+
+    def begin_file(self, file_path: str):
+        """开始记录新文件（会先结束上一个文件）"""
+        self.end_file()
+        self._file = file_path
+        self._started_at = time.time()
+        self._samples.clear()
+        self._low_cache_count = 0
+        self._max_avsync = 0.0
+        self._last_stats = {}
+
+    def add_sample(self, stats: dict):
+        """添加一次采样（来自 PlayerCore.sample_quality）"""
+        if not self._file:
+            return
+        avsync = stats.get('avsync')
+        if avsync is not None:
+            self._max_avsync = max(self._max_avsync, abs(avsync))
+        cache = stats.get('demuxer-cache-duration')
+        if cache is not None and cache < LOW_CACHE_SECONDS:
+            self._low_cache_count += 1
+        self._samples.append({
+            't': round(time.time() - self._started_at, 1),
+            'drop': stats.get('frame-drop-count'),
+            'dec_drop': stats.get('decoder-frame-drop-count'),
+            'avsync': round(avsync, 4) if avsync is not None else None,
+            'fps': round(stats['estimated-vf-fps'], 2) if stats.get('estimated-vf-fps') else None,
+            'cache_s': round(cache, 1) if cache is not None else None,
+            'cache_bytes': stats.get('demuxer-cache-bytes'),
+        })
+        self._last_stats = stats
+
+    def summary(self) -> dict:
+        """汇总当前文件的质量情况，并给出可能的卡顿原因"""
+        last = self._samples[-1] if self._samples else {}
+        stats = self._last_stats
+        drops = last.get('drop') or 0
+        dec_drops = last.get('dec_drop') or 0
+        causes = []
+        if dec_drops > 0:
+            causes.append('decoder')
+        if drops > 0:
+            causes.append('output')
+        if self._low_cache_count > 0:
+            causes.append('io')
+        if self._max_avsync > AVSYNC_LIMIT:
+            causes.append('avsync')
+        return {
+            'file': self._file,
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._started_at)),
+            'samples': len(self._samples),
+            'frame_drops': drops,
+            'decoder_frame_drops': dec_drops,
+            'max_avsync': round(self._max_avsync, 4),
+            'low_cache_samples': self._low_cache_count,
+            'container_fps': stats.get('container-fps'),
+            'video_codec': stats.get('video-codec'),
+            'audio_codec': stats.get('audio-codec-name'),
+            'hwdec': stats.get('hwdec-current'),
+            'causes': causes,
+        }
+
+    def end_file(self):
+        """结束当前文件，将采样窗口写入会话日志"""
+        if not self._file:
+            return
+        if self._samples:
+            record = self.summary()
+            record['window'] = list(self._samples)
+            self._append(record)
+            if record['causes']:
+                logging.warning(f"播放质量异常 {os.path.basename(self._file)}: {', '.join(record['causes'])}")
+        self._file = None
+        self._samples.clear()
+        self._last_stats = {}
+
+    def _append(self, record: dict):
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+                os.replace(self.log_path, self.log_path + '.1')
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logging.error(f"写入播放质量日志失败: {e}")
@@ -2,31 +2,78 @@
 视频播放器核心模块
 基于 mpv 播放器
 """
+import re
 import mpv
 from typing import Callable, Optional
 
+from perf_stats import perf_stats
+from tracing import tracer
+from mpv_log import MpvLogRouter
+
+
+INTRO_LEAD_S = 3.0  # 自动识别的片头在该时间之前开始时，加载后直接跳到片头结束
+OUTRO_TAIL_S = 10.0  # 自动识别的片尾在距结尾该时间之内结束时，进入片尾即视为播放结束
+RANGE_ENTER_S = 2.0  # 播放位置进入片段开头这段时间内才跳过（拖动到片段中间时不跳过）
+CHAPTER_BACK_S = 3.0  # "上一章节"：已在本章节开头这段时间内时跳到上一章节，否则回到本章节开头
+
+# 章节标题（如 "Opening"、"OP1"、"Ending"、"ED"）
+INTRO_CHAPTER = re.compile(r"^\s*(op|opening|intro(duction)?|オープニング|片头|片頭|主题曲)(?![a-z])", re.IGNORECASE)
+OUTRO_CHAPTER = re.compile(r"^\s*(ed|ending|outro|(end |closing )?credits|エンディング|片尾)(?![a-z])", re.IGNORECASE)
+
+
+def chapter_ranges(chapters: list, duration: float) -> tuple:
+    """根据章节标题得到片头、片尾范围（章节一直持续到下一章节开始）
+    返回: (片头, 片尾)，各为 (开始秒, 结束秒) 或 None
+    """
+    intro = outro = None
+    for i, chapter in enumerate(chapters):
+        title = chapter.get("title") or ""
+        start = chapter.get("time") or 0
+        end = (chapters[i + 1].get("time") or 0) if i + 1 < len(chapters) else duration
+        if not end or end <= start:
+            continue
+        if intro is None and INTRO_CHAPTER.match(title):
+            intro = (start, end)
+        elif OUTRO_CHAPTER.match(title):
+            outro = (start, end)
+    return intro, outro
+
 
 class PlayerCore:
     """MPV播放器核心封装类"""
     
-    def __init__(self, wid: int = None):
+    def __init__(self, wid: int = None, log_level: str = 'warn', headless: bool = False):
         """
         初始化播放器
         Args:
             wid: 窗口ID，用于嵌入到GUI中
+            log_level: 转发到 Python logging 的 mpv 日志级别（fatal/error/warn/info/v/debug）
+            headless: 无界面模式（空视频/音频输出），用于基准测试和后台任务
         """
+        if headless:
+            options = dict(vo='null', ao='null', input_default_bindings=False)
+        else:
+            options = dict(wid=wid, input_default_bindings=True, input_vo_keyboard=True)
+        # mpv 日志经有界队列转发到 crash.log，事件线程不会阻塞在文件 I/O 上
+        self._log_router = MpvLogRouter(log_level)
         self.player = mpv.MPV(
-            wid=wid,
-            input_default_bindings=True,
-            input_vo_keyboard=True,
+            log_handler=self._log_router,
+            loglevel=self._log_router.level,
             osc=False,  # 禁用默认OSC，使用自定义控制
             keep_open=True,
             idle=True,
+            **options,
         )
         
         # 播放设置
         self._skip_intro = 0  # 跳过片头时间（秒）
         self._skip_outro = 0  # 跳过片尾时间（秒）
+        self._intro_range: Optional[tuple] = None  # 自动识别的片头 (开始, 结束)，手动设置了跳过片头时不使用
+        self._outro_range: Optional[tuple] = None  # 自动识别的片尾 (开始, 结束)
+        self._ranges_skipped: set = set()  # 本次加载已跳过的片段（每段只跳一次）
+        self._chapters: Optional[list] = None  # 当前文件的章节 [{time, title}]，None 表示尚未读取
+        self._chapter_intro: Optional[tuple] = None  # 由章节标题得到的片头（优先于手动设置）
+        self._chapter_outro: Optional[tuple] = None
         self._seek_step = 10  # 快进/快退步长（秒）
         self._speed = 1.0  # 播放速度
         
@@ -36,18 +83,22 @@ class PlayerCore:
         self._on_eof_reached: Optional[Callable] = None
         self._on_file_loaded: Optional[Callable] = None
         self._is_loading = False  # 标记是否正在加载新文件
+        self._quality: dict = {}  # 播放质量指标的最新值（由观察器更新）
+        self._load_started_us: Optional[float] = None  # 本次加载开始时间（用于追踪首帧耗时）
         
         # 注册事件观察器
         self._setup_observers()
+        self._setup_quality_observers()
     
     def _setup_observers(self):
         """设置属性观察器"""
         @self.player.property_observer('time-pos')
+        @perf_stats.timed('player.time_observer', event_thread=True)
         def time_observer(_name, value):
             if value is not None and self._on_position_changed:
                 # 检查是否需要跳过片尾
                 duration = self.duration
-                if duration and self._skip_outro > 0 and not self._is_loading:
+                if duration and self._skip_outro > 0 and self._chapter_outro is None and not self._is_loading:
                     # 确保已经播放了至少10秒或10%，避免刚加载就触发
                     min_played = max(10, duration * 0.1)
                     if value >= min_played and value >= duration - self._skip_outro:
@@ -55,34 +106,66 @@ class PlayerCore:
                         if self._on_eof_reached:
                             self._on_eof_reached()
                         return
+                if not self._is_loading and self._skip_detected_range(value, duration):
+                    return
                 self._on_position_changed(value)
         
         @self.player.property_observer('duration')
+        @perf_stats.timed('player.duration_observer', event_thread=True)
         def duration_observer(_name, value):
             if value is not None and self._on_duration_changed:
                 self._on_duration_changed(value)
         
         @self.player.event_callback('end-file')
+        @perf_stats.timed('player.eof_callback', event_thread=True)
         def eof_callback(event):
             # 只有在非加载状态时才触发（避免切换视频时误触发）
             if not self._is_loading and self._on_eof_reached:
                 self._on_eof_reached()
         
         @self.player.event_callback('file-loaded')
+        @perf_stats.timed('player.file_loaded_callback', event_thread=True)
+        @tracer.traced('player.file_loaded_callback')
         def file_loaded_callback(event):
             self._is_loading = False
+            if self._load_started_us is not None:
+                tracer.complete('player.load_to_file_loaded', self._load_started_us)
+            self._read_chapters()
             # 跳过片头
-            if self._skip_intro > 0:
-                self.seek_to(self._skip_intro)
+            start = self.start_position
+            if start > 0:
+                self._ranges_skipped.add('intro')
+                with tracer.span('player.intro_seek'):
+                    self.seek_to(start)
             if self._on_file_loaded:
                 self._on_file_loaded()
+
+        @self.player.event_callback('playback-restart')
+        def playback_restart_callback(event):
+            # 加载（及片头/进度跳转）后的第一次 playback-restart 即首帧开始显示
+            if self._load_started_us is not None and not self._is_loading:
+                tracer.complete('player.load_to_first_frame', self._load_started_us)
+                tracer.instant('player.first_frame')
+                self._load_started_us = None
     
     # ========== 基本播放控制 ==========
     
-    def load(self, filepath: str):
-        """加载视频文件"""
+    @tracer.traced('player.load')
+    def load(self, filepath: str, chapters: Optional[list] = None, options: Optional[dict] = None):
+        """加载视频文件
+        Args:
+            chapters: 已缓存的章节列表（省略时在加载完成后从 mpv 读取一次）
+            options: 只对这个文件生效的 mpv 选项（如 volume-gain），文件结束后 mpv 自动恢复原值
+        """
         self._is_loading = True
-        self.player.play(filepath)
+        self._load_started_us = tracer.now()
+        self._ranges_skipped = set()
+        self._chapters = chapters
+        self._chapter_intro = self._chapter_outro = None
+        if options:
+            self.player.loadfile(filepath, **options)
+        else:
+            self.player.play(filepath)
     
     def play(self):
         """播放"""
@@ -178,6 +261,116 @@ class PlayerCore:
     def skip_outro(self, value: int):
         """设置跳过片尾时间"""
         self._skip_outro = max(0, min(600, value))  # 最大10分钟
+
+    def set_detected_ranges(self, intro: Optional[tuple], outro: Optional[tuple]):
+        """设置自动识别的片头片尾（加载文件前调用）"""
+        self._intro_range = intro
+        self._outro_range = outro
+
+    @property
+    def chapters(self) -> list:
+        """当前文件的章节 [{time, title}]"""
+        return self._chapters or []
+
+    def _read_chapters(self):
+        """文件加载完成时读取章节（每个文件只读一次），并由章节标题得到片头片尾"""
+        if self._chapters is None:
+            try:
+                self._chapters = [
+                    {"time": c.get("time", 0), "title": c.get("title", "")} for c in self.player.chapter_list or []
+                ]
+            except Exception:
+                self._chapters = []
+        self._chapter_intro, self._chapter_outro = chapter_ranges(self._chapters, self.duration)
+
+    def set_chapters(self, chapters: list):
+        """替换当前文件的章节（如场景检测生成的章节）"""
+        self._chapters = chapters
+        self._chapter_intro, self._chapter_outro = chapter_ranges(chapters, self.duration)
+
+    def next_chapter(self) -> Optional[dict]:
+        """跳到下一章节，返回该章节；已是最后一章时返回 None"""
+        position = self.position
+        for chapter in self.chapters:
+            if chapter["time"] > position + 0.5:
+                self.seek_to(chapter["time"])
+                return chapter
+        return None
+
+    def prev_chapter(self) -> Optional[dict]:
+        """回到本章节开头（已在开头附近时跳到上一章节），返回该章节；没有章节时返回 None"""
+        position = self.position
+        earlier = [c for c in self.chapters if c["time"] < position - CHAPTER_BACK_S]
+        if not earlier:
+            return None
+        self.seek_to(earlier[-1]["time"])
+        return earlier[-1]
+
+    def _auto_intro(self) -> Optional[tuple]:
+        """自动跳过的片头：章节标题优先（覆盖手动设置），其次是未手动设置时的音频识别结果"""
+        if self._chapter_intro is not None:
+            return self._chapter_intro
+        return self._intro_range if self._skip_intro == 0 else None
+
+    def _auto_outro(self) -> Optional[tuple]:
+        if self._chapter_outro is not None:
+            return self._chapter_outro
+        return self._outro_range if self._skip_outro == 0 else None
+
+    @property
+    def intro_source(self) -> Optional[str]:
+        """自动跳过的片头来源：'chapter'（章节标题）、'audio'（音频识别）或 None"""
+        if self._chapter_intro is not None:
+            return 'chapter'
+        return 'audio' if self._auto_intro() is not None else None
+
+    @property
+    def outro_source(self) -> Optional[str]:
+        """自动跳过的片尾来源：'chapter'、'audio' 或 None"""
+        if self._chapter_outro is not None:
+            return 'chapter'
+        return 'audio' if self._auto_outro() is not None else None
+
+    @property
+    def start_position(self) -> float:
+        """从头播放时的起始位置（跳过片头）"""
+        intro = self._auto_intro()
+        if intro is None:
+            return self._skip_intro
+        return intro[1] if intro[0] <= INTRO_LEAD_S else 0
+
+    @property
+    def outro_start(self) -> Optional[float]:
+        """片尾开始位置（恢复进度时不跳到片尾之后），没有时返回 None"""
+        outro = self._auto_outro()
+        if outro is not None:
+            return outro[0]
+        if self._skip_outro > 0:
+            duration = self.duration
+            return duration - self._skip_outro if duration else None
+        return None
+
+    def _skip_detected_range(self, position: float, duration: float) -> bool:
+        """播放进入章节标题或音频识别得到的片头/片尾时跳过（在 mpv 事件线程中调用）
+        返回: 是否已结束播放
+        """
+        ranges = (('intro', self._auto_intro()), ('outro', self._auto_outro()))
+        for kind, span in ranges:
+            if span is None or kind in self._ranges_skipped:
+                continue
+            start, end = span
+            if not start <= position < min(end, start + RANGE_ENTER_S):
+                continue
+            self._ranges_skipped.add(kind)
+            if kind == 'outro' and duration and end >= duration - OUTRO_TAIL_S:
+                # 片尾之后没有内容：直接视为播放结束
+                self.stop()
+                if self._on_eof_reached:
+                    self._on_eof_reached()
+                return True
+            with tracer.span(f'player.{kind}_seek'):
+                self.seek_to(end)
+        return False
     
     # ========== 音量控制 ==========
     
@@ -319,6 +512,41 @@ class PlayerCore:
         except:
             pass
 
+    # ========== 播放质量 ==========
+
+    # 变化不频繁的指标：通过观察器缓存最新值
+    QUALITY_OBSERVED = (
+        'frame-drop-count', 'decoder-frame-drop-count', 'container-fps',
+        'video-codec', 'audio-codec-name', 'hwdec-current',
+    )
+    # 几乎每帧都变化的指标：只在采样时读取，避免每帧回调
+    QUALITY_SAMPLED = (
+        'avsync', 'estimated-vf-fps', 'demuxer-cache-duration', 'demuxer-cache-state',
+    )
+
+    def _setup_quality_observers(self):
+        """观察低频变化的播放质量指标"""
+        for name in self.QUALITY_OBSERVED:
+            self.player.observe_property(name, self._on_quality_property)
+
+    def _on_quality_property(self, name, value):
+        # 运行在 mpv 事件线程，只做一次赋值
+        self._quality[name] = value
+
+    def sample_quality(self) -> dict:
+        """采样播放质量指标（应低频调用，如每秒一次）
+        返回: {"frame-drop-count": int, "avsync": float, "demuxer-cache-bytes": int, ...}
+        """
+        stats = dict(self._quality)
+        for name in self.QUALITY_SAMPLED:
+            try:
+                stats[name] = self.player[name]
+            except Exception:
+                stats[name] = None
+        cache_state = stats.pop('demuxer-cache-state', None)
+        stats['demuxer-cache-bytes'] = cache_state.get('fw-bytes') if isinstance(cache_state, dict) else None
+        return stats
+
     # ========== 回调设置 ==========
     
     def set_position_callback(self, callback: Callable):
@@ -342,6 +570,7 @@ class PlayerCore:
     def terminate(self):
         """终止播放器"""
         self.player.terminate()
+        self._log_router.close()
     
     def __del__(self):
         """析构函数"""
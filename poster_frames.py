@@ -0,0 +1,224 @@
+"""
+播放列表封面帧
+- 每个文件取一帧有代表性的画面：依次尝试时长 20%、35%、50%、10% 处的关键帧，跳过黑场和纯色画面
+- 缩小为 96x54 的 JPEG 保存在 settings/posters（按文件标识命名），总大小有上限（启动时和每写入一定量后检查）
+- 可见行优先，其余文件在后台依次生成；播放时只用一个工作线程，且每生成一张后停顿，避免影响播放
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from PyQt6.QtGui import QImage, qGray
+
+from folder_settings import SETTINGS_DIR
+from media_cache import media_cache
+from media_probe import PROBE_KIND
+from thumbnailer import decode_frame, file_key, file_size, evict_dir, clear_disk_cache
+from tracing import tracer
+
+
+POSTER_WIDTH = 96
+POSTER_HEIGHT = 54
+POSTER_DIR = os.path.join(SETTINGS_DIR, "posters")
+MAX_DISK_BYTES = 64 * 1024 * 1024
+EVICT_CHECK_BYTES = MAX_DISK_BYTES // 10  # 每写入这么多字节检查一次上限
+POSTER_WORKERS = 2  # 未播放时的并发数
+PLAYING_WORKERS = 1  # 播放时的并发数
+PLAYING_PAUSE_S = 1.0  # 播放时每生成一张后的停顿
+HOLD_AFTER_LOAD_S = 3.0  # 播放器加载文件后暂停后台生成的时间
+SAMPLE_FRACTIONS = (0.2, 0.35, 0.5, 0.1)  # 取帧位置（占时长的比例）
+FALLBACK_SECONDS = (120, 300, 30, 600)  # 时长未知时的取帧位置
+BLACK_LEVEL = 24  # 平均亮度低于该值视为黑场
+FLAT_LEVEL = 6  # 亮度标准差低于该值视为纯色画面（片头字卡、转场）
+
+
+def frame_stats(image: QImage) -> tuple:
+    """画面的平均亮度和亮度标准差（在 16x9 的缩小图上计算）"""
+    small = image.scaled(16, 9)
+    values = [qGray(small.pixel(x, y)) for y in range(small.height()) for x in range(small.width())]
+    mean = sum(values) / len(values)
+    std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+    return mean, std
+
+
+def extract_poster(path: str) -> Optional[QImage]:
+    """取一帧有代表性的画面；都是黑场时用最亮的一帧"""
+    info = media_cache.get(PROBE_KIND, path)
+    duration = info.get("duration") if info else 0
+    times = [duration * f for f in SAMPLE_FRACTIONS] if duration else FALLBACK_SECONDS
+    best, best_mean = None, -1.0
+    for seconds in times:
+        image = decode_frame(path, seconds)
+        if image is None:
+            continue
+        mean, std = frame_stats(image)
+        if mean >= BLACK_LEVEL and std >= FLAT_LEVEL:
+            best = image
+            break
+        if mean > best_mean:
+            best, best_mean = image, mean
+    if best is None:
+        return None
+    return best.scaled(POSTER_WIDTH, POSTER_HEIGHT, Qt.AspectRatioMode.KeepAspectRatio,
+                       Qt.TransformationMode.SmoothTransformation)
+
+
+def clear_poster_cache() -> int:
+    """删除磁盘上的全部封面帧"""
+    return clear_disk_cache(POSTER_DIR)
+
+
+class PosterPool(QObject):
+    """后台生成播放列表的封面帧"""
+
+    ready = pyqtSignal(int, str, object)  # 编号, 文件路径, QImage
+
+    def __init__(self, parent=None, workers: int = POSTER_WORKERS):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._visible: deque = deque()  # 可见行（优先）
+        self._background: deque = deque()  # 其余文件
+        self._done: set = set()  # 已取出的文件（不重复生成）
+        self._playing = False
+        self._hold_until = 0.0
+        self._active = 0
+        self._written = 0  # 上次检查上限后写入的字节数（各工作线程共用）
+        self._stopping = False
+        self._workers = workers
+        self._threads: list = []
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set_files(self, files: list):
+        """设置需要在后台生成的文件（按播放列表顺序）"""
+        with self._cond:
+            self._background = deque(f for f in files if f not in self._done)
+            self._cond.notify_all()
+        self._start_workers()
+
+    def add(self, files: list):
+        """追加新出现的文件"""
+        with self._cond:
+            self._background.extend(f for f in files if f not in self._done)
+            self._cond.notify_all()
+        self._start_workers()
+
+    def request_visible(self, files: list):
+        """当前可见的行（替换上一次的可见行请求）"""
+        with self._cond:
+            self._visible = deque(f for f in files if f not in self._done)
+            self._cond.notify_all()
+        self._start_workers()
+
+    def set_playing(self, playing: bool):
+        """播放时降低并发"""
+        with self._cond:
+            if playing != self._playing:
+                self._playing = playing
+                self._cond.notify_all()
+
+    def hold(self, seconds: float = HOLD_AFTER_LOAD_S):
+        """暂停后台生成一段时间（可见行不受影响）"""
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def cancel(self):
+        """切换文件夹：丢弃全部任务"""
+        with self._cond:
+            self._generation += 1
+            self._visible.clear()
+            self._background.clear()
+            self._done.clear()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads = []
+
+    def _start_workers(self):
+        if self._threads or self._stopping:
+            return
+        try:
+            os.makedirs(POSTER_DIR, exist_ok=True)
+        except OSError as e:
+            logging.warning(f"无法创建封面帧目录: {e}")
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, args=(i == 0,), name=f'poster-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> Optional[tuple]:
+        """取出下一个文件：可见行优先；并发数达到上限或没有任务时等待，停止时返回 None"""
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                limit = PLAYING_WORKERS if self._playing else self._workers
+                wait = self._hold_until - time.monotonic()
+                if self._active < limit:
+                    queue = None
+                    if self._visible:
+                        queue = self._visible
+                    elif self._background and wait <= 0:
+                        queue = self._background
+                    if queue is not None:
+                        path = queue.popleft()
+                        if path in self._done:
+                            continue
+                        self._done.add(path)
+                        self._active += 1
+                        return self._generation, path, self._playing
+                timeout = wait if self._background and wait > 0 else None
+                self._cond.wait(timeout)
+
+    def _count_written(self, size: int):
+        """累计写入的字节数，超过检查量时淘汰旧的封面帧"""
+        with self._cond:
+            self._written += size
+            if self._written < EVICT_CHECK_BYTES:
+                return
+            self._written = 0
+        evict_dir(POSTER_DIR, MAX_DISK_BYTES)
+
+    def _run(self, evict: bool):
+        if evict:
+            evict_dir(POSTER_DIR, MAX_DISK_BYTES)
+        while True:
+            item = self._next()
+            if item is None:
+                break
+            generation, path, playing = item
+            decoded = False
+            try:
+                key = file_key(path)
+                if key is None:
+                    continue
+                disk_path = os.path.join(POSTER_DIR, f"{key}.jpg")
+                image = QImage(disk_path) if os.path.exists(disk_path) else None
+                if image is None or image.isNull():
+                    with tracer.span('poster.extract', cat='thumbnail'):
+                        image = extract_poster(path)
+                    decoded = True
+                    if image is None:
+                        continue
+                    if image.save(disk_path, "JPG", 75):
+                        self._count_written(file_size(disk_path))
+                self.ready.emit(generation, path, image)
+            except Exception as e:
+                logging.debug(f"生成封面帧失败 {path}: {e}")
+            finally:
+                if decoded and playing:
+                    time.sleep(PLAYING_PAUSE_S)  # 停顿期间仍占用并发名额
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
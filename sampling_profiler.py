@@ -0,0 +1,110 @@
+"""
+采样分析器（可在打包后的程序中使用）
+- 在后台线程中定时采样所有 Python 线程（包括 python-mpv 事件线程）的调用栈
+- 输出 collapsed stack 格式（每行 "线程;函数;函数... 次数"），可直接用 flamegraph.pl / speedscope 生成火焰图
+- 未触发时不创建任何线程，没有额外开销
+触发方式: 隐藏快捷键 Ctrl+Shift+F、命令行参数 --profile[=秒数]、环境变量 PLAYER_PROFILE=秒数
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Optional
+
+
+DEFAULT_DURATION_S = 10.0  # 默认采样时长
+DEFAULT_INTERVAL_MS = 5.0  # 采样间隔
+MAX_DEPTH = 128  # 单个调用栈最大深度
+
+_active: Optional["SamplingProfiler"] = None
+_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    """定时采样所有线程调用栈"""
+
+    def __init__(self, out_dir: str, duration_s: float = DEFAULT_DURATION_S,
+                 interval_ms: float = DEFAULT_INTERVAL_MS):
+        self.out_dir = out_dir
+        self.duration_s = duration_s
+        self.interval_s = interval_ms / 1000
+        self.output_path = os.path.join(out_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+        self._counts: Counter = Counter()
+        self._labels: dict = {}  # 代码对象 -> 帧名称缓存
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample(self, own_ident: int, thread_names: dict):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(thread_names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self._counts[";".join(stack)] += 1
+
+    def _run(self):
+        global _active
+        own_ident = threading.get_ident()
+        samples = 0
+        start = time.perf_counter()
+        deadline = start + self.duration_s
+        next_names_refresh = 0.0
+        thread_names: dict = {}
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if now >= next_names_refresh:
+                    thread_names = {t.ident: t.name for t in threading.enumerate()}
+                    next_names_refresh = now + 1.0
+                self._sample(own_ident, thread_names)
+                samples += 1
+                time.sleep(self.interval_s)
+            self._write()
+            elapsed = time.perf_counter() - start
+            logging.info(f"采样分析完成：{samples} 次采样，用时 {elapsed:.1f}s，结果已写入 {self.output_path}")
+        except Exception as e:
+            logging.error(f"采样分析失败: {e}")
+        finally:
+            with _lock:
+                _active = None
+
+    def _write(self):
+        with open(self.output_path, "w", encoding="utf-8") as f:
+            for stack, count in self._counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def start_profiling(out_dir: str, duration_s: float = DEFAULT_DURATION_S) -> Optional[str]:
+    """开始一次采样分析
+    返回: 输出文件路径；已有分析在进行时返回 None
+    """
+    global _active
+    with _lock:
+        if _active is not None:
+            return None
+        _active = SamplingProfiler(out_dir, duration_s)
+        profiler = _active
+    logging.info(f"开始采样分析 {duration_s:.0f}s")
+    profiler.start()
+    return profiler.output_path
+
+
+def is_profiling() -> bool:
+    return _active is not None
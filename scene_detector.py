@@ -0,0 +1,305 @@
+"""
+场景切换检测（为没有章节的文件生成章节）
+- 在独立进程中用无界面 mpv 按每秒 2 帧输出缩小到 64x36 的灰度画面；每次只解码一段（120 秒），
+  内存占用与文件长度无关
+- 用 NumPy 计算相邻画面的灰度直方图差和像素差，超过局部平均数倍的位置视为镜头切换；
+  再按强度挑选彼此间隔不少于 3 分钟的切换点（黑场之后的切换优先）作为章节
+- 结果按 (路径, 大小, 修改时间) 缓存在 media_cache 中，每个文件只检测一次
+- CPU 核数较少的机器上播放时暂停（在两段之间暂停，不中断正在解码的一段）
+- 未安装 NumPy 时不做检测
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import mpv
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from media_cache import media_cache, file_stat
+from mpv_log import MpvLogRouter
+from tracing import tracer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+SCENE_KIND = "scenes"
+SCENE_VERSION = 1  # 检测算法变化时递增，旧缓存自动失效
+SAMPLE_FPS = 2
+FRAME_WIDTH = 64
+FRAME_HEIGHT = 36
+SEGMENT_S = 120  # 每次解码的时长
+DECODE_TIMEOUT_S = 60.0
+MIN_FILE_S = 300  # 短于该时长的文件不检测
+WEAK_CPU_COUNT = 4  # 核数不超过该值时，播放期间暂停检测
+HOLD_AFTER_LOAD_S = 5.0  # 播放器加载文件后暂停检测的时间
+
+HIST_BINS = 16
+CUT_MIN_SCORE = 0.15  # 切换分数的下限
+CUT_RATIO = 3.0  # 切换分数至少是局部平均的倍数
+LOCAL_WINDOW = 21  # 局部平均的窗口（采样数）
+DARK_LEVEL = 20  # 平均亮度低于该值视为黑场
+DARK_BONUS = 0.3  # 黑场之后的切换（段落之间常见的淡出）加分
+MIN_CHAPTER_S = 180  # 章节之间的最小间隔
+
+
+def available() -> bool:
+    """是否可以检测（需要 NumPy）"""
+    return np is not None
+
+
+# ---------- 分段分析（在检测进程中运行） ---------- #
+
+def decode_gray_frames(path: str, start: float, length: float):
+    """解码一段视频，返回 (帧数, 高, 宽) 的 uint8 灰度画面；失败时返回 None"""
+    fd, out_path = tempfile.mkstemp(suffix=".gray")
+    os.close(fd)
+    router = MpvLogRouter('error')
+    try:
+        encoder = mpv.MPV(
+            log_handler=router,
+            loglevel=router.level,
+            o=out_path,
+            of='rawvideo',
+            ovc='rawvideo',
+            vf=f"lavfi=[fps={SAMPLE_FPS},scale={FRAME_WIDTH}:{FRAME_HEIGHT},format=gray]",
+            start=f"{start:.3f}",
+            length=f"{length:.3f}",
+            hwdec='no',
+            vd_lavc_fast=True,
+            vd_lavc_skiploopfilter='all',
+            aid='no',
+            sid='no',
+            osc=False,
+            load_scripts=False,
+            ytdl=False,
+            input_default_bindings=False,
+        )
+        try:
+            encoder.play(path)
+            encoder.wait_for_playback(timeout=DECODE_TIMEOUT_S)
+        finally:
+            encoder.terminate()
+        data = np.fromfile(out_path, dtype=np.uint8)
+        count = len(data) // (FRAME_WIDTH * FRAME_HEIGHT)
+        return data[:count * FRAME_WIDTH * FRAME_HEIGHT].reshape(count, FRAME_HEIGHT, FRAME_WIDTH)
+    except Exception as e:
+        logging.debug(f"解码画面失败 {path} @{start:.0f}s: {e}")
+        return None
+    finally:
+        router.close()
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+
+
+def frame_scores(frames) -> tuple:
+    """相邻画面的切换分数（直方图差和像素差的平均，0~1）和前一帧是否为黑场"""
+    count = len(frames)
+    if count < 2:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool)
+    flat = frames.reshape(count, -1)
+    bins = (flat // (256 // HIST_BINS)).astype(np.int64)
+    hist = np.bincount((np.arange(count)[:, None] * HIST_BINS + bins).ravel(), minlength=count * HIST_BINS)
+    hist = hist.reshape(count, HIST_BINS) / flat.shape[1]
+    hist_diff = 0.5 * np.abs(np.diff(hist, axis=0)).sum(axis=1)
+    pixel_diff = np.abs(np.diff(flat.astype(np.int16), axis=0)).mean(axis=1) / 255.0
+    dark = flat.mean(axis=1)[:-1] < DARK_LEVEL
+    return ((hist_diff + pixel_diff) / 2).astype(np.float32), dark
+
+
+def analyze_segment(path: str, start: float, length: float) -> Optional[dict]:
+    """分析一段视频（检测进程的入口）
+    返回: {"times", "scores", "dark"}，times 为每个分数对应的切换时间；无法解码时返回 None
+    """
+    frames = decode_gray_frames(path, start, length)
+    if frames is None:
+        return None
+    scores, dark = frame_scores(frames)
+    times = start + (np.arange(len(scores)) + 1) / SAMPLE_FPS
+    return {"times": times.tolist(), "scores": scores.tolist(), "dark": dark.tolist()}
+
+
+# ---------- 生成章节 ---------- #
+
+def pick_chapters(times, scores, dark, duration: float) -> list:
+    """从切换分数中挑选章节开始位置
+    返回: [{"time", "title"}]，第一个章节从 0 开始；没有合适的切换点时只有一个章节
+    """
+    times = np.asarray(times, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float32)
+    dark = np.asarray(dark, dtype=bool)
+    starts = [0.0]
+    if len(scores) > LOCAL_WINDOW:
+        local = np.convolve(scores, np.ones(LOCAL_WINDOW) / LOCAL_WINDOW, mode='same')
+        cut = (scores >= CUT_MIN_SCORE) & (scores >= local * CUT_RATIO)
+        cut &= (times >= MIN_CHAPTER_S) & (times <= duration - MIN_CHAPTER_S / 2)
+        strength = scores + DARK_BONUS * dark
+        for i in np.flatnonzero(cut)[np.argsort(-strength[cut], kind='stable')]:
+            t = float(times[i])
+            if all(abs(t - s) >= MIN_CHAPTER_S for s in starts):
+                starts.append(t)
+    return [{"time": round(t, 2), "title": f"场景 {n + 1}"} for n, t in enumerate(sorted(starts))]
+
+
+def cached_chapters(path: str, stat: Optional[tuple] = None) -> Optional[list]:
+    """缓存中当前版本的检测结果，没有时返回 None"""
+    cached = media_cache.get(SCENE_KIND, path, stat)
+    if cached is not None and cached.get("version") == SCENE_VERSION:
+        return cached["chapters"]
+    return None
+
+
+# ---------- 后台检测 ---------- #
+
+class SceneDetector(QObject):
+    """后台为没有章节的文件生成章节"""
+
+    detected = pyqtSignal(str, list)  # 文件路径, 章节列表
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: deque = deque()  # (文件路径, 时长)
+        self._queued: set = set()
+        self._playing = False
+        self._hold_until = 0.0
+        self._stopping = False
+        self._weak_cpu = (os.cpu_count() or 1) <= WEAK_CPU_COUNT
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._warned = False
+
+    def add(self, files: dict):
+        """追加需要检测的文件 {路径: 时长}（没有章节的文件）"""
+        if not available():
+            if files and not self._warned:
+                self._warned = True
+                logging.info("未安装 NumPy，不为没有章节的文件生成章节")
+            return
+        with self._cond:
+            for path, duration in files.items():
+                if path not in self._queued and duration >= MIN_FILE_S:
+                    self._queued.add(path)
+                    self._pending.append((path, duration))
+            self._cond.notify_all()
+        self._start()
+
+    def set_current(self, path: str):
+        """当前播放的文件优先检测"""
+        with self._cond:
+            for item in self._pending:
+                if item[0] == path:
+                    self._pending.remove(item)
+                    self._pending.appendleft(item)
+                    break
+
+    def set_playing(self, playing: bool):
+        """播放状态变化（CPU 核数较少时播放期间暂停）"""
+        with self._cond:
+            if playing != self._playing:
+                self._playing = playing
+                self._cond.notify_all()
+
+    def hold(self, seconds: float = HOLD_AFTER_LOAD_S):
+        """暂停检测一段时间（播放器加载文件时调用）"""
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def cancel(self):
+        """切换文件夹：丢弃尚未完成的检测"""
+        with self._cond:
+            self._generation += 1
+            self._pending.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+
+    def stop(self):
+        """停止后台线程和检测进程（正在解码的一段会在超时内结束）"""
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _start(self):
+        if self._thread is None and not self._stopping:
+            self._thread = threading.Thread(target=self._run, name='scene-detector', daemon=True)
+            self._thread.start()
+
+    def _wait_turn(self, generation: int) -> bool:
+        """等到可以解码下一段（未暂停）
+        返回: False 表示已取消或停止
+        """
+        with self._cond:
+            while True:
+                if self._stopping or self._generation != generation:
+                    return False
+                wait = self._hold_until - time.monotonic()
+                if wait <= 0 and not (self._playing and self._weak_cpu):
+                    return True
+                self._cond.wait(wait if wait > 0 else None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                path, duration = self._pending.popleft()
+                generation = self._generation
+            try:
+                chapters = self._detect(generation, path, duration)
+            except Exception as e:
+                logging.error(f"场景检测失败 {path}: {e}")
+                continue
+            if chapters is not None:
+                self.detected.emit(path, chapters)
+
+    def _detect(self, generation: int, path: str, duration: float) -> Optional[list]:
+        """检测一个文件（优先读取缓存）；取消或无法解码时返回 None"""
+        stat = file_stat(path)
+        if stat is None:
+            return None
+        cached = cached_chapters(path, stat)
+        if cached is not None:
+            return cached
+        times, scores, dark = [], [], []
+        step = 1.0 / SAMPLE_FPS
+        for start in np.arange(0.0, duration, SEGMENT_S):
+            if not self._wait_turn(generation):
+                return None
+            # 每段向前多取一帧，使段与段之间的切换也能被检测到
+            begin = max(0.0, start - step)
+            with tracer.span('scene.segment', cat='probe'):
+                result = self._pool().submit(analyze_segment, path, begin, SEGMENT_S + start - begin).result()
+            if result is None:
+                return None
+            times.extend(result["times"])
+            scores.extend(result["scores"])
+            dark.extend(result["dark"])
+        chapters = pick_chapters(times, scores, dark, duration)
+        media_cache.put(SCENE_KIND, path, {"version": SCENE_VERSION, "chapters": chapters}, stat)
+        return chapters
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 单个检测进程：内存只与一段的画面数量有关
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
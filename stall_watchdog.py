@@ -0,0 +1,113 @@
+"""
+主线程卡顿看门狗
+- Qt 事件循环中的定时器持续更新心跳
+- 后台线程发现心跳停止超过阈值时，把所有线程（包括 mpv 回调线程）的调用栈写入 fault.log
+- 统计本次会话的卡顿次数、累计时长和最长时长
+"""
+import time
+import logging
+import threading
+import faulthandler
+from typing import Optional, TextIO
+
+from PyQt6.QtCore import QObject, QTimer
+
+
+HEARTBEAT_MS = 100  # 心跳间隔
+DEFAULT_THRESHOLD_MS = 2000  # 默认卡顿阈值
+
+
+class StallWatchdog(QObject):
+    """主线程卡顿检测"""
+
+    def __init__(self, fault_file: Optional[TextIO], threshold_ms: int = DEFAULT_THRESHOLD_MS, parent=None):
+        super().__init__(parent)
+        self._fault_file = fault_file
+        self._threshold = threshold_ms / 1000
+        self._last_beat = time.monotonic()
+        self._stall_started: Optional[float] = None  # 当前卡顿的开始时间（已转储时设置）
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 会话统计
+        self.stall_count = 0
+        self.total_stall_s = 0.0
+        self.max_stall_s = 0.0
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.timeout.connect(self._beat)
+
+    def start(self):
+        """启动心跳和检测线程"""
+        self._last_beat = time.monotonic()
+        self._heartbeat.start(HEARTBEAT_MS)
+        self._thread = threading.Thread(target=self._watch, name='stall-watchdog', daemon=True)
+        self._thread.start()
+        logging.info(f"卡顿看门狗已启动，阈值 {self._threshold * 1000:.0f}ms")
+
+    def stop(self):
+        """停止检测并记录本次会话的卡顿统计"""
+        self._heartbeat.stop()
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(1.0)
+            self._thread = None
+        stats = self.stats()
+        logging.info(
+            f"本次会话卡顿 {stats['count']} 次，累计 {stats['total_s']:.1f}s，最长 {stats['max_s']:.1f}s"
+        )
+
+    def stats(self) -> dict:
+        """会话卡顿统计"""
+        return {
+            'count': self.stall_count,
+            'total_s': round(self.total_stall_s, 2),
+            'max_s': round(self.max_stall_s, 2),
+            'threshold_ms': int(self._threshold * 1000),
+        }
+
+    def _beat(self):
+        """主线程心跳"""
+        now = time.monotonic()
+        duration = now - self._last_beat
+        if self._stall_started is not None:
+            self._stall_started = None
+            if duration < self._threshold:
+                # 检测线程判断时心跳恰好恢复，不算卡顿
+                self._last_beat = now
+                return
+            self.stall_count += 1
+            self.total_stall_s += duration
+            self.max_stall_s = max(self.max_stall_s, duration)
+            logging.warning(f"主线程卡顿已恢复，持续 {duration:.2f}s")
+            self._write(f"----- 主线程恢复，卡顿持续 {duration:.2f}s -----\n")
+        self._last_beat = now
+
+    def _watch(self):
+        """后台检测线程"""
+        interval = max(0.05, self._threshold / 4)
+        while not self._stop_event.wait(interval):
+            gap = time.monotonic() - self._last_beat
+            if gap >= self._threshold and self._stall_started is None:
+                self._stall_started = self._last_beat
+                self._dump(gap)
+
+    def _dump(self, gap: float):
+        """写入所有线程的调用栈"""
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        logging.warning(f"检测到主线程卡顿（已持续 {gap:.2f}s），调用栈已写入 fault.log")
+        self._write(f"\n===== {timestamp} 主线程卡顿，已持续 {gap:.2f}s =====\n")
+        if self._fault_file is not None:
+            try:
+                faulthandler.dump_traceback(file=self._fault_file, all_threads=True)
+            except Exception:
+                pass
+
+    def _write(self, text: str):
+        if self._fault_file is None:
+            return
+        try:
+            self._fault_file.write(text)
+            self._fault_file.flush()
+        except Exception:
+            pass
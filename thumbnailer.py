@@ -0,0 +1,316 @@
+"""
+进度条悬停缩略图
+- 每张缩略图用一个独立的 mpv 实例在编码模式下输出一帧 rawvideo（跳到关键帧、缩小到 160x90），
+  不影响正在播放的 PlayerCore
+- 悬停请求优先（只保留最新的一个），空闲时在后台按稀疏网格预先生成
+- 内存中按最近使用保留 QImage；磁盘缓存 JPEG（按文件标识和时间桶命名），启动时和每写入一定量后
+  检查总大小，超过上限时淘汰最旧的
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from typing import Optional
+
+import mpv
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from folder_settings import SETTINGS_DIR
+from media_cache import file_stat
+from mpv_log import MpvLogRouter
+from tracing import tracer
+
+
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+BUCKET_S = 10  # 时间桶：同一桶内的悬停位置共用一张缩略图
+GRID_COUNT = 50  # 每个文件预先生成的缩略图数量
+GRID_PAUSE_S = 0.2  # 预先生成时每张之间的间隔
+MEMORY_ITEMS = 400  # 内存中保留的缩略图数量
+THUMB_DIR = os.path.join(SETTINGS_DIR, "thumbnails")
+MAX_DISK_BYTES = 200 * 1024 * 1024  # 磁盘缓存上限
+EVICT_CHECK_BYTES = MAX_DISK_BYTES // 10  # 每写入这么多字节检查一次上限
+DECODE_TIMEOUT_S = 8.0
+HOLD_AFTER_LOAD_S = 3.0  # 播放器加载文件后暂停预先生成的时间
+
+_SCALE_FILTER = (
+    f"lavfi=[scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease,"
+    f"pad={THUMB_WIDTH}:{THUMB_HEIGHT}:(ow-iw)/2:(oh-ih)/2,format=bgra]"
+)
+
+
+def file_key(path: str) -> Optional[str]:
+    """文件标识（路径、大小、修改时间），文件被替换后缩略图自动失效"""
+    stat = file_stat(path)
+    if stat is None:
+        return None
+    return hashlib.sha1(f"{path}|{stat[0]}|{stat[1]}".encode("utf-8")).hexdigest()[:20]
+
+
+def decode_frame(path: str, seconds: float) -> Optional[QImage]:
+    """解码 seconds 之前最近的关键帧，返回缩小后的图像"""
+    fd, out_path = tempfile.mkstemp(suffix=".bgra")
+    os.close(fd)
+    router = MpvLogRouter('error')
+    try:
+        encoder = mpv.MPV(
+            log_handler=router,
+            loglevel=router.level,
+            o=out_path,
+            of='rawvideo',
+            ovc='rawvideo',
+            vf=_SCALE_FILTER,
+            start=f"{max(0.0, seconds):.3f}",
+            frames=1,
+            hr_seek='no',
+            aid='no',
+            sid='no',
+            osc=False,
+            load_scripts=False,
+            ytdl=False,
+            input_default_bindings=False,
+        )
+        try:
+            encoder.play(path)
+            encoder.wait_for_playback(timeout=DECODE_TIMEOUT_S)
+        finally:
+            encoder.terminate()
+        size = THUMB_WIDTH * THUMB_HEIGHT * 4
+        with open(out_path, "rb") as f:
+            data = f.read(size)
+        if len(data) < size:
+            return None
+        return QImage(data, THUMB_WIDTH, THUMB_HEIGHT, THUMB_WIDTH * 4, QImage.Format.Format_RGB32).copy()
+    except Exception as e:
+        logging.debug(f"生成缩略图失败 {path} @{seconds:.0f}s: {e}")
+        return None
+    finally:
+        router.close()
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+
+
+def file_size(path: str) -> int:
+    """文件大小（字节），无法访问时为 0"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _disk_entries(directory: str) -> list:
+    try:
+        with os.scandir(directory) as it:
+            return [e for e in it if e.name.endswith(".jpg")]
+    except OSError:
+        return []
+
+
+def evict_dir(directory: str, max_bytes: int):
+    """目录中的图片总大小超过上限时删除最旧的，直到降到上限的 80%"""
+    items = []
+    for entry in _disk_entries(directory):
+        try:
+            st = entry.stat()
+            items.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in items)
+    if total <= max_bytes:
+        return
+    items.sort()
+    for _, size, path in items:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes * 0.8:
+            break
+
+
+def clear_disk_cache(directory: str = THUMB_DIR) -> int:
+    """删除磁盘上的全部缩略图
+    返回: 删除的数量
+    """
+    count = 0
+    for entry in _disk_entries(directory):
+        try:
+            os.remove(entry.path)
+            count += 1
+        except OSError:
+            pass
+    return count
+
+
+class Thumbnailer(QObject):
+    """当前播放文件的缩略图（悬停时按需生成，空闲时预先生成）"""
+
+    ready = pyqtSignal(str, int, object)  # 文件标识, 时间桶, QImage
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._memory: OrderedDict = OrderedDict()  # (文件标识, 时间桶) -> QImage
+        self._key: Optional[str] = None
+        self._path: Optional[str] = None
+        self._hover: Optional[tuple] = None  # (文件标识, 路径, 时间桶)
+        self._grid: deque = deque()  # 待预先生成的时间桶
+        self._hold_until = 0.0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def key(self) -> Optional[str]:
+        return self._key
+
+    def set_file(self, path: str, duration: float):
+        """切换到新文件，并在后台按网格预先生成"""
+        key = file_key(path)
+        with self._cond:
+            self._key = key
+            self._path = path
+            self._hover = None
+            self._grid.clear()
+            if key is not None and duration > 0:
+                step = max(BUCKET_S, duration / GRID_COUNT)
+                buckets = {int(i * step // BUCKET_S) for i in range(int(duration // step) + 1)}
+                self._grid.extend(sorted(buckets))
+            self._cond.notify_all()
+        self._start()
+
+    def clear(self):
+        """不再显示当前文件的缩略图（停止播放或切换文件时调用）"""
+        with self._cond:
+            self._key = None
+            self._path = None
+            self._hover = None
+            self._grid.clear()
+
+    def hold(self, seconds: float = HOLD_AFTER_LOAD_S):
+        """暂停预先生成一段时间（悬停请求不受影响）"""
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def get(self, bucket: int) -> Optional[QImage]:
+        """已生成的缩略图（内存或磁盘），没有时返回 None"""
+        key = self._key
+        if key is None:
+            return None
+        with self._cond:
+            image = self._memory.get((key, bucket))
+            if image is not None:
+                self._memory.move_to_end((key, bucket))
+                return image
+        path = self._disk_path(key, bucket)
+        if not os.path.exists(path):
+            return None
+        image = QImage(path)
+        if image.isNull():
+            return None
+        self._remember(key, bucket, image)
+        return image
+
+    def nearest(self, bucket: int) -> Optional[QImage]:
+        """内存中离 bucket 最近的缩略图（等待生成时先显示）"""
+        key = self._key
+        best, best_distance = None, None
+        with self._cond:
+            for (k, b), image in self._memory.items():
+                if k == key and (best_distance is None or abs(b - bucket) < best_distance):
+                    best, best_distance = image, abs(b - bucket)
+        return best
+
+    def request(self, bucket: int):
+        """请求生成缩略图（替换尚未开始的上一个请求），完成后发出 ready"""
+        with self._cond:
+            if self._key is None:
+                return
+            self._hover = (self._key, self._path, bucket)
+            self._cond.notify_all()
+        self._start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    # ---------- 后台线程 ---------- #
+
+    def _start(self):
+        if self._thread is None and not self._stopping:
+            self._thread = threading.Thread(target=self._run, name='thumbnailer', daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _disk_path(key: str, bucket: int) -> str:
+        return os.path.join(THUMB_DIR, f"{key}_{bucket}.jpg")
+
+    def _remember(self, key: str, bucket: int, image: QImage):
+        with self._cond:
+            self._memory[(key, bucket)] = image
+            self._memory.move_to_end((key, bucket))
+            while len(self._memory) > MEMORY_ITEMS:
+                self._memory.popitem(last=False)
+
+    def _next(self) -> Optional[tuple]:
+        """取出下一个任务：悬停请求优先；没有任务时等待，停止时返回 None"""
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                if self._hover is not None:
+                    item, self._hover = self._hover, None
+                    return item + (True,)
+                wait = self._hold_until - time.monotonic()
+                if self._grid and wait <= 0:
+                    return self._key, self._path, self._grid.popleft(), False
+                self._cond.wait(wait if self._grid else None)
+
+    def _run(self):
+        try:
+            os.makedirs(THUMB_DIR, exist_ok=True)
+        except OSError as e:
+            logging.warning(f"无法创建缩略图目录: {e}")
+        evict_dir(THUMB_DIR, MAX_DISK_BYTES)
+        written = 0  # 上次检查上限后写入的字节数
+        while True:
+            item = self._next()
+            if item is None:
+                break
+            key, path, bucket, hover = item
+            try:
+                disk_path = self._disk_path(key, bucket)
+                if os.path.exists(disk_path):
+                    if hover:
+                        image = QImage(disk_path)
+                        if not image.isNull():
+                            self._remember(key, bucket, image)
+                            self.ready.emit(key, bucket, image)
+                    continue
+                with tracer.span('thumbnail.decode', cat='thumbnail', args={'hover': hover}):
+                    image = decode_frame(path, bucket * BUCKET_S)
+                if image is None:
+                    continue
+                self._remember(key, bucket, image)
+                if image.save(disk_path, "JPG", 80):
+                    written += file_size(disk_path)
+                    if written >= EVICT_CHECK_BYTES:
+                        evict_dir(THUMB_DIR, MAX_DISK_BYTES)
+                        written = 0
+                self.ready.emit(key, bucket, image)
+            except Exception as e:
+                # 单张出错不结束工作线程（线程结束后不会再启动）
+                logging.debug(f"生成缩略图失败 {path} @{bucket * BUCKET_S}s: {e}")
+                continue
+            if not hover:
+                time.sleep(GRID_PAUSE_S)
@@ -0,0 +1,139 @@
+"""
+时间线追踪
+- 以 span 方式记录换集等流程中每一步的起止时间和线程
+- 事件保存在固定长度的环形缓冲区中，可以长期开启
+- 导出为 Chrome Trace Event JSON（可在 chrome://tracing 或 Perfetto 中打开）
+- 通过环境变量 PLAYER_TRACE=0/1 或全局设置 trace_enabled 控制
+"""
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+
+# 环形缓冲区容量（事件数）
+RING_SIZE = 20000
+
+_NULL_CONTEXT = nullcontext()
+
+
+def _now_us() -> float:
+    """当前时间戳（微秒，单调时钟）"""
+    return time.perf_counter_ns() / 1000
+
+
+class Tracer:
+    """span 追踪器（线程安全）"""
+
+    def __init__(self, capacity: int = RING_SIZE):
+        env = os.environ.get("PLAYER_TRACE")
+        self.enabled = env != "0" if env is not None else True
+        # deque.append 本身是线程安全的，无需额外加锁
+        self._events: deque = deque(maxlen=capacity)
+        self._thread_names: dict[int, str] = {}
+        self._pid = os.getpid()
+
+    def enable(self, enabled: bool = True):
+        """启用/停用追踪"""
+        self.enabled = enabled
+
+    def clear(self):
+        """清空缓冲区"""
+        self._events.clear()
+
+    @staticmethod
+    def now() -> float:
+        """当前时间戳（微秒），用于 complete() 的起止时间"""
+        return _now_us()
+
+    def _tid(self) -> int:
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        if tid not in self._thread_names:
+            self._thread_names[tid] = thread.name
+        return tid
+
+    def complete(self, name: str, start_us: float, end_us: Optional[float] = None,
+                 cat: str = "player", args: Optional[dict] = None):
+        """记录一个已知起止时间的 span（可跨回调、跨线程）"""
+        if not self.enabled:
+            return
+        if end_us is None:
+            end_us = _now_us()
+        event = {
+            "name": name, "cat": cat, "ph": "X",
+            "ts": start_us, "dur": max(0.0, end_us - start_us),
+            "pid": self._pid, "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+        self._events.append(event)
+
+    def instant(self, name: str, cat: str = "player", args: Optional[dict] = None):
+        """记录一个瞬时事件"""
+        if not self.enabled:
+            return
+        event = {
+            "name": name, "cat": cat, "ph": "i", "s": "t",
+            "ts": _now_us(), "pid": self._pid, "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+        self._events.append(event)
+
+    def span(self, name: str, cat: str = "player", args: Optional[dict] = None):
+        """上下文管理器：记录代码块的 span"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._span(name, cat, args)
+
+    @contextmanager
+    def _span(self, name: str, cat: str, args: Optional[dict]):
+        start = _now_us()
+        try:
+            yield
+        finally:
+            self.complete(name, start, cat=cat, args=args)
+
+    def traced(self, name: str, cat: str = "player") -> Callable:
+        """装饰器：记录函数调用的 span"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = _now_us()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.complete(name, start, cat=cat)
+            return wrapper
+        return decorator
+
+    def export(self, path: str) -> int:
+        """导出缓冲区中的事件到 Trace Event JSON 文件
+        返回: 导出的事件数量
+        """
+        events = list(self._events)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        data = {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        except IOError as e:
+            logging.error(f"导出追踪数据失败: {e}")
+            return 0
+        logging.info(f"已导出 {len(events)} 个追踪事件到 {path}")
+        return len(events)
+
+
+# 全局实例
+tracer = Tracer()